@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Benchmark address.is_allowed() on a config with many interface addresses """
+import os
+import sys
+import time
+import argparse
+
+try:
+    from vppcfg.config import address
+except ModuleNotFoundError:
+    sys.path.insert(
+        0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    )
+    from vppcfg.config import address
+from vppcfg.config.index import IndexedConfig
+
+
+def make_config(naddresses, nphys=4):
+    """Return a config with 'naddresses' addresses, spread over sub-interfaces of
+    'nphys' PHYs, each sub-interface having one IPv4 /31 and one IPv6 /64."""
+    cfg = {"interfaces": {}}
+    nsubs = naddresses // 2
+    for phy in range(nphys):
+        cfg["interfaces"][f"GigabitEthernet{phy}/0/0"] = {"sub-interfaces": {}}
+    for i in range(nsubs):
+        phy_ifname = f"GigabitEthernet{i % nphys}/0/0"
+        subid = i // nphys + 1
+        cfg["interfaces"][phy_ifname]["sub-interfaces"][subid] = {
+            "addresses": [
+                f"10.{(i >> 15) & 0xFF}.{(i >> 7) & 0xFF}.{(i << 1) & 0xFF}/31",
+                f"2001:db8:{i >> 16:x}:{i & 0xFFFF:x}::1/64",
+            ]
+        }
+    return cfg
+
+
+def run(cfg):
+    """Call address.is_allowed() for every address in the config, like the interface
+    validator does. Returns the number of addresses and the number of conflicts."""
+    naddresses = 0
+    nconflicts = 0
+    for phy_ifname, iface in cfg["interfaces"].items():
+        for subid, sub_iface in iface["sub-interfaces"].items():
+            sub_ifname = f"{phy_ifname}.{int(subid)}"
+            for addr in sub_iface["addresses"]:
+                naddresses += 1
+                if not address.is_allowed(
+                    cfg, sub_ifname, sub_iface["addresses"], addr
+                ):
+                    nconflicts += 1
+    return naddresses, nconflicts
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument(
+        "-n",
+        "--addresses",
+        dest="addresses",
+        type=int,
+        default=50000,
+        help="""Number of addresses in the config, default 50000""",
+    )
+    parser.add_argument(
+        "--scan",
+        dest="scan",
+        action="store_true",
+        help="""Use the plain config without index (quadratic, use a small -n)""",
+    )
+    args = parser.parse_args()
+
+    cfg = make_config(args.addresses)
+    if not args.scan:
+        cfg = IndexedConfig(cfg)
+
+    start = time.monotonic()
+    naddresses, nconflicts = run(cfg)
+    elapsed = time.monotonic() - start
+    print(
+        f"address.is_allowed: {naddresses} addresses, {nconflicts} conflicts, "
+        f"{elapsed:.3f}s ({'scan' if args.scan else 'indexed'})"
+    )
+
+
+if __name__ == "__main__":
+    main()
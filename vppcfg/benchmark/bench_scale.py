@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Benchmark validating, planning, reading and dumping a generated config of a given
+size, without a running VPP Dataplane, and compare the results against a baseline """
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from functools import partial
+
+try:
+    from vppcfg.config import Validator
+except ModuleNotFoundError:
+    sys.path.insert(
+        0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    )
+    from vppcfg.config import Validator
+from vppcfg.vpp.vppapi import VPPApi
+from vppcfg.vpp.dumper import Dumper
+from vppcfg.vpp.reconciler import Reconciler
+from vppcfg.vpp.synthetic import synthesize
+from vppcfg.benchmark import generator
+from vppcfg.benchmark import vppstate
+
+REPORT_VERSION = 1
+
+## The arguments of generator.generate(), which are the parameters of the benchmark
+SIZES = [
+    ("phys", 4),
+    ("sub_interfaces", 1000),
+    ("bridgedomains", 100),
+    ("loopbacks", 100),
+    ("bondethernets", 4),
+    ("vxlan_tunnels", 100),
+    ("prefixlists", 100),
+    ("acls", 100),
+]
+
+
+def get_phases(sizes, cfg, source):
+    """Returns the phases of the benchmark, as a list of tuples of a name and a setup
+    function. The setup function returns the list of steps of the phase, each a tuple
+    of a name and the function to time, which are run in order. 'cfg' is the generated
+    config and 'source' a VPPApi with the synthesized VPP config cache for it."""
+
+    def readconfig():
+        vpp = VPPApi()
+        vpp.vpp = vppstate.SyntheticVPPApiClient(source)
+        vpp.connected = True
+        return [("readconfig", vpp.readconfig)]
+
+    def plan(name, vpp):
+        reconciler = Reconciler(cfg, vpp=vpp)
+        return [
+            (f"{name}.prune", reconciler.prune),
+            (f"{name}.create", reconciler.create),
+            (f"{name}.sync", reconciler.sync),
+        ]
+
+    def plan_mock():
+        vpp = VPPApi()
+        vpp.mockconfig(cfg)
+        return plan("plan", vpp)
+
+    def dump():
+        dumper = Dumper()
+        dumper.cache = source.cache
+        return [("dump", dumper.cache_to_config)]
+
+    return [
+        ("generate", lambda: [("generate", partial(generator.generate, **sizes))]),
+        (
+            "validate",
+            lambda: [("validate", partial(Validator(schema=None).validate, cfg))],
+        ),
+        (
+            "synthesize",
+            lambda: [("synthesize", partial(synthesize, VPPApi(), cfg))],
+        ),
+        ("readconfig", readconfig),
+        ("plan", plan_mock),
+        ("replan", lambda: plan("replan", source.cache_clone())),
+        ("dump", dump),
+    ]
+
+
+def run(phases, repeat):
+    """Run each phase 'repeat' times, and return the fastest wall time of each of its
+    steps. Then run each phase once more with tracemalloc, which slows it down a lot,
+    to find the peak memory that each of its steps allocated. Returns a dict of step
+    name to a dict with 'seconds' and 'peak_bytes'."""
+    results = {}
+    for _name, setup in phases:
+        for _i in range(repeat):
+            for step, func in setup():
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+                if step not in results or elapsed < results[step]["seconds"]:
+                    results[step] = {"seconds": elapsed, "peak_bytes": 0}
+
+    tracemalloc.start()
+    for _name, setup in phases:
+        for step, func in setup():
+            tracemalloc.reset_peak()
+            current, _peak = tracemalloc.get_traced_memory()
+            func()
+            _current, peak = tracemalloc.get_traced_memory()
+            results[step]["peak_bytes"] = peak - current
+    tracemalloc.stop()
+    return results
+
+
+def compare(report, baseline, threshold):
+    """Print the results of the report next to those of the baseline, and return the
+    list of steps that took more than 'threshold' times as long, or as much memory,
+    as they did in the baseline."""
+    if baseline and report["parameters"] != baseline.get("parameters"):
+        print(
+            f"warning: baseline parameters {baseline.get('parameters')} differ from "
+            f"{report['parameters']}",
+            file=sys.stderr,
+        )
+    regressions = []
+    print(f"{'step':<16} {'seconds':>9} {'ratio':>7} {'peak MB':>9} {'ratio':>7}")
+    for step, result in report["phases"].items():
+        base = baseline.get("phases", {}).get(step)
+        if not base:
+            print(f"{step:<16} {result['seconds']:9.3f} {'-':>7} ", end="")
+            print(f"{result['peak_bytes'] / 1e6:9.1f} {'-':>7}")
+            continue
+        time_ratio = result["seconds"] / max(base["seconds"], 1e-6)
+        mem_ratio = result["peak_bytes"] / max(base["peak_bytes"], 1)
+        print(f"{step:<16} {result['seconds']:9.3f} {time_ratio:7.2f} ", end="")
+        print(f"{result['peak_bytes'] / 1e6:9.1f} {mem_ratio:7.2f}")
+        if time_ratio > threshold or mem_ratio > threshold:
+            regressions.append(step)
+    return regressions
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
+    for name, default in SIZES:
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            dest=name,
+            type=int,
+            default=default,
+            help=f"""Number of {name.replace('_', '-')}, default {default}""",
+        )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        dest="repeat",
+        type=int,
+        default=3,
+        help="""Run each phase this many times and keep the fastest, default 3""",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        type=str,
+        help="""Write the JSON report to this file""",
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        dest="baseline",
+        type=str,
+        help="""Compare the results against this JSON report""",
+    )
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        dest="threshold",
+        type=float,
+        default=1.25,
+        help="""Fail if a step takes this many times longer, or as much more memory,
+than in the baseline, default 1.25""",
+    )
+    args = parser.parse_args()
+
+    sizes = {name: getattr(args, name) for name, _default in SIZES}
+    cfg = generator.generate(**sizes)
+    retval, msgs = Validator(schema=None).validate(cfg)
+    if not retval:
+        for msg in msgs:
+            print(f"error: generated config is not valid: {msg}", file=sys.stderr)
+        sys.exit(-1)
+    source = VPPApi()
+    synthesize(source, cfg)
+
+    report = {
+        "version": REPORT_VERSION,
+        "python": platform.python_version(),
+        "parameters": sizes,
+        "interfaces": len(source.cache["interfaces"]),
+        "repeat": args.repeat,
+        "phases": run(get_phases(sizes, cfg, source), args.repeat),
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+
+    print(f"{report['interfaces']} interfaces, best of {args.repeat}")
+    baseline = {}
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as err:
+            print(f"error: could not read baseline: {err}", file=sys.stderr)
+            sys.exit(-2)
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(
+            f"error: {', '.join(regressions)} regressed more than {args.threshold}x",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
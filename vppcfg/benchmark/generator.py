@@ -0,0 +1,220 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file generate valid vppcfg configurations of a given size, to
+benchmark vppcfg with.
+"""
+import ipaddress
+
+## The number of sub-interfaces that fit on one PHY: each group of four shares an
+## outer VLAN, of which there are 4095.
+MAX_SUB_INTERFACES = 4 * 4095
+
+IPV4_BASE = int(ipaddress.IPv4Address("10.0.0.0"))
+IPV6_BASE = int(ipaddress.IPv6Address("2001:db8::"))
+
+
+class AddressPool:
+    """Hands out unique, non-overlapping IPv4 /30 and IPv6 /64 addresses"""
+
+    def __init__(self):
+        self.count = 0
+
+    def get(self):
+        """Returns a list of the next IPv4 and IPv6 address"""
+        self.count += 1
+        ip4 = ipaddress.IPv4Address(IPV4_BASE + 4 * self.count + 1)
+        ip6 = ipaddress.IPv6Address(IPV6_BASE + (self.count << 64) + 1)
+        return [f"{ip4}/30", f"{ip6}/64"]
+
+
+def get_phy_name(idx):
+    """Returns the name of the PHY with the given index"""
+    return f"GigabitEthernet{idx // 8 + 1}/0/{idx % 8}"
+
+
+def add_sub_interfaces(yaml, ifname, lcp, count, addresses):
+    """Add 'count' sub-interfaces to the interface, in groups of four that share an
+    outer VLAN: a routed Dot1Q with an LCP, a routed QinQ on top of it, a Dot1AD that
+    is left for bridgedomains to use, and a QinQ with MPLS. Returns the list of names
+    of the Dot1AD sub-interfaces."""
+    l2_ifnames = []
+    subs = yaml["interfaces"][ifname].setdefault("sub-interfaces", {})
+    for subid in range(1, count + 1):
+        vlan = (subid - 1) // 4 + 1
+        kind = (subid - 1) % 4
+        if kind == 0:
+            subs[subid] = {
+                "lcp": f"{lcp}.{vlan}",
+                "mtu": 1500,
+                "addresses": addresses.get(),
+                "encapsulation": {"dot1q": vlan, "exact-match": True},
+            }
+        elif kind == 1:
+            subs[subid] = {
+                "lcp": f"{lcp}.{vlan}.100",
+                "mtu": 1500,
+                "addresses": addresses.get(),
+                "encapsulation": {
+                    "dot1q": vlan,
+                    "inner-dot1q": 100,
+                    "exact-match": True,
+                },
+            }
+        elif kind == 2:
+            subs[subid] = {
+                "mtu": 1500,
+                "encapsulation": {"dot1ad": vlan, "exact-match": True},
+            }
+            l2_ifnames.append(f"{ifname}.{subid}")
+        else:
+            subs[subid] = {
+                "mtu": 1500,
+                "mpls": True,
+                "addresses": addresses.get(),
+                "encapsulation": {
+                    "dot1q": vlan,
+                    "inner-dot1q": 200,
+                    "exact-match": True,
+                },
+            }
+    return l2_ifnames
+
+
+def generate(
+    phys=4,
+    sub_interfaces=16,
+    bridgedomains=4,
+    loopbacks=4,
+    bondethernets=1,
+    vxlan_tunnels=4,
+    prefixlists=4,
+    acls=4,
+):
+    """Returns a valid vppcfg configuration with the given number of objects:
+    - 'phys' PHYs, each with an LCP, an address and 'sub_interfaces' sub-interfaces,
+      see add_sub_interfaces()
+    - 'bondethernets' BondEthernets, each with two PHYs of their own as members
+    - 'loopbacks' loopbacks, the first of which are the BVIs of the bridgedomains
+    - 'bridgedomains' bridgedomains, whose members are the Dot1AD sub-interfaces and
+      the VXLAN tunnels, spread across them
+    - 'vxlan_tunnels' VXLAN tunnels
+    - 'prefixlists' prefixlists and 'acls' ACLs, which use the prefixlists
+    """
+    if sub_interfaces > MAX_SUB_INTERFACES:
+        raise ValueError(f"At most {MAX_SUB_INTERFACES} sub-interfaces per PHY")
+    addresses = AddressPool()
+    yaml = {"interfaces": {}}
+    l2_ifnames = []
+
+    for idx in range(phys):
+        ifname = get_phy_name(idx)
+        yaml["interfaces"][ifname] = {
+            "device-type": "dpdk",
+            "description": f"PHY {idx}",
+            "mtu": 9000,
+            "lcp": f"e{idx}",
+            "addresses": addresses.get(),
+            "sflow": True,
+        }
+        l2_ifnames.extend(
+            add_sub_interfaces(yaml, ifname, f"e{idx}", sub_interfaces, addresses)
+        )
+
+    if bondethernets:
+        yaml["bondethernets"] = {}
+    for idx in range(bondethernets):
+        bond_ifname = f"BondEthernet{idx}"
+        members = [get_phy_name(phys + 2 * idx), get_phy_name(phys + 2 * idx + 1)]
+        for member in members:
+            yaml["interfaces"][member] = {"device-type": "dpdk", "mtu": 9000}
+        yaml["bondethernets"][bond_ifname] = {
+            "interfaces": members,
+            "mode": "lacp",
+            "load-balance": "l34",
+        }
+        yaml["interfaces"][bond_ifname] = {
+            "mtu": 9000,
+            "lcp": f"bond{idx}",
+            "addresses": addresses.get(),
+        }
+
+    if vxlan_tunnels:
+        yaml["vxlan_tunnels"] = {}
+    for idx in range(vxlan_tunnels):
+        ifname = f"vxlan_tunnel{idx}"
+        yaml["vxlan_tunnels"][ifname] = {
+            "local": "192.0.2.1",
+            "remote": str(ipaddress.IPv4Address("198.18.0.0") + idx),
+            "vni": idx + 1,
+        }
+        yaml["interfaces"][ifname] = {"mtu": 1500}
+        l2_ifnames.append(ifname)
+
+    if loopbacks:
+        yaml["loopbacks"] = {}
+    for idx in range(loopbacks):
+        yaml["loopbacks"][f"loop{idx}"] = {
+            "lcp": f"bvi{idx}" if idx < bridgedomains else f"lo{idx}",
+            "mtu": 1500,
+            "addresses": addresses.get(),
+        }
+
+    if bridgedomains:
+        yaml["bridgedomains"] = {}
+    for idx in range(bridgedomains):
+        bridge = {
+            "mtu": 1500,
+            "interfaces": l2_ifnames[idx::bridgedomains],
+        }
+        if idx < loopbacks:
+            bridge["bvi"] = f"loop{idx}"
+        yaml["bridgedomains"][f"bd{idx + 1}"] = bridge
+
+    if prefixlists:
+        yaml["prefixlists"] = {}
+    for idx in range(prefixlists):
+        yaml["prefixlists"][f"pl{idx}"] = {
+            "members": [
+                str(ipaddress.IPv4Address("172.16.0.0") + 256 * idx + 1),
+                f"{ipaddress.IPv4Address('172.16.0.0') + 256 * idx}/24",
+                str(ipaddress.IPv6Address("2001:db8:ffff::") + (idx << 64) + 1),
+                f"{ipaddress.IPv6Address('2001:db8:ffff::') + (idx << 64)}/64",
+            ]
+        }
+
+    if acls:
+        yaml["acls"] = {}
+    for idx in range(acls):
+        terms = [
+            {
+                "action": "permit",
+                "source": f"pl{idx % prefixlists}" if prefixlists else "any",
+                "protocol": "tcp",
+                "destination-port": "1024-65535",
+            },
+            {"action": "permit", "family": "ipv4", "protocol": "icmp"},
+            {"action": "permit", "destination": "192.0.2.0/24", "protocol": "udp"},
+            {"action": "deny"},
+        ]
+        yaml["acls"][f"acl{idx}"] = {"terms": terms}
+
+    if phys:
+        yaml["sflow"] = {
+            "header-bytes": 128,
+            "polling-interval": 30,
+            "sampling-rate": 10000,
+        }
+    return yaml
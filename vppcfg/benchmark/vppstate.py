@@ -0,0 +1,168 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file answer the VPP API dumps of VPPApi.readconfig() from a VPP
+config cache synthesized by vppcfg.vpp.synthetic, so that reading the config out of
+VPP can be benchmarked without a running VPP Dataplane.
+"""
+from collections import deque, namedtuple
+from types import SimpleNamespace
+
+## The VPP API dumps that VPPApi.readconfig() sends, and the details message that each
+## of them is answered with. The sFlow calls are answered with a single reply.
+DUMPS = {
+    "sw_interface_dump": "sw_interface_details",
+    "ip_address_dump": "ip_address_details",
+    "mpls_interface_dump": "mpls_interface_details",
+    "acl_dump": "acl_details",
+    "acl_interface_list_dump": "acl_interface_list_details",
+    "ip_unnumbered_dump": "ip_unnumbered_details",
+    "sw_bond_interface_dump": "sw_bond_interface_details",
+    "sw_member_interface_dump": "sw_member_interface_details",
+    "bridge_domain_dump": "bridge_domain_details",
+    "vxlan_tunnel_v2_dump": "vxlan_tunnel_v2_details",
+    "l2_xconnect_dump": "l2_xconnect_details",
+    "sw_interface_tap_v2_dump": "sw_interface_tap_v2_details",
+    "sflow_interface_dump": "sflow_interface_details",
+}
+GETS = {
+    "lcp_itf_pair_get": "lcp_itf_pair_get_reply",
+    "sflow_sampling_rate_get": "sflow_sampling_rate_get_reply",
+    "sflow_polling_interval_get": "sflow_polling_interval_get_reply",
+    "sflow_header_bytes_get": "sflow_header_bytes_get_reply",
+}
+
+
+class SyntheticVPPApiClient:
+    """Stands in for a connected vpp_papi VPPApiClient, answering the API calls that
+    VPPApi.readconfig() sends from the VPP config cache of another VPPApi, see
+    synthetic.synthesize(). Set a VPPApi's 'vpp' to it, and mark the VPPApi connected,
+    to read the VPP config cache back. Like VPP, replies are queued up as requests are
+    sent."""
+
+    def __init__(self, source):
+        self.source = source
+        self.api = SimpleNamespace(**dict.fromkeys(list(DUMPS) + list(GETS)))
+        self.messages = {
+            msgname: SimpleNamespace(name=msgname, crc="0x00000000")
+            for msgname in list(DUMPS) + list(GETS)
+        }
+        self.services = {
+            msgname: {"reply": details, "stream": True}
+            for msgname, details in DUMPS.items()
+        }
+        self.services.update(
+            {msgname: {"reply": reply} for msgname, reply in GETS.items()}
+        )
+        self.services["lcp_itf_pair_get"]["stream_msg"] = "lcp_itf_pair_details"
+        self.transport = self
+        self.context = 0
+        self.replies = deque()
+        self.types = {}
+
+    def disconnect(self):
+        """Disconnect from the synthetic VPP, which does nothing"""
+
+    def get_msg_index(self, _name):
+        """Return the message index of an API message"""
+        return 1
+
+    def get_context(self):
+        """Return a new context to send an API message with"""
+        self.context += 1
+        return self.context
+
+    def read_blocking(self, timeout=None):
+        """Return the next reply, or None if there are no more"""
+        del timeout
+        return self.replies.popleft() if self.replies else None
+
+    def reply(self, msgname, context, fields):
+        """Queue a reply of the message 'msgname' with the given fields and context"""
+        names = tuple(fields)
+        if (msgname, names) not in self.types:
+            self.types[(msgname, names)] = namedtuple(msgname, names + ("context",))
+        self.replies.append(self.types[(msgname, names)](*fields.values(), context))
+
+    def _control_ping(self, context):
+        """Queue the control_ping_reply that terminates a dump"""
+        self.reply("control_ping_reply", context, {"retval": 0})
+
+    def _call_vpp_async(self, _msgid, msg, context, **kwargs):
+        """Queue the replies to the API message 'msg' sent with the given arguments"""
+        cache = self.source.cache
+        if msg.name in GETS:
+            fields = {"retval": 0}
+            if msg.name == "lcp_itf_pair_get":
+                for details in cache["lcps"].values():
+                    self.reply("lcp_itf_pair_details", context, details._asdict())
+                fields["cursor"] = 0xFFFFFFFF
+            elif msg.name == "sflow_sampling_rate_get":
+                fields["sampling_N"] = cache["sflow"].get("sampling-rate", 10000)
+            elif msg.name == "sflow_polling_interval_get":
+                fields["polling_S"] = cache["sflow"].get("polling-interval", 20)
+            elif msg.name == "sflow_header_bytes_get":
+                fields["header_B"] = cache["sflow"].get("header-bytes", 128)
+            self.reply(GETS[msg.name], context, fields)
+            return
+
+        for fields in self.get_details(cache, msg.name, kwargs):
+            self.reply(DUMPS[msg.name], context, fields)
+
+    @staticmethod
+    def get_details(cache, msgname, kwargs):
+        """Return the fields of the details messages that answer a dump"""
+        # pylint: disable=too-many-return-statements
+        tables = {
+            "acl_dump": "acls",
+            "acl_interface_list_dump": "interface_acls",
+            "sw_bond_interface_dump": "bondethernets",
+            "bridge_domain_dump": "bridgedomains",
+            "vxlan_tunnel_v2_dump": "vxlan_tunnels",
+            "l2_xconnect_dump": "l2xcs",
+            "sw_interface_tap_v2_dump": "taps",
+        }
+        if msgname in tables:
+            return [details._asdict() for details in cache[tables[msgname]].values()]
+        if msgname == "sw_interface_dump":
+            idx = kwargs.get("sw_if_index", 0xFFFFFFFF)
+            return [
+                iface._asdict()
+                for sw_if_index, iface in cache["interfaces"].items()
+                if idx in (0xFFFFFFFF, sw_if_index)
+            ]
+        if msgname == "ip_address_dump":
+            return [
+                {"sw_if_index": kwargs["sw_if_index"], "prefix": addr}
+                for addr in cache["interface_addresses"].get(kwargs["sw_if_index"], [])
+                if (":" in addr) == kwargs["is_ipv6"]
+            ]
+        if msgname == "sw_member_interface_dump":
+            return [
+                {"sw_if_index": member}
+                for member in cache["bondethernet_members"].get(
+                    kwargs["sw_if_index"], []
+                )
+            ]
+        if msgname == "mpls_interface_dump":
+            return [{"sw_if_index": idx} for idx in cache["interface_mpls"]]
+        if msgname == "ip_unnumbered_dump":
+            return [
+                {"sw_if_index": idx, "ip_sw_if_index": target_idx}
+                for idx, target_idx in cache["interface_unnumbered"].items()
+            ]
+        if msgname == "sflow_interface_dump":
+            return [{"hw_if_index": idx} for idx in cache["interface_sflow"]]
+        return []
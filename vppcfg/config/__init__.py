@@ -32,6 +32,7 @@ except ImportError:
     sys.exit(-2)
 from yamale import validators
 
+from vppcfg.profiler import PROFILER
 from .loopback import validate_loopbacks
 from .bondethernet import validate_bondethernets
 from .interface import validate_interfaces
@@ -41,6 +42,7 @@ from .tap import validate_taps
 from .prefixlist import validate_prefixlists
 from .acl import validate_acls
 from .sflow import validate_sflow
+from .index import IndexedConfig
 
 
 class IPInterfaceWithPrefixLength(validators.Validator):
@@ -69,6 +71,10 @@ class IPInterfaceWithPrefixLength(validators.Validator):
         return True
 
 
+## Compiled yamale schemas, keyed by schema filename and modification time
+SCHEMA_CACHE = {}
+
+
 class Validator:
     """The Validator class takes a schema filename (which may be None, in which
     case a built-in default is used), and a given YAML file represented as a string,
@@ -86,6 +92,13 @@ class Validator:
         self.logger.addHandler(logging.NullHandler())
 
         self.schema = schema
+        if self.schema:
+            self.schema_fname = self.schema
+        else:
+            ## See setup.py data files that includes schema.yaml into the bundle
+            self.schema_fname = os.path.abspath(
+                os.path.join(os.path.dirname(__file__), "..", "schema.yaml")
+            )
         self.validators = [
             validate_bondethernets,
             validate_interfaces,
@@ -98,6 +111,27 @@ class Validator:
             validate_sflow,
         ]
 
+    def get_schema(self):
+        """Return the compiled yamale schema, or None if it cannot be read. Compiling
+        the schema is expensive, so it is kept process-wide and reused by all Validator
+        instances, for as long as the schema file is not modified."""
+        fname = self.schema_fname
+        if self.schema:
+            self.logger.debug(f"Validating against --schema {fname}")
+        else:
+            self.logger.debug("Validating against built-in schema")
+
+        if not os.path.isfile(fname):
+            self.logger.error(f"Cannot file schema file: {fname}")
+            return None
+
+        key = (fname, os.stat(fname).st_mtime_ns)
+        if key not in SCHEMA_CACHE:
+            _validators = validators.DefaultValidators.copy()
+            _validators[IPInterfaceWithPrefixLength.tag] = IPInterfaceWithPrefixLength
+            SCHEMA_CACHE[key] = yamale.make_schema(fname, validators=_validators)
+        return SCHEMA_CACHE[key]
+
     def validate(self, yaml):
         """Validate the semantics of all YAML maps, by calling self.validators in turn,
         and then optionally calling validators that were added with add_validator()"""
@@ -106,26 +140,16 @@ class Validator:
         if not yaml:
             return ret_retval, ret_msgs
 
-        _validators = validators.DefaultValidators.copy()
-        _validators[IPInterfaceWithPrefixLength.tag] = IPInterfaceWithPrefixLength
-        if self.schema:
-            fname = self.schema
-            self.logger.debug(f"Validating against --schema {fname}")
-        else:
-            ## See setup.py data files that includes schema.yaml into the bundle
-            self.logger.debug("Validating against built-in schema")
-            fname = os.path.abspath(
-                os.path.join(os.path.dirname(__file__), "..", "schema.yaml")
-            )
-
-        if not os.path.isfile(fname):
-            self.logger.error(f"Cannot file schema file: {fname}")
+        with PROFILER.timer("Validator.get_schema"):
+            schema = self.get_schema()
+        if not schema:
             return False, ret_msgs
 
         try:
-            schema = yamale.make_schema(fname, validators=_validators)
-            data = yamale.make_data(content=str(yaml))
-            yamale.validate(schema, data)
+            ## Validate the parsed config directly, rather than serializing and
+            ## re-parsing it with yamale.make_data()
+            with PROFILER.timer("yamale.validate"):
+                yamale.validate(schema, [(yaml, None)])
             self.logger.debug("Schema correctly validated by yamale")
         except yamale.YamaleError as err:
             ret_retval = False
@@ -135,9 +159,12 @@ class Validator:
             return ret_retval, ret_msgs
 
         self.logger.debug("Validating Semantics...")
+        if not isinstance(yaml, IndexedConfig):
+            yaml = IndexedConfig(yaml)
 
         for validator in self.validators:
-            retval, msgs = validator(yaml)
+            with PROFILER.timer(f"Validator.{validator.__name__}"):
+                retval, msgs = validator(yaml)
             if msgs:
                 ret_msgs.extend(msgs)
             if not retval:
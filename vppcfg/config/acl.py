@@ -15,7 +15,33 @@
 import logging
 import socket
 import ipaddress
+from collections import namedtuple
 from . import prefixlist
+from . import indexed
+
+## The largest number of rules that an ACL may compile into, unless it sets its own
+## 'max-rules'. Each term compiles into one rule per pair of source and destination
+## prefix of the same family, so a term between two large prefixlists can easily
+## compile into millions of rules, which would take VPP (and vppcfg) a long time and
+## a lot of memory to program.
+ACL_MAX_RULES = 65536
+
+## ACLs that vppcfg creates in VPP are tagged with their name behind this prefix, so
+## that they can be told apart from ACLs that were created by other means, which are
+## left alone. The prefix cannot occur in an ACL name.
+ACL_TAG_PREFIX = "vppcfg:"
+
+## The VPP values of each ACL action, see src/plugins/acl/acl_types.api
+ACL_ACTIONS = {"deny": 0, "permit": 1, "permit+reflect": 2}
+
+## A compiled ACL rule, with the fields of vl_api_acl_rule_t
+AclRule = namedtuple(
+    "acl_rule",
+    ["is_permit", "src_prefix", "dst_prefix", "proto"]
+    + ["srcport_or_icmptype_first", "srcport_or_icmptype_last"]
+    + ["dstport_or_icmpcode_first", "dstport_or_icmpcode_last"]
+    + ["tcp_flags_mask", "tcp_flags_value"],
+)
 
 
 def get_acls(yaml):
@@ -37,6 +63,27 @@ def get_by_name(yaml, aclname):
     return None, None
 
 
+def get_tag(aclname):
+    """Return the tag of the acl by name in VPP."""
+    return ACL_TAG_PREFIX + aclname
+
+
+def get_name_by_tag(tag):
+    """Return the name of the acl with the given tag in VPP, or None if the ACL was not
+    created by vppcfg."""
+    if not tag.startswith(ACL_TAG_PREFIX):
+        return None
+    return tag[len(ACL_TAG_PREFIX) :]
+
+
+def get_max_rules(yaml, aclname):
+    """Return the largest number of rules that the acl by name may compile into."""
+    _aclname, iface = get_by_name(yaml, aclname)
+    if not iface:
+        return ACL_MAX_RULES
+    return iface.get("max-rules", ACL_MAX_RULES)
+
+
 def hydrate_term(acl_term):
     """Adds all defaults to an ACL term"""
 
@@ -154,7 +201,8 @@ def get_network_list(yaml, network_string, want_ipv4=True, want_ipv6=True):
     'source' or 'destination' field, which can either be an IP address, a Prefix, or the name
     of a Prefix List. It returns a list of ip_network() objects, including prefix. IP addresses
     will receive prefixlen /32 or /128. Optionally, want_ipv4 or want_ipv6 can be set to False
-    to filter the list."""
+    to filter the list. Prefix Lists that have 'aggregate' set are returned aggregated.
+    """
 
     ret = []
     if is_ip(network_string):
@@ -173,7 +221,11 @@ def get_network_list(yaml, network_string, want_ipv4=True, want_ipv6=True):
         return ret
 
     return prefixlist.get_network_list(
-        yaml, network_string, want_ipv4=want_ipv4, want_ipv6=want_ipv6
+        yaml,
+        network_string,
+        want_ipv4=want_ipv4,
+        want_ipv6=want_ipv6,
+        aggregate=prefixlist.is_aggregated(yaml, network_string),
     )
 
 
@@ -212,6 +264,103 @@ def network_list_has_family(network_list, version):
     return False
 
 
+def get_network_pairs(src_network_list, dst_network_list):
+    """Returns the number of pairs of distinct source and destination ip_network()
+    elements of the same family in the given lists: the number of rules that a term
+    with these lists compiles into, at most."""
+    ret = 0
+    for version in [4, 6]:
+        srcs = len({src for src in src_network_list if src.version == version})
+        dsts = len({dst for dst in dst_network_list if dst.version == version})
+        ret += srcs * dsts
+    return ret
+
+
+def get_term_networks(yaml, acl_term):
+    """Returns a tuple of the source and destination lists of ip_network() elements of
+    the given (hydrated) ACL term, filtered by its family."""
+    want_ipv4 = acl_term["family"] in ["any", "ipv4"]
+    want_ipv6 = acl_term["family"] in ["any", "ipv6"]
+    src_network_list = get_network_list(
+        yaml, acl_term["source"], want_ipv4=want_ipv4, want_ipv6=want_ipv6
+    )
+    dst_network_list = get_network_list(
+        yaml, acl_term["destination"], want_ipv4=want_ipv4, want_ipv6=want_ipv6
+    )
+    return src_network_list, dst_network_list
+
+
+def get_term_rules(acl_term, src_network_list, dst_network_list):
+    """Yields the rules of a single (hydrated) ACL term, one for each pair of source and
+    destination ip_network() of the same family in the given lists, in their order.
+    Duplicate elements in either list are skipped. ICMP (1) and ICMPv6 (58) are taken
+    to mean the ICMP protocol of each family, so that a term of family 'any' matches
+    both."""
+    proto = get_protocol(acl_term["protocol"])
+    protos = {4: proto, 6: proto}
+    if proto in [1, 58]:
+        protos = {4: 1, 6: 58}
+        src_low, src_high = get_icmp_low_high(acl_term["icmp-type"])
+        dst_low, dst_high = get_icmp_low_high(acl_term["icmp-code"])
+    else:
+        src_low, src_high = get_port_low_high(acl_term["source-port"])
+        dst_low, dst_high = get_port_low_high(acl_term["destination-port"])
+
+    dsts = {4: {}, 6: {}}
+    for dst in dst_network_list:
+        dsts[dst.version][dst] = None
+    for src in dict.fromkeys(src_network_list):
+        for dst in dsts[src.version]:
+            yield AclRule(
+                is_permit=ACL_ACTIONS[acl_term["action"]],
+                src_prefix=src,
+                dst_prefix=dst,
+                proto=protos[src.version],
+                srcport_or_icmptype_first=src_low,
+                srcport_or_icmptype_last=src_high,
+                dstport_or_icmpcode_first=dst_low,
+                dstport_or_icmpcode_last=dst_high,
+                tcp_flags_mask=0,
+                tcp_flags_value=0,
+            )
+
+
+def get_rules(yaml, aclname):
+    """Compile the ACL by name into the list of its VPP rules, in the order of its terms.
+    A rule that is identical to an earlier one can never match, so it is left out. The
+    number of rules of each term is determined before it is compiled, and if the ACL
+    would have more than its maximum number of rules (see get_max_rules()), None is
+    returned without compiling the rest of it. Returns None as well if the ACL does not
+    exist. Given an IndexedConfig, each ACL is compiled only once, and the result is
+    shared by all callers, which must not change it."""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index and aclname in cfg_index.acl_rules:
+        return cfg_index.acl_rules[aclname]
+
+    rules = None
+    _aclname, iface = get_by_name(yaml, aclname)
+    if iface:
+        rules = _compile_rules(yaml, iface, get_max_rules(yaml, aclname))
+    if cfg_index:
+        cfg_index.acl_rules[aclname] = rules
+    return rules
+
+
+def _compile_rules(yaml, iface, max_rules):
+    """Returns the list of rules of the given ACL, or None if it would have more than
+    max_rules rules."""
+    ret = {}
+    for acl_term in iface["terms"]:
+        acl_term = hydrate_term(dict(acl_term))
+        src_network_list, dst_network_list = get_term_networks(yaml, acl_term)
+        pairs = get_network_pairs(src_network_list, dst_network_list)
+        if len(ret) + pairs > max_rules:
+            return None
+        for rule in get_term_rules(acl_term, src_network_list, dst_network_list):
+            ret.setdefault(rule, None)
+    return list(ret)
+
+
 def validate_acls(yaml):
     """Validate the semantics of all YAML 'acls' entries"""
     result = True
@@ -224,6 +373,7 @@ def validate_acls(yaml):
 
     for aclname, acl in yaml["acls"].items():
         terms = 0
+        rules = 0
         for acl_term in acl["terms"]:
             terms += 1
             orig_acl_term = acl_term.copy()
@@ -247,9 +397,10 @@ def validate_acls(yaml):
             dst_network_list = get_network_list(
                 yaml, acl_term["destination"], want_ipv4=want_ipv4, want_ipv6=want_ipv6
             )
-            logger.debug(
-                f"acl {aclname} term {terms} src: {src_network_list} dst: {dst_network_list}"
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"acl {aclname} term {terms} src: {src_network_list} dst: {dst_network_list}"
+                )
             if len(src_network_list) == 0:
                 msgs.append(
                     f"acl {aclname} term {terms} family {acl_term['family']} has no source"
@@ -278,6 +429,7 @@ def validate_acls(yaml):
                 )
                 result = False
                 continue
+            rules += get_network_pairs(src_network_list, dst_network_list)
 
             proto = get_protocol(acl_term["protocol"])
             if proto is None:
@@ -370,4 +522,11 @@ def validate_acls(yaml):
                     )
                     result = False
 
+        max_rules = get_max_rules(yaml, aclname)
+        if rules > max_rules:
+            msgs.append(
+                f"acl {aclname} has {rules} rules, more than the maximum of {max_rules}"
+            )
+            result = False
+
     return result, msgs
@@ -12,51 +12,129 @@
 # limitations under the License.
 #
 """ A vppcfg configuration module that handles addresses """
+import bisect
 import ipaddress
+from . import indexed
 
 
-def get_all_addresses_except_ifname(yaml, except_ifname):
-    """Return a list of all ipaddress.ip_interface() instances in the entire config,
-    except for those that belong to 'ifname'.
-    """
+def get_all_addresses(yaml):
+    """Return a list of (ifname, address) tuples of all interface, sub-interface, loopback
+    and bridgedomain addresses in the entire config, where address is the string form
+    given in the config."""
     ret = []
     if "interfaces" in yaml:
         for ifname, iface in yaml["interfaces"].items():
-            if ifname == except_ifname:
-                continue
-
             if "addresses" in iface:
                 for addr in iface["addresses"]:
-                    ret.append(ipaddress.ip_interface(addr))
+                    ret.append((ifname, addr))
             if "sub-interfaces" in iface:
                 for subid, sub_iface in iface["sub-interfaces"].items():
                     sub_ifname = f"{ifname}.{int(subid)}"
-                    if sub_ifname == except_ifname:
-                        continue
-
                     if "addresses" in sub_iface:
                         for addr in sub_iface["addresses"]:
-                            ret.append(ipaddress.ip_interface(addr))
+                            ret.append((sub_ifname, addr))
     if "loopbacks" in yaml:
         for ifname, iface in yaml["loopbacks"].items():
-            if ifname == except_ifname:
-                continue
-
             if "addresses" in iface:
                 for addr in iface["addresses"]:
-                    ret.append(ipaddress.ip_interface(addr))
+                    ret.append((ifname, addr))
     if "bridgedomains" in yaml:
         for ifname, iface in yaml["bridgedomains"].items():
-            if ifname == except_ifname:
-                continue
-
             if "addresses" in iface:
                 for addr in iface["addresses"]:
-                    ret.append(ipaddress.ip_interface(addr))
+                    ret.append((ifname, addr))
+    return ret
 
+
+def get_all_addresses_except_ifname(yaml, except_ifname):
+    """Return a list of all ipaddress.ip_interface() instances in the entire config,
+    except for those that belong to 'ifname'. Note that if 'ifname' is an interface,
+    the addresses of its sub-interfaces are left out as well.
+    """
+    ret = []
+    for ifname, addr in get_all_addresses(yaml):
+        if except_ifname not in (ifname, ifname.split(".")[0]):
+            ret.append(ipaddress.ip_interface(addr))
     return ret
 
 
+class AddressIndex:
+    """An AddressIndex answers whether a prefix overlaps with any prefix on another
+    interface, without comparing it to every address in the config. Per address family,
+    it keeps:
+    - a dictionary of (prefixlen, network) to the interfaces that have an address in
+      that prefix, which finds less specifics (and equal prefixes) with one lookup
+      per prefix length in use;
+    - a sorted list of network addresses, and the interface they belong to, which
+      finds more specifics with a binary search for the range of the prefix.
+
+    Like get_all_addresses_except_ifname(), addresses of the sub-interfaces of 'ifname'
+    do not count as belonging to another interface.
+
+    Networks are kept as integers, which is much cheaper than ipaddress objects.
+    """
+
+    def __init__(self, addresses):
+        """Build the index from a list of (ifname, address) tuples"""
+        self.networks = {4: {}, 6: {}}
+        self.prefixlens = {4: set(), 6: set()}
+        entries = {4: [], 6: []}
+        for ifname, addr in addresses:
+            network = ipaddress.ip_network(addr, strict=False)
+            key = (network.prefixlen, int(network.network_address))
+            self.networks[network.version].setdefault(key, set()).add(ifname)
+            self.prefixlens[network.version].add(network.prefixlen)
+            entries[network.version].append(
+                (int(network.network_address), ifname.split(".")[0], ifname)
+            )
+
+        ## For both the (sub-)interface and its parent interface: next_other[i] is the
+        ## first position after i that belongs to another interface than position i,
+        ## so that a range of the sorted list can be checked for addresses of other
+        ## interfaces in constant time.
+        self.starts = {}
+        self.owners = {}
+        self.next_other = {}
+        for version, version_entries in entries.items():
+            version_entries.sort()
+            self.starts[version] = [entry[0] for entry in version_entries]
+            for column in [1, 2]:
+                owners = [entry[column] for entry in version_entries]
+                next_other = [len(owners)] * len(owners)
+                for i in range(len(owners) - 2, -1, -1):
+                    if owners[i + 1] != owners[i]:
+                        next_other[i] = i + 1
+                    else:
+                        next_other[i] = next_other[i + 1]
+                self.owners[(version, column)] = owners
+                self.next_other[(version, column)] = next_other
+
+    def overlaps(self, ifname, ip_network):
+        """Returns True if the ipaddress.ip_network() is equal to, a more specific of, or
+        a less specific of any address that does not belong to 'ifname'."""
+        version = ip_network.version
+        maxlen = ip_network.max_prefixlen
+        start = int(ip_network.network_address)
+
+        for prefixlen in self.prefixlens[version]:
+            if prefixlen > ip_network.prefixlen:
+                continue
+            mask = ((1 << prefixlen) - 1) << (maxlen - prefixlen)
+            for owner in self.networks[version].get((prefixlen, start & mask), []):
+                if ifname not in (owner, owner.split(".")[0]):
+                    return True
+
+        starts = self.starts[version]
+        low = bisect.bisect_left(starts, start)
+        high = bisect.bisect_right(starts, int(ip_network.broadcast_address))
+        if low >= high:
+            return False
+        column = 2 if "." in ifname else 1
+        if self.owners[(version, column)][low] != ifname:
+            return True
+        return self.next_other[(version, column)][low] < high
+
+
 def is_allowed(yaml, ifname, iface_addresses, ip_interface):
     """Returns True if there is at most one occurence of the ip_interface (an IPv4/IPv6 prefix+len)
     in the entire config. That said, we need the 'iface_addresses' because VPP is a bit fickle in
@@ -81,10 +159,16 @@ def is_allowed(yaml, ifname, iface_addresses, ip_interface):
     vpp# set interface ip address loop0 192.0.2.3/23
     set interface ip address: failed to add 192.0.2.3/23 on loop0 which conflicts with 192.0.2.1/24 for interface loop0
     """
-    all_other_addresses = get_all_addresses_except_ifname(yaml, ifname)
-
     my_ip_network = ipaddress.ip_network(ip_interface, strict=False)
 
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        if cfg_index.addresses.overlaps(ifname, my_ip_network):
+            return False
+        all_other_addresses = []
+    else:
+        all_other_addresses = get_all_addresses_except_ifname(yaml, ifname)
+
     for ipi in all_other_addresses:
         if ipi.version != my_ip_network.version:
             continue
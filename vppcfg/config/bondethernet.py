@@ -15,6 +15,7 @@
 import logging
 from . import interface
 from . import mac
+from . import indexed
 
 
 def get_bondethernets(yaml):
@@ -44,6 +45,10 @@ def is_bondethernet(yaml, ifname):
 
 def is_bond_member(yaml, ifname):
     """Returns True if this interface is a member of a BondEthernet."""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return ifname in cfg_index.bond_members
+
     if not "bondethernets" in yaml:
         return False
 
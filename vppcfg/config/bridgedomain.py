@@ -15,6 +15,7 @@
 import logging
 from . import interface
 from . import loopback
+from . import indexed
 
 
 def get_bridgedomains(yaml):
@@ -59,6 +60,9 @@ def get_bridge_interfaces(yaml):
 
 def is_bridge_interface_unique(yaml, ifname):
     """Returns True if this interface is referenced in bridgedomains zero or one times"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.bridge_interfaces[ifname] < 2
 
     ifs = get_bridge_interfaces(yaml)
     return ifs.count(ifname) < 2
@@ -66,12 +70,19 @@ def is_bridge_interface_unique(yaml, ifname):
 
 def is_bridge_interface(yaml, ifname):
     """Returns True if this interface is a member of a BridgeDomain"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return ifname in cfg_index.bridge_interfaces
 
     return ifname in get_bridge_interfaces(yaml)
 
 
 def bvi_unique(yaml, bviname):
     """Returns True if the BVI identified by bviname is unique among all BridgeDomains."""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.bvis[bviname] < 2
+
     if not "bridgedomains" in yaml:
         return True
     ncount = 0
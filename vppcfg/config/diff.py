@@ -0,0 +1,155 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+""" A vppcfg configuration module that compares two YAML configs """
+from . import interface
+from . import indexed
+
+## The config sections whose elements are planned by name by the Reconciler. Their
+## names share one namespace: a BondEthernet or VXLAN Tunnel also occurs in the
+## 'interfaces' section by the same name.
+SECTIONS = ["loopbacks", "bondethernets", "bridgedomains", "vxlan_tunnels", "taps"]
+
+
+def get_changed(prev, yaml):
+    """Returns the set of names of the objects that were added, removed or changed
+    between the 'prev' config and the given one. Sub-interfaces are compared on their
+    own, so a change to one sub-interface does not change its parent. If the sFlow
+    settings differ, 'sflow' is returned as well, and if the ACLs or the prefixlists
+    they refer to differ, 'acls' is."""
+    ret = set()
+    for section in SECTIONS:
+        prev_section = prev.get(section, {})
+        yaml_section = yaml.get(section, {})
+        if prev_section == yaml_section:
+            continue
+        for ifname in prev_section.keys() | yaml_section.keys():
+            if prev_section.get(ifname) != yaml_section.get(ifname):
+                ret.add(ifname)
+
+    prev_section = prev.get("interfaces", {})
+    yaml_section = yaml.get("interfaces", {})
+    for ifname in prev_section.keys() | yaml_section.keys():
+        prev_iface = prev_section.get(ifname) or {}
+        iface = yaml_section.get(ifname) or {}
+        if prev_iface == iface:
+            continue
+        prev_subs = prev_iface.get("sub-interfaces", {})
+        subs = iface.get("sub-interfaces", {})
+        if ifname not in prev_section or ifname not in yaml_section:
+            ret.add(ifname)
+        elif {k: v for k, v in prev_iface.items() if k != "sub-interfaces"} != {
+            k: v for k, v in iface.items() if k != "sub-interfaces"
+        }:
+            ret.add(ifname)
+        for subid in prev_subs.keys() | subs.keys():
+            if prev_subs.get(subid) != subs.get(subid):
+                ret.add(f"{ifname}.{int(subid)}")
+
+    if prev.get("sflow") != yaml.get("sflow"):
+        ret.add("sflow")
+    if any(prev.get(key) != yaml.get(key) for key in ["acls", "prefixlists"]):
+        ret.add("acls")
+    return ret
+
+
+def get_referrers(yaml):
+    """Returns a dictionary of object names to the list of names of the objects that
+    refer to them: interfaces and loopbacks that are unnumbered to it, interfaces that
+    have an L2 CrossConnect to it, and bridgedomains that have it as a member or BVI."""
+    ret = {}
+
+    def refers(ifname, referrer):
+        ret.setdefault(ifname, []).append(referrer)
+
+    for ifname, iface in yaml.get("interfaces", {}).items():
+        ifaces = [(ifname, iface)]
+        for subid, sub_iface in iface.get("sub-interfaces", {}).items():
+            ifaces.append((f"{ifname}.{int(subid)}", sub_iface))
+        for _ifname, _iface in ifaces:
+            if "unnumbered" in _iface:
+                refers(_iface["unnumbered"], _ifname)
+            if "l2xc" in _iface:
+                refers(_iface["l2xc"], _ifname)
+
+    for ifname, iface in yaml.get("loopbacks", {}).items():
+        if "unnumbered" in iface:
+            refers(iface["unnumbered"], ifname)
+
+    for ifname, iface in yaml.get("bridgedomains", {}).items():
+        for member_ifname in iface.get("interfaces", []):
+            refers(member_ifname, ifname)
+        if "bvi" in iface:
+            refers(iface["bvi"], ifname)
+
+    return ret
+
+
+def get_referrers_by_name(yaml, ifname):
+    """Returns the list of names of the objects that refer to the given object"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.referrers.get(ifname, [])
+    return get_referrers(yaml).get(ifname, [])
+
+
+def get_dependents(yaml, ifname):
+    """Returns the set of names of the objects that have to be planned again when the
+    given object changes:
+    - the objects that refer to it, see get_referrers()
+    - an interface's sub-interfaces, and a Dot1Q/Dot1AD's QinX sub-interfaces
+    - the target of an interface's L2 CrossConnect
+    - a BondEthernet's members
+    - a BridgeDomain's members and BVI
+    """
+    ret = set(get_referrers_by_name(yaml, ifname))
+
+    _ifname, iface = interface.get_by_name(yaml, ifname)
+    if iface:
+        for subid in iface.get("sub-interfaces", {}):
+            ret.add(f"{ifname}.{int(subid)}")
+        if "l2xc" in iface:
+            ret.add(iface["l2xc"])
+    if iface and interface.is_sub(yaml, ifname) and not interface.is_qinx(yaml, ifname):
+        parent_ifname, _subid = ifname.split(".")
+        for qinx_ifname in interface.get_qinx_interfaces(yaml):
+            if not qinx_ifname.startswith(f"{parent_ifname}."):
+                continue
+            dot1x_ifname, _dot1x_iface = interface.get_qinx_parent_by_name(
+                yaml, qinx_ifname
+            )
+            if dot1x_ifname == ifname:
+                ret.add(qinx_ifname)
+
+    if ifname in yaml.get("bondethernets", {}):
+        ret.update(yaml["bondethernets"][ifname].get("interfaces", []))
+    if ifname in yaml.get("bridgedomains", {}):
+        ret.update(yaml["bridgedomains"][ifname].get("interfaces", []))
+        if "bvi" in yaml["bridgedomains"][ifname]:
+            ret.add(yaml["bridgedomains"][ifname]["bvi"])
+    return ret
+
+
+def get_dirty(prev, yaml):
+    """Returns the set of names of the objects that have to be planned to go from the
+    'prev' config to the given one: the objects that changed, and recursively the
+    objects that depend on those in either config."""
+    ret = get_changed(prev, yaml)
+    todo = list(ret)
+    while todo:
+        ifname = todo.pop()
+        for dependent in get_dependents(prev, ifname) | get_dependents(yaml, ifname):
+            if dependent not in ret:
+                ret.add(dependent)
+                todo.append(dependent)
+    return ret
@@ -0,0 +1,155 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+""" A vppcfg configuration module that keeps lookup indexes over a YAML config """
+from collections import Counter
+from . import interface
+from . import loopback
+from . import bridgedomain
+from . import lcp
+from . import address
+from . import diff
+
+
+class IndexedConfig(dict):
+    """An IndexedConfig is a YAML config (a dict) which carries a ConfigIndex. Helper
+    functions in the config modules that would otherwise scan the whole config for
+    every call, use the index instead when they are handed an IndexedConfig. Plain
+    dicts keep working as before.
+
+    The index is built when it is first used, and dropped whenever a top-level section
+    of the config is set, replaced or removed, so that it is rebuilt when it is next
+    used. Changes made inside a section (eg. adding an interface to the dict that is
+    cfg["interfaces"]) cannot be seen, so call reindex() after making those.
+    """
+
+    def __init__(self, yaml):
+        super().__init__(yaml)
+        self.__index = None
+
+    @property
+    def config_index(self):
+        """The ConfigIndex of this config, built when first used. Config modules find
+        it with indexed.get_index()."""
+        if self.__index is None:
+            self.__index = ConfigIndex(dict(self))
+        return self.__index
+
+    def reindex(self):
+        """Drop the ConfigIndex, so that it is rebuilt when it is next used"""
+        self.__index = None
+
+    def __setitem__(self, key, value):
+        self.reindex()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.reindex()
+        super().__delitem__(key)
+
+    def __ior__(self, other):
+        self.reindex()
+        return super().__ior__(other)
+
+    def clear(self):
+        self.reindex()
+        super().clear()
+
+    def pop(self, *args):
+        self.reindex()
+        return super().pop(*args)
+
+    def popitem(self):
+        self.reindex()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.reindex()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.reindex()
+        super().update(*args, **kwargs)
+
+
+class ConfigIndex:
+    """A ConfigIndex holds lookup tables over a YAML config, built in one pass over
+    the config by using the scanning variant of each of the helper functions."""
+
+    # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    def __init__(self, yaml):
+        self.interfaces = interface.get_interfaces(yaml)
+        self.sub_interfaces = [
+            ifname for ifname in self.interfaces if interface.is_sub(yaml, ifname)
+        ]
+        self.l2xc_interfaces = set(interface.get_l2xc_interfaces(yaml))
+        self.l2xc_targets = Counter(interface.get_l2xc_target_interfaces(yaml))
+        self.unnumbered_interfaces = set(interface.get_unnumbered_interfaces(yaml))
+        self.unnumbered_loopbacks = set(loopback.get_unnumbered_loopbacks(yaml))
+
+        self.interface_by_lcp = {}
+        for ifname in self.interfaces:
+            _ifname, iface = interface.get_by_name(yaml, ifname)
+            if iface and "lcp" in iface:
+                self.interface_by_lcp.setdefault(iface["lcp"], (ifname, iface))
+        self.loopback_by_lcp = {}
+        for ifname, iface in yaml.get("loopbacks", {}).items():
+            if "lcp" in iface:
+                self.loopback_by_lcp.setdefault(iface["lcp"], (ifname, iface))
+        self.lcps = Counter(lcp.get_lcps(yaml))
+
+        self.bond_members = set()
+        for _ifname, iface in yaml.get("bondethernets", {}).items():
+            self.bond_members.update(iface.get("interfaces", []))
+        self.bridge_interfaces = Counter(bridgedomain.get_bridge_interfaces(yaml))
+        self.bvis = Counter(
+            iface["bvi"]
+            for _ifname, iface in yaml.get("bridgedomains", {}).items()
+            if "bvi" in iface
+        )
+        self.tap_host_names = Counter(
+            iface["host"]["name"] for _ifname, iface in yaml.get("taps", {}).items()
+        )
+        self.addresses = address.AddressIndex(address.get_all_addresses(yaml))
+        self.referrers = diff.get_referrers(yaml)
+        self.vnis = Counter(
+            iface["vni"] for _ifname, iface in yaml.get("vxlan_tunnels", {}).items()
+        )
+        ## The prefixlists are only parsed (and aggregated) once they are used, as many
+        ## configs have large prefixlists that are not referred to by every run, see
+        ## prefixlist.get_resolved() and prefixlist.get_aggregated().
+        self.prefixlists = {}
+        self.aggregated_prefixlists = {}
+        ## Likewise, each ACL is compiled into its rules once, see acl.get_rules().
+        self.acl_rules = {}
+
+        ## Per parent interface: the encapsulations of its sub-interfaces, and the first
+        ## sub-interface with a given outer tag, used to find the parent of a QinX.
+        self.encapsulations = {}
+        self.qinx_interfaces = []
+        self.sub_by_outer_tag = {}
+        for ifname in self.sub_interfaces:
+            encap = interface.get_encapsulation(yaml, ifname)
+            if not encap:
+                continue
+            parent_ifname, _subid = ifname.split(".")
+            self.encapsulations.setdefault(parent_ifname, Counter())[
+                tuple(encap.items())
+            ] += 1
+            outer_tags = self.sub_by_outer_tag.setdefault(parent_ifname, {})
+            outer_tags.setdefault(("dot1q", encap["dot1q"]), ifname)
+            outer_tags.setdefault(("dot1ad", encap["dot1ad"]), ifname)
+            if encap["inner-dot1q"] > 0:
+                self.qinx_interfaces.append(ifname)
+        self.qinx_set = set(self.qinx_interfaces)
@@ -0,0 +1,21 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+""" A vppcfg configuration module that finds the lookup index of a YAML config """
+
+
+def get_index(yaml):
+    """Returns the ConfigIndex of the YAML config if it is an IndexedConfig, or None
+    otherwise. The index is found by attribute rather than by type, so that the config
+    modules that use it need not import index.py, which imports them to build it."""
+    return getattr(yaml, "config_index", None)
@@ -21,6 +21,7 @@ from . import lcp
 from . import address
 from . import mac
 from . import tap
+from . import indexed
 
 
 def get_qinx_parent_by_name(yaml, ifname):
@@ -29,6 +30,21 @@ def get_qinx_parent_by_name(yaml, ifname):
 
     if not is_qinx(yaml, ifname):
         return None, None
+
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        qinx_encap = get_encapsulation(yaml, ifname)
+        parent_ifname, _subid = ifname.split(".")
+        outer_tags = cfg_index.sub_by_outer_tag.get(parent_ifname, {})
+        sub_ifname = None
+        if qinx_encap["dot1q"] > 0:
+            sub_ifname = outer_tags.get(("dot1q", qinx_encap["dot1q"]))
+        elif qinx_encap["dot1ad"] > 0:
+            sub_ifname = outer_tags.get(("dot1ad", qinx_encap["dot1ad"]))
+        if not sub_ifname:
+            return None, None
+        return get_by_name(yaml, sub_ifname)
+
     _qinx_ifname, qinx_iface = get_by_name(yaml, ifname)
     if not qinx_iface:
         return None, None
@@ -72,6 +88,10 @@ def get_parent_by_name(yaml, ifname):
 
 def get_by_lcp_name(yaml, lcpname):
     """Returns the interface or sub-interface by a given lcp name, or None,None if it does not exist"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.interface_by_lcp.get(lcpname, (None, None))
+
     if not "interfaces" in yaml:
         return None, None
     for ifname, iface in yaml["interfaces"].items():
@@ -170,6 +190,9 @@ def get_unnumbered_interfaces(yaml):
 
 def is_l2xc_interface(yaml, ifname):
     """Returns True if this interface has an L2 CrossConnect"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return ifname in cfg_index.l2xc_interfaces
 
     return ifname in get_l2xc_interfaces(yaml)
 
@@ -191,12 +214,18 @@ def get_l2xc_target_interfaces(yaml):
 
 def is_l2xc_target_interface(yaml, ifname):
     """Returns True if this interface is the target of an L2 CrossConnect"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return ifname in cfg_index.l2xc_targets
 
     return ifname in get_l2xc_target_interfaces(yaml)
 
 
 def is_l2xc_target_interface_unique(yaml, ifname):
     """Returns True if this interface is referenced as an l2xc target zero or one times"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.l2xc_targets[ifname] < 2
 
     ifs = get_l2xc_target_interfaces(yaml)
     return ifs.count(ifname) < 2
@@ -314,6 +343,10 @@ def is_phy(yaml, ifname):
 
 def get_interfaces(yaml):
     """Return a list of all interface and sub-interface names"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return list(cfg_index.interfaces)
+
     ret = []
     if not "interfaces" in yaml:
         return ret
@@ -328,6 +361,10 @@ def get_interfaces(yaml):
 
 def get_sub_interfaces(yaml):
     """Return all interfaces which are a subinterface."""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return list(cfg_index.sub_interfaces)
+
     ret = []
     for ifname in get_interfaces(yaml):
         if is_sub(yaml, ifname):
@@ -342,6 +379,10 @@ def get_qinx_interfaces(yaml):
 
     Note: this is always a strict subset of get_sub_interfaces()
     """
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return list(cfg_index.qinx_interfaces)
+
     ret = []
     for ifname in get_interfaces(yaml):
         if not is_sub(yaml, ifname):
@@ -356,6 +397,9 @@ def get_qinx_interfaces(yaml):
 
 def is_qinx(yaml, ifname):
     """Returns True if the interface is a double-tagged (QinQ or QinAD) interface"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return ifname in cfg_index.qinx_set
     return ifname in get_qinx_interfaces(yaml)
 
 
@@ -371,6 +415,10 @@ def unique_encapsulation(yaml, sub_ifname):
     if not sub_encap:
         return False
 
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.encapsulations[parent_ifname][tuple(sub_encap.items())] < 2
+
     ncount = 0
     for subid, _sibling_iface in parent_iface["sub-interfaces"].items():
         sibling_ifname = f"{parent_ifname}.{int(subid)}"
@@ -399,6 +447,9 @@ def is_l3(yaml, ifname):
 
 def is_unnumbered(yaml, ifname):
     """Returns True if the interface exists and is unnumbered"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return ifname in cfg_index.unnumbered_interfaces
     return ifname in get_unnumbered_interfaces(yaml)
 
 
@@ -12,6 +12,7 @@
 # limitations under the License.
 #
 """ A vppcfg configuration module that validates Linux Control Plane (lcp) elements """
+from . import indexed
 
 
 def get_lcps(yaml, interfaces=True, loopbacks=True, bridgedomains=True):
@@ -42,6 +43,9 @@ def get_lcps(yaml, interfaces=True, loopbacks=True, bridgedomains=True):
 
 def is_unique(yaml, lcpname):
     """Returns True if there is at most one occurence of the LCP name in the entire config."""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.lcps[lcpname] < 2
 
     lcps = get_lcps(yaml)
     return lcps.count(lcpname) < 2
@@ -17,6 +17,7 @@ from . import lcp
 from . import address
 from . import mac
 from . import interface
+from . import indexed
 
 
 def get_loopbacks(yaml):
@@ -30,6 +31,10 @@ def get_loopbacks(yaml):
 
 def get_by_lcp_name(yaml, lcpname):
     """Returns the loopback by a given lcp name, or None,None if it does not exist"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.loopback_by_lcp.get(lcpname, (None, None))
+
     if not "loopbacks" in yaml:
         return None, None
     for ifname, iface in yaml["loopbacks"].items():
@@ -68,6 +73,9 @@ def get_unnumbered_loopbacks(yaml):
 
 def is_unnumbered(yaml, ifname):
     """Returns True if the loopback exists and is unnumbered"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return ifname in cfg_index.unnumbered_loopbacks
     return ifname in get_unnumbered_loopbacks(yaml)
 
 
@@ -14,6 +14,12 @@
 """ A vppcfg configuration module that validates prefixlists """
 import logging
 import ipaddress
+from collections import namedtuple
+from . import indexed
+
+## A prefixlist with its members parsed into ip_network elements: all of them in the
+## order of the prefixlist, and the IPv4 and IPv6 ones on their own.
+ResolvedPrefixList = namedtuple("resolved_prefixlist", ["members", "ipv4", "ipv6"])
 
 
 def get_prefixlists(yaml):
@@ -35,39 +41,97 @@ def get_by_name(yaml, plname):
     return None, None
 
 
-def get_network_list(yaml, plname, want_ipv4=True, want_ipv6=True):
-    """Returns a list of 0 or more ip_network elements, that represent the members
-    in a prefixlist of given name. Return the empty list if the prefixlist doesn't
-    exist. Optionally, want_ipv4 or want_ipv6 can be set to False to filter the list."""
-    ret = []
+def get_resolved(yaml, plname):
+    """Returns the ResolvedPrefixList of the prefixlist of given name, or None if the
+    prefixlist doesn't exist. Given an IndexedConfig, each prefixlist is parsed only
+    once, when it is first used, and the result is shared by all callers."""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index and plname in cfg_index.prefixlists:
+        return cfg_index.prefixlists[plname]
+
+    resolved = None
+    _plname, plist = get_by_name(yaml, plname)
+    if plist:
+        members = tuple(
+            ipaddress.ip_network(member, strict=False) for member in plist["members"]
+        )
+        ipv4 = tuple(ipn for ipn in members if ipn.version == 4)
+        ipv6 = tuple(ipn for ipn in members if ipn.version == 6)
+        resolved = ResolvedPrefixList(members=members, ipv4=ipv4, ipv6=ipv6)
+    if cfg_index:
+        cfg_index.prefixlists[plname] = resolved
+    return resolved
+
+
+def get_aggregated(yaml, plname):
+    """Returns a tuple of the IPv4 and the IPv6 members of the prefixlist of given name,
+    each aggregated into the fewest prefixes that cover the same addresses, or None if
+    the prefixlist doesn't exist. This is only needed for prefixlists that have
+    'aggregate' set, and to report on the others. Given an IndexedConfig, each
+    prefixlist is aggregated only once."""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index and plname in cfg_index.aggregated_prefixlists:
+        return cfg_index.aggregated_prefixlists[plname]
+
+    aggregated = None
+    resolved = get_resolved(yaml, plname)
+    if resolved:
+        aggregated = (
+            tuple(ipaddress.collapse_addresses(resolved.ipv4)),
+            tuple(ipaddress.collapse_addresses(resolved.ipv6)),
+        )
+    if cfg_index:
+        cfg_index.aggregated_prefixlists[plname] = aggregated
+    return aggregated
+
+
+def is_aggregated(yaml, plname):
+    """Return True if the prefixlist asks for its members to be aggregated when it is
+    used in an ACL."""
     plname, plist = get_by_name(yaml, plname)
     if not plist:
-        return ret
-    for member in plist["members"]:
-        ipn = ipaddress.ip_network(member, strict=False)
-        if ipn.version == 4 and want_ipv4:
-            ret.append(ipn)
-        if ipn.version == 6 and want_ipv6:
-            ret.append(ipn)
-    return ret
+        return False
+    return plist.get("aggregate", False)
+
+
+def get_network_list(yaml, plname, want_ipv4=True, want_ipv6=True, aggregate=False):
+    """Returns a list of 0 or more ip_network elements, that represent the members
+    in a prefixlist of given name. Return the empty list if the prefixlist doesn't
+    exist. Optionally, want_ipv4 or want_ipv6 can be set to False to filter the list.
+    If aggregate is True, the IPv4 members and then the IPv6 members are returned
+    aggregated: adjacent prefixes are merged and prefixes that are covered by another
+    one are left out, so that the list covers the same addresses with fewer members."""
+    if aggregate:
+        ipv4, ipv6 = get_aggregated(yaml, plname) or ((), ())
+        return (list(ipv4) if want_ipv4 else []) + (list(ipv6) if want_ipv6 else [])
+    resolved = get_resolved(yaml, plname)
+    if not resolved:
+        return []
+    if want_ipv4 and want_ipv6:
+        return list(resolved.members)
+    if want_ipv4:
+        return list(resolved.ipv4)
+    if want_ipv6:
+        return list(resolved.ipv6)
+    return []
 
 
 def count(yaml, plname):
     """Return the number of IPv4 and IPv6 entries in the prefixlist.
     Returns 0, 0 if it doesn't exist"""
-    ipv4, ipv6 = 0, 0
+    resolved = get_resolved(yaml, plname)
+    if not resolved:
+        return 0, 0
+    return len(resolved.ipv4), len(resolved.ipv6)
 
-    plname, plist = get_by_name(yaml, plname)
-    if not plist:
+
+def count_aggregated(yaml, plname):
+    """Return the number of IPv4 and IPv6 entries in the prefixlist once it is
+    aggregated. Returns 0, 0 if it doesn't exist"""
+    aggregated = get_aggregated(yaml, plname)
+    if not aggregated:
         return 0, 0
-    for member in plist["members"]:
-        ipn = ipaddress.ip_network(member, strict=False)
-        if ipn.version == 4:
-            ipv4 += 1
-        elif ipn.version == 6:
-            ipv6 += 1
-
-    return ipv4, ipv6
+    return len(aggregated[0]), len(aggregated[1])
 
 
 def count_ipv4(yaml, plname):
@@ -14,6 +14,7 @@
 """ A vppcfg configuration module that validates taps """
 import logging
 from . import mac
+from . import indexed
 
 
 def get_taps(yaml):
@@ -46,6 +47,10 @@ def is_tap(yaml, ifname):
 
 def is_host_name_unique(yaml, hostname):
     """Returns True if there is at most one occurence of the given ifname amonst all host-names of TAPs."""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.tap_host_names[hostname] < 2
+
     if not "taps" in yaml:
         return True
     host_names = []
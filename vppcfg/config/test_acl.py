@@ -14,15 +14,16 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for taps """
 import unittest
-import yaml
 from . import acl
+from . import yamlio
+from .index import IndexedConfig
 from .unittestyaml import UnitTestYaml
 
 
 class TestACLMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_acl.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_get_acls(self):
         acllist = acl.get_acls(self.cfg)
@@ -169,3 +170,121 @@ class TestACLMethods(unittest.TestCase):
         l = acl.get_network_list(self.cfg, "trusted", want_ipv4=False, want_ipv6=False)
         self.assertFalse(acl.network_list_has_family(l, 4))
         self.assertFalse(acl.network_list_has_family(l, 6))
+
+    def test_get_rules(self):
+        rules = acl.get_rules(self.cfg, "deny-all")
+        self.assertEqual(2, len(rules))
+        self.assertEqual(0, rules[0].is_permit)
+        self.assertEqual("0.0.0.0/0", str(rules[0].src_prefix))
+        self.assertEqual("::/0", str(rules[1].dst_prefix))
+        self.assertEqual(0, rules[0].proto)
+        self.assertEqual(0, rules[0].srcport_or_icmptype_first)
+        self.assertEqual(65535, rules[0].dstport_or_icmpcode_last)
+
+        rules = acl.get_rules(self.cfg, "acl01")
+        self.assertEqual(5 + 1 + 1 + 2, len(rules))
+        self.assertEqual("192.0.2.1/32", str(rules[0].src_prefix))
+        self.assertEqual("2001:db8::/48", str(rules[4].src_prefix))
+
+        rule = rules[5]
+        self.assertEqual(1, rule.is_permit)
+        self.assertEqual(6, rule.proto)
+        self.assertEqual(1024, rule.srcport_or_icmptype_first)
+        self.assertEqual(65535, rule.srcport_or_icmptype_last)
+        self.assertEqual(80, rule.dstport_or_icmpcode_first)
+        self.assertEqual(80, rule.dstport_or_icmpcode_last)
+
+        rule = rules[6]
+        self.assertEqual(4, rule.src_prefix.version)
+        self.assertEqual(1, rule.proto)
+        self.assertEqual(3, rule.srcport_or_icmptype_first)
+        self.assertEqual(3, rule.srcport_or_icmptype_last)
+        self.assertEqual(0, rule.dstport_or_icmpcode_first)
+        self.assertEqual(255, rule.dstport_or_icmpcode_last)
+
+        self.assertIsNone(acl.get_rules(self.cfg, "acl-noexist"))
+
+    def test_get_rules_aggregated(self):
+        self.cfg["prefixlists"]["trusted"]["aggregate"] = True
+        l = acl.get_network_list(self.cfg, "trusted")
+        self.assertEqual(["192.0.2.0/24", "2001:db8::/48"], [str(n) for n in l])
+
+        rules = acl.get_rules(self.cfg, "acl01")
+        self.assertEqual(2 + 1 + 1 + 2, len(rules))
+        self.assertEqual("192.0.2.0/24", str(rules[0].src_prefix))
+        self.assertEqual("2001:db8::/48", str(rules[1].src_prefix))
+
+    def test_get_rules_duplicates(self):
+        self.cfg["acls"]["deny-all"]["terms"].append({"action": "deny"})
+        self.cfg["acls"]["deny-all"]["terms"].append(
+            {"action": "permit", "source": "192.0.2.1/24"}
+        )
+        rules = acl.get_rules(self.cfg, "deny-all")
+        self.assertEqual(3, len(rules))
+        self.assertEqual(1, rules[2].is_permit)
+        self.assertEqual("192.0.2.0/24", str(rules[2].src_prefix))
+
+    def test_get_rules_icmp(self):
+        ## A term for ICMP of family 'any' matches ICMP in IPv4, and ICMPv6 in IPv6
+        for protocol in ["icmp", "ipv6-icmp"]:
+            self.cfg["acls"]["deny-all"]["terms"][0]["protocol"] = protocol
+            rules = acl.get_rules(self.cfg, "deny-all")
+            self.assertEqual(2, len(rules))
+            self.assertEqual((4, 1), (rules[0].src_prefix.version, rules[0].proto))
+            self.assertEqual((6, 58), (rules[1].src_prefix.version, rules[1].proto))
+
+    def test_get_network_pairs(self):
+        src = acl.get_network_list(self.cfg, "trusted")
+        dst = acl.get_network_list(self.cfg, "any")
+        self.assertEqual(5, acl.get_network_pairs(src, dst))
+        self.assertEqual(2 * 2 + 3 * 3, acl.get_network_pairs(src, src + src))
+        self.assertEqual(0, acl.get_network_pairs(src, []))
+
+    def test_get_rules_large(self):
+        ## A term between two large prefixlists compiles into every pair of their
+        ## members, which is more than an ACL may have unless it raises its max-rules
+        self.cfg["prefixlists"]["src"] = {
+            "members": [f"10.0.{i // 256}.{i % 256}" for i in range(300)]
+        }
+        self.cfg["prefixlists"]["dst"] = {
+            "members": [f"10.1.{i // 256}.{i % 256}" for i in range(300)]
+        }
+        self.cfg["acls"]["large"] = {
+            "terms": [
+                {"action": "permit", "source": "src", "destination": "dst"},
+                {"action": "deny"},
+            ]
+        }
+        self.assertEqual(acl.ACL_MAX_RULES, acl.get_max_rules(self.cfg, "large"))
+        self.assertIsNone(acl.get_rules(self.cfg, "large"))
+        result, msgs = acl.validate_acls(self.cfg)
+        self.assertFalse(result)
+        self.assertEqual(
+            [
+                f"acl large has 90002 rules, more than the maximum of {acl.ACL_MAX_RULES}"
+            ],
+            msgs,
+        )
+
+        self.cfg["acls"]["large"]["max-rules"] = 100000
+        rules = acl.get_rules(self.cfg, "large")
+        self.assertEqual(300 * 300 + 2, len(rules))
+        self.assertEqual("10.0.0.0/32", str(rules[0].src_prefix))
+        self.assertEqual("10.1.1.43/32", str(rules[300 * 300 - 1].dst_prefix))
+
+    def test_get_rules_max(self):
+        self.cfg["acls"]["acl01"]["max-rules"] = 8
+        self.assertIsNone(acl.get_rules(self.cfg, "acl01"))
+        self.assertEqual(2, len(acl.get_rules(self.cfg, "deny-all")))
+
+        result, msgs = acl.validate_acls(self.cfg)
+        self.assertFalse(result)
+        self.assertIn("acl acl01 has 9 rules, more than the maximum of 8", msgs)
+
+    def test_get_rules_indexed(self):
+        cfg = IndexedConfig(self.cfg)
+        rules = acl.get_rules(cfg, "acl01")
+        self.assertEqual(rules, acl.get_rules(self.cfg, "acl01"))
+        self.assertIs(rules, acl.get_rules(cfg, "acl01"))
+        self.assertIsNone(acl.get_rules(cfg, "acl-noexist"))
+        self.assertEqual(["acl01", "acl-noexist"], list(cfg.config_index.acl_rules))
@@ -13,9 +13,11 @@
 #
 # -*- coding: utf-8 -*-
 """ Unit tests for addresses """
+import random
 import unittest
 import yaml
 from . import address
+from .index import IndexedConfig
 
 
 class TestAddressMethods(unittest.TestCase):
@@ -42,3 +44,70 @@ class TestAddressMethods(unittest.TestCase):
         self.assertFalse(address.is_canonical("2001:dB8::1/128"))  # Capitals
         self.assertFalse(address.is_canonical("2001:db8:0::1/128"))  # Spurious 0
         self.assertFalse(address.is_canonical("2001:db8::0:1"))  # Spurious 0
+
+    def test_is_allowed(self):
+        cfg = {
+            "interfaces": {
+                "xe0": {
+                    "addresses": ["192.0.2.1/24", "192.0.2.2/24", "2001:db8::1/64"],
+                    "sub-interfaces": {
+                        100: {"addresses": ["198.51.100.1/25"]},
+                        101: {"addresses": ["198.51.100.129/25"]},
+                    },
+                },
+                "xe1": {"addresses": ["203.0.113.1/30"]},
+            },
+            "loopbacks": {"loop0": {"addresses": ["10.0.0.1/32", "2001:db8:1::1/128"]}},
+        }
+        for ifname, iface, addr, expected in [
+            ("xe0", cfg["interfaces"]["xe0"], "192.0.2.1/24", True),
+            ("xe0", cfg["interfaces"]["xe0"], "192.0.2.3/24", True),
+            ("xe0", cfg["interfaces"]["xe0"], "192.0.2.1/29", False),
+            ("xe0", cfg["interfaces"]["xe0"], "198.51.100.1/24", True),
+            ("xe0.100", {}, "192.0.2.5/24", False),
+            ("xe1", cfg["interfaces"]["xe1"], "192.0.2.5/29", False),
+            ("xe1", cfg["interfaces"]["xe1"], "192.0.0.1/16", False),
+            ("xe1", cfg["interfaces"]["xe1"], "198.51.100.1/24", False),
+            ("xe1", cfg["interfaces"]["xe1"], "203.0.113.2/30", True),
+            ("xe1", cfg["interfaces"]["xe1"], "2001:db8:1::/48", False),
+            ("xe1", cfg["interfaces"]["xe1"], "2001:db8:2::1/64", True),
+            ("loop1", {}, "10.0.0.0/8", False),
+            ("loop1", {}, "0.0.0.0/0", False),
+            ("loop1", {}, "10.0.0.2/32", True),
+        ]:
+            addresses = iface.get("addresses", [])
+            self.assertEqual(
+                expected, address.is_allowed(cfg, ifname, addresses, addr), addr
+            )
+            self.assertEqual(
+                expected,
+                address.is_allowed(IndexedConfig(cfg), ifname, addresses, addr),
+                addr,
+            )
+
+    def test_is_allowed_random(self):
+        rng = random.Random(42)
+        cfg = {"interfaces": {}}
+        for i in range(40):
+            cfg["interfaces"][f"xe{i}"] = {
+                "addresses": [
+                    f"10.{rng.randrange(4)}.{rng.randrange(4)}.{rng.randrange(256)}/{rng.randrange(8, 33)}"
+                    for _ in range(rng.randrange(1, 4))
+                ],
+                "sub-interfaces": {
+                    100: {
+                        "addresses": [
+                            f"10.{rng.randrange(4)}.0.0/{rng.randrange(8, 33)}"
+                        ]
+                    }
+                },
+            }
+        indexed = IndexedConfig(cfg)
+        all_addresses = address.get_all_addresses(cfg)
+        for ifname, addr in all_addresses:
+            iface_addresses = [a for i, a in all_addresses if i == ifname]
+            self.assertEqual(
+                address.is_allowed(cfg, ifname, iface_addresses, addr),
+                address.is_allowed(indexed, ifname, iface_addresses, addr),
+                f"{ifname} {addr}",
+            )
@@ -14,15 +14,15 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for bondethernet """
 import unittest
-import yaml
 from . import bondethernet
+from . import yamlio
 from .unittestyaml import UnitTestYaml
 
 
 class TestBondEthernetMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_bondethernet.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_get_by_name(self):
         ifname, iface = bondethernet.get_by_name(self.cfg, "BondEthernet0")
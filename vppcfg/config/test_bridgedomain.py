@@ -14,15 +14,15 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for bridgedomains """
 import unittest
-import yaml
 from . import bridgedomain
+from . import yamlio
 from .unittestyaml import UnitTestYaml
 
 
 class TestBridgeDomainMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_bridgedomain.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_get_by_name(self):
         ifname, iface = bridgedomain.get_by_name(self.cfg, "bd10")
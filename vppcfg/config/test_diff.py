@@ -0,0 +1,116 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for config diffs """
+import copy
+import unittest
+from . import diff
+from .index import IndexedConfig
+from . import yamlio
+from .unittestyaml import UnitTestYaml
+
+
+class TestDiffMethods(unittest.TestCase):
+    def setUp(self):
+        with UnitTestYaml("test_interface.yaml") as f:
+            self.cfg = yamlio.load(f)
+        with UnitTestYaml("test_bridgedomain.yaml") as f:
+            self.bd_cfg = yamlio.load(f)
+
+    def test_changed(self):
+        new = copy.deepcopy(self.cfg)
+        self.assertEqual(set(), diff.get_changed(self.cfg, new))
+
+        new["interfaces"]["GigabitEthernet1/0/1"]["sub-interfaces"][100]["mtu"] = 1500
+        self.assertEqual({"GigabitEthernet1/0/1.100"}, diff.get_changed(self.cfg, new))
+
+        new["interfaces"]["GigabitEthernet1/0/1"]["mtu"] = 1500
+        del new["interfaces"]["GigabitEthernet4/0/3"]
+        new["loopbacks"]["loop1"] = {"mtu": 1500}
+        new["sflow"] = {"sampling-rate": 100}
+        self.assertEqual(
+            {
+                "GigabitEthernet1/0/1",
+                "GigabitEthernet1/0/1.100",
+                "GigabitEthernet4/0/3",
+                "GigabitEthernet4/0/3.100",
+                "GigabitEthernet4/0/3.101",
+                "GigabitEthernet4/0/3.102",
+                "GigabitEthernet4/0/3.103",
+                "loop1",
+                "sflow",
+            },
+            diff.get_changed(self.cfg, new),
+        )
+
+    def test_dependents(self):
+        for cfg in [self.cfg, IndexedConfig(self.cfg)]:
+            self.assertIn(
+                "GigabitEthernet1/0/1.102",
+                diff.get_dependents(cfg, "GigabitEthernet1/0/1"),
+            )
+            self.assertEqual(
+                {"GigabitEthernet1/0/1.102"},
+                diff.get_dependents(cfg, "GigabitEthernet1/0/1.101"),
+            )
+            self.assertEqual(
+                {"GigabitEthernet3/0/1"},
+                diff.get_dependents(cfg, "GigabitEthernet3/0/0"),
+            )
+            self.assertEqual(
+                {"GigabitEthernet3/0/2.100"},
+                diff.get_dependents(cfg, "GigabitEthernet3/0/2.200"),
+            )
+            self.assertEqual(
+                {"GigabitEthernet4/0/2", "GigabitEthernet4/0/3.101"},
+                diff.get_dependents(cfg, "loop0"),
+            )
+            self.assertEqual(set(), diff.get_dependents(cfg, "notexist"))
+
+        for cfg in [self.bd_cfg, IndexedConfig(self.bd_cfg)]:
+            self.assertEqual(
+                {
+                    "GigabitEthernet1/0/0",
+                    "GigabitEthernet1/0/1",
+                    "BondEthernet0",
+                    "loop0",
+                },
+                diff.get_dependents(cfg, "bd10"),
+            )
+            self.assertEqual({"bd10"}, diff.get_dependents(cfg, "loop0"))
+            self.assertEqual(
+                {"bd10", "bd12"}, diff.get_dependents(cfg, "GigabitEthernet1/0/0")
+            )
+
+    def test_dirty(self):
+        new = copy.deepcopy(self.cfg)
+        self.assertEqual(set(), diff.get_dirty(self.cfg, new))
+
+        new["interfaces"]["GigabitEthernet4/0/0"]["mtu"] = 9000
+        self.assertEqual(
+            {
+                "GigabitEthernet4/0/0",
+                "GigabitEthernet4/0/1",
+                "GigabitEthernet4/0/3.102",
+            },
+            diff.get_dirty(self.cfg, new),
+        )
+
+        ## Dependents in the previous config are planned as well
+        new = copy.deepcopy(self.cfg)
+        del new["interfaces"]["GigabitEthernet3/0/2"]["sub-interfaces"][100]["l2xc"]
+        self.assertEqual(
+            {"GigabitEthernet3/0/2.100", "GigabitEthernet3/0/2.200"},
+            diff.get_dirty(IndexedConfig(self.cfg), IndexedConfig(new)),
+        )
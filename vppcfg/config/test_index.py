@@ -0,0 +1,155 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for the indexed config """
+import unittest
+from . import interface
+from . import loopback
+from . import bondethernet
+from . import bridgedomain
+from . import lcp
+from . import tap
+from . import vxlan_tunnel
+from . import prefixlist
+from .index import IndexedConfig
+from . import yamlio
+from .unittestyaml import UnitTestYaml
+
+
+class TestIndexMethods(unittest.TestCase):
+    """Every helper that uses the index must return the same as its scanning variant."""
+
+    def load(self, fname):
+        with UnitTestYaml(fname) as f:
+            return yamlio.load(f)
+
+    def assertSameAnswers(self, cfg, func, args):
+        indexed = IndexedConfig(cfg)
+        for arg in args:
+            self.assertEqual(func(cfg, arg), func(indexed, arg), f"{func} {arg}")
+
+    def names(self, cfg):
+        ret = interface.get_interfaces(cfg) + loopback.get_loopbacks(cfg)
+        ret += bondethernet.get_bondethernets(cfg) + bridgedomain.get_bridgedomains(cfg)
+        return ret + ["notexist", "notexist.100"]
+
+    def test_interfaces(self):
+        for fname in ["test_interface.yaml", "test_lcp.yaml", "test_bridgedomain.yaml"]:
+            cfg = self.load(fname)
+            names = self.names(cfg)
+            indexed = IndexedConfig(cfg)
+            self.assertEqual(
+                interface.get_interfaces(cfg), interface.get_interfaces(indexed)
+            )
+            self.assertEqual(
+                interface.get_sub_interfaces(cfg),
+                interface.get_sub_interfaces(indexed),
+            )
+            self.assertEqual(
+                interface.get_qinx_interfaces(cfg),
+                interface.get_qinx_interfaces(indexed),
+            )
+            for func in [
+                interface.get_qinx_parent_by_name,
+                interface.is_qinx,
+                interface.is_l2xc_interface,
+                interface.is_l2xc_target_interface,
+                interface.is_l2xc_target_interface_unique,
+                interface.is_unnumbered,
+                interface.unique_encapsulation,
+                loopback.is_unnumbered,
+                bondethernet.is_bond_member,
+                bridgedomain.is_bridge_interface,
+                bridgedomain.is_bridge_interface_unique,
+                bridgedomain.bvi_unique,
+            ]:
+                self.assertSameAnswers(cfg, func, names)
+
+    def test_lcps(self):
+        for fname in ["test_interface.yaml", "test_lcp.yaml", "test_loopback.yaml"]:
+            cfg = self.load(fname)
+            lcps = lcp.get_lcps(cfg) + ["notexist"]
+            for func in [
+                interface.get_by_lcp_name,
+                loopback.get_by_lcp_name,
+                lcp.is_unique,
+            ]:
+                self.assertSameAnswers(cfg, func, lcps)
+
+    def test_taps(self):
+        cfg = self.load("test_tap.yaml")
+        host_names = [iface["host"]["name"] for iface in cfg["taps"].values()]
+        self.assertSameAnswers(cfg, tap.is_host_name_unique, host_names + ["notexist"])
+
+    def test_vnis(self):
+        cfg = self.load("test_vxlan_tunnel.yaml")
+        vnis = [iface["vni"] for iface in cfg["vxlan_tunnels"].values()]
+        self.assertSameAnswers(cfg, vxlan_tunnel.vni_unique, vnis + [0])
+
+    def test_prefixlists(self):
+        cfg = self.load("test_prefixlist.yaml")
+        plnames = prefixlist.get_prefixlists(cfg) + ["notexist"]
+        for func in [
+            prefixlist.get_resolved,
+            prefixlist.get_aggregated,
+            prefixlist.get_network_list,
+            prefixlist.count,
+            prefixlist.count_aggregated,
+            prefixlist.is_aggregated,
+            prefixlist.has_ipv4,
+            prefixlist.has_ipv6,
+            prefixlist.is_empty,
+        ]:
+            self.assertSameAnswers(cfg, func, plnames)
+
+        ## Each prefixlist is parsed once it is used, and only then
+        indexed = IndexedConfig(cfg)
+        self.assertEqual({}, indexed.config_index.prefixlists)
+        resolved = prefixlist.get_resolved(indexed, "trusted")
+        self.assertEqual(["trusted"], list(indexed.config_index.prefixlists))
+        self.assertIs(resolved, prefixlist.get_resolved(indexed, "trusted"))
+        self.assertEqual((2, 3), prefixlist.count(indexed, "trusted"))
+        self.assertEqual(["trusted"], list(indexed.config_index.prefixlists))
+
+        ## And it is only aggregated when that is asked for
+        self.assertEqual({}, indexed.config_index.aggregated_prefixlists)
+        aggregated = prefixlist.get_aggregated(indexed, "trusted")
+        self.assertIs(aggregated, prefixlist.get_aggregated(indexed, "trusted"))
+        self.assertEqual(["trusted"], list(indexed.config_index.aggregated_prefixlists))
+
+    def test_reindex(self):
+        cfg = IndexedConfig(self.load("test_lcp.yaml"))
+        self.assertEqual((None, None), interface.get_by_lcp_name(cfg, "new-lcp"))
+        cfg["interfaces"]["GigabitEthernet2/0/3"]["lcp"] = "new-lcp"
+        cfg.reindex()
+        ifname, _iface = interface.get_by_lcp_name(cfg, "new-lcp")
+        self.assertEqual("GigabitEthernet2/0/3", ifname)
+
+    def test_mutate(self):
+        cfg = IndexedConfig(self.load("test_lcp.yaml"))
+        self.assertEqual((None, None), loopback.get_by_lcp_name(cfg, "new-lcp"))
+
+        ## Setting, replacing or removing a section drops the index
+        cfg["loopbacks"] = {"loop9": {"lcp": "new-lcp"}}
+        self.assertEqual("loop9", loopback.get_by_lcp_name(cfg, "new-lcp")[0])
+        del cfg["loopbacks"]
+        self.assertEqual((None, None), loopback.get_by_lcp_name(cfg, "new-lcp"))
+        cfg.update(loopbacks={"loop9": {"lcp": "new-lcp"}})
+        self.assertEqual("loop9", loopback.get_by_lcp_name(cfg, "new-lcp")[0])
+        cfg.pop("loopbacks")
+        self.assertEqual((None, None), loopback.get_by_lcp_name(cfg, "new-lcp"))
+        cfg.setdefault("loopbacks", {"loop9": {"lcp": "new-lcp"}})
+        self.assertEqual("loop9", loopback.get_by_lcp_name(cfg, "new-lcp")[0])
+        cfg.clear()
+        self.assertEqual((None, None), loopback.get_by_lcp_name(cfg, "new-lcp"))
@@ -14,15 +14,15 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for interfaces """
 import unittest
-import yaml
 from . import interface
+from . import yamlio
 from .unittestyaml import UnitTestYaml
 
 
 class TestInterfaceMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_interface.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_enumerators(self):
         ifs = interface.get_interfaces(self.cfg)
@@ -14,16 +14,16 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for LCPs """
 import unittest
-import yaml
 from . import lcp
 from . import interface
+from . import yamlio
 from .unittestyaml import UnitTestYaml
 
 
 class TestLCPMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_lcp.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_enumerators(self):
         lcps = lcp.get_lcps(self.cfg)
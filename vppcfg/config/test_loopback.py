@@ -14,15 +14,15 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for loopbacks """
 import unittest
-import yaml
 from . import loopback
+from . import yamlio
 from .unittestyaml import UnitTestYaml
 
 
 class TestLoopbackMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_loopback.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_get_by_lcp_name(self):
         ifname, iface = loopback.get_by_lcp_name(self.cfg, "loop56789012345")
@@ -14,15 +14,15 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for taps """
 import unittest
-import yaml
 from . import prefixlist
+from . import yamlio
 from .unittestyaml import UnitTestYaml
 
 
 class TestACLMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_prefixlist.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_get_prefixlists(self):
         plist = prefixlist.get_prefixlists(self.cfg)
@@ -76,6 +76,42 @@ class TestACLMethods(unittest.TestCase):
         self.assertTrue(prefixlist.is_empty(self.cfg, "empty"))
         self.assertTrue(prefixlist.is_empty(self.cfg, "pl-noexist"))
 
+    def test_get_resolved(self):
+        resolved = prefixlist.get_resolved(self.cfg, "trusted")
+        self.assertEqual(5, len(resolved.members))
+        self.assertEqual(2, len(resolved.ipv4))
+        self.assertEqual(3, len(resolved.ipv6))
+        self.assertEqual("192.0.2.0/24", str(resolved.ipv4[1]))
+
+        resolved = prefixlist.get_resolved(self.cfg, "empty")
+        self.assertEqual(0, len(resolved.members))
+
+        self.assertIsNone(prefixlist.get_resolved(self.cfg, "pl-noexist"))
+
+    def test_aggregated(self):
+        ipv4, ipv6 = prefixlist.get_aggregated(self.cfg, "trusted")
+        self.assertEqual(["192.0.2.0/24"], [str(n) for n in ipv4])
+        self.assertEqual(["2001:db8::/48"], [str(n) for n in ipv6])
+        self.assertEqual(((), ()), prefixlist.get_aggregated(self.cfg, "empty"))
+        self.assertIsNone(prefixlist.get_aggregated(self.cfg, "pl-noexist"))
+
+        self.assertEqual((1, 1), prefixlist.count_aggregated(self.cfg, "trusted"))
+        self.assertEqual((0, 0), prefixlist.count_aggregated(self.cfg, "empty"))
+        self.assertEqual((0, 0), prefixlist.count_aggregated(self.cfg, "pl-noexist"))
+
+        self.assertFalse(prefixlist.is_aggregated(self.cfg, "trusted"))
+        self.assertFalse(prefixlist.is_aggregated(self.cfg, "pl-noexist"))
+        self.cfg["prefixlists"]["trusted"]["aggregate"] = True
+        self.assertTrue(prefixlist.is_aggregated(self.cfg, "trusted"))
+
+        l = prefixlist.get_network_list(self.cfg, "trusted", aggregate=True)
+        self.assertEqual(["192.0.2.0/24", "2001:db8::/48"], [str(n) for n in l])
+
+        l = prefixlist.get_network_list(
+            self.cfg, "trusted", want_ipv4=False, aggregate=True
+        )
+        self.assertEqual(["2001:db8::/48"], [str(n) for n in l])
+
     def test_get_network_list(self):
         l = prefixlist.get_network_list(self.cfg, "trusted")
         self.assertIsInstance(l, list)
@@ -14,15 +14,15 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for taps """
 import unittest
-import yaml
 from . import tap
+from . import yamlio
 from .unittestyaml import UnitTestYaml
 
 
 class TestTAPMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_tap.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_get_by_name(self):
         ifname, iface = tap.get_by_name(self.cfg, "tap0")
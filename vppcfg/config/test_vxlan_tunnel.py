@@ -14,15 +14,15 @@
 # -*- coding: utf-8 -*-
 """ Unit tests for vxlan_tunnels """
 import unittest
-import yaml
 from . import vxlan_tunnel
+from . import yamlio
 from .unittestyaml import UnitTestYaml
 
 
 class TestVXLANMethods(unittest.TestCase):
     def setUp(self):
         with UnitTestYaml("test_vxlan_tunnel.yaml") as f:
-            self.cfg = yaml.load(f, Loader=yaml.FullLoader)
+            self.cfg = yamlio.load(f)
 
     def test_get_by_name(self):
         ifname, iface = vxlan_tunnel.get_by_name(self.cfg, "vxlan_tunnel0")
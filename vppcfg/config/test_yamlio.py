@@ -0,0 +1,51 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for YAML input and output """
+import io
+import unittest
+import yaml
+from . import yamlio
+from .unittestyaml import UnitTestYaml
+
+
+class TestYAMLIOMethods(unittest.TestCase):
+    def setUp(self):
+        with UnitTestYaml("test_interface.yaml") as f:
+            self.text = f.read()
+
+    def test_libyaml(self):
+        self.assertEqual(yaml.__with_libyaml__, yamlio.HAVE_LIBYAML)
+
+    def test_load(self):
+        cfg = yamlio.load(self.text)
+        self.assertEqual(yaml.load(self.text, Loader=yaml.FullLoader), cfg)
+        self.assertEqual(cfg, yamlio.load(io.StringIO(self.text)))
+        self.assertIn(100, cfg["interfaces"]["GigabitEthernet1/0/0"]["sub-interfaces"])
+
+    def test_load_all(self):
+        docs = list(yamlio.load_all("test: 1\n---\ninterfaces: {}\n"))
+        self.assertEqual([{"test": 1}, {"interfaces": {}}], docs)
+
+    def test_dump(self):
+        cfg = yamlio.load(self.text)
+        self.assertEqual(yaml.dump(cfg), yamlio.dump(cfg))
+        self.assertEqual(cfg, yamlio.load(yamlio.dump(cfg)))
+        stream = io.StringIO()
+        self.assertIsNone(yamlio.dump(cfg, stream))
+        self.assertEqual(yaml.dump(cfg), stream.getvalue())
+
+    def test_error(self):
+        with self.assertRaises(yamlio.YAMLError):
+            yamlio.load("interfaces: [")
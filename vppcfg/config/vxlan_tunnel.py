@@ -14,6 +14,7 @@
 """ A vppcfg configuration module that validates vxlan_tunnels """
 import logging
 import ipaddress
+from . import indexed
 
 
 def get_by_name(yaml, ifname):
@@ -34,6 +35,10 @@ def is_vxlan_tunnel(yaml, ifname):
 
 def vni_unique(yaml, vni):
     """Return True if the VNI is unique amongst all VXLANs"""
+    cfg_index = indexed.get_index(yaml)
+    if cfg_index:
+        return cfg_index.vnis[vni] < 2
+
     if not "vxlan_tunnels" in yaml:
         return True
 
@@ -0,0 +1,50 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file read and write YAML documents, using the (much faster)
+libyaml based loader and dumper of PyYAML if it was built with libyaml, and its pure
+Python ones otherwise. Both of them return and emit the same documents.
+"""
+import yaml
+
+# pylint: disable=invalid-name
+try:
+    from yaml import CFullLoader as FullLoader
+    from yaml import CDumper as Dumper
+
+    HAVE_LIBYAML = True
+except ImportError:
+    from yaml import FullLoader
+    from yaml import Dumper
+
+    HAVE_LIBYAML = False
+
+YAMLError = yaml.YAMLError
+
+
+def load(stream):
+    """Return the YAML document read from 'stream', which is a string or a file"""
+    return yaml.load(stream, Loader=FullLoader)
+
+
+def load_all(stream):
+    """Return an iterator over the YAML documents read from 'stream'"""
+    return yaml.load_all(stream, Loader=FullLoader)
+
+
+def dump(data, stream=None):
+    """Write 'data' as a YAML document to 'stream', or return it as a string if no
+    'stream' is given"""
+    return yaml.dump(data, stream, Dumper=Dumper)
@@ -0,0 +1,129 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file keep count of the time spent in the phases of vppcfg,
+such as each of the validators, each of the VPP API calls and each of the steps of
+the Reconciler, for `vppcfg --profile`.
+"""
+import json
+import time
+import functools
+import threading
+import contextlib
+
+PROFILE_VERSION = 1
+
+
+class Profiler:
+    """The Profiler class keeps, for each named timer, the number of times it ran, the
+    total time it took and the number of items it handled (such as the details
+    messages of a VPP API dump). It does nothing until it is enabled, so that the
+    timers can stay in place at very little cost."""
+
+    def __init__(self):
+        self.enabled = False
+        self.start = None
+        self.timers = {}
+        self.lock = threading.Lock()
+
+    def enable(self):
+        """Start keeping time, and forget all earlier timers"""
+        self.enabled = True
+        self.start = time.perf_counter()
+        self.timers = {}
+
+    def disable(self):
+        """Stop keeping time"""
+        self.enabled = False
+
+    def add(self, name, seconds, items=0):
+        """Add one run of 'seconds' which handled 'items' to the timer 'name'. Timers may
+        be added to from several threads at once, see `vppcfg fleet`."""
+        with self.lock:
+            timer = self.timers.setdefault(
+                name, {"calls": 0, "seconds": 0.0, "items": 0}
+            )
+            timer["calls"] += 1
+            timer["seconds"] += seconds
+            timer["items"] += items
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """A context manager that adds the time spent in it to the timer 'name'"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, func):
+        """A decorator that adds the time spent in 'func' to the timer named after
+        its qualified name, for example Reconciler.__prune_lcps"""
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start)
+
+        return wrapper
+
+    def get_report(self):
+        """Return the timers as a dict, along with the time since enable()"""
+        return {
+            "version": PROFILE_VERSION,
+            "elapsed": time.perf_counter() - self.start if self.start else 0.0,
+            "timers": self.timers,
+        }
+
+    def write_table(self, file):
+        """Write the timers to 'file' as a table, the slowest first. Timers of calls
+        that were in flight at the same time (such as pipelined VPP API calls) may
+        add up to more than the elapsed time."""
+        report = self.get_report()
+        width = max([len(name) for name in self.timers] + [5])
+        print(
+            f"{'timer':<{width}} {'calls':>7} {'items':>8} {'total s':>9} {'mean ms':>9}",
+            file=file,
+        )
+        for name, timer in sorted(
+            self.timers.items(), key=lambda item: item[1]["seconds"], reverse=True
+        ):
+            print(
+                f"{name:<{width}} {timer['calls']:7d} {timer['items']:8d} "
+                f"{timer['seconds']:9.3f} {1000 * timer['seconds'] / timer['calls']:9.3f}",
+                file=file,
+            )
+        print(
+            f"{'elapsed':<{width}} {'':>7} {'':>8} {report['elapsed']:9.3f}", file=file
+        )
+
+    def write_json(self, filename):
+        """Write the timers to the JSON file 'filename', see get_report()"""
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(self.get_report(), file, indent=2)
+            file.write("\n")
+
+
+## The profiler of this process, which all timers add to
+PROFILER = Profiler()
@@ -0,0 +1,101 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for the vppcfg profiler """
+import io
+import os
+import json
+import tempfile
+import unittest
+from vppcfg.profiler import Profiler
+from vppcfg.test_vppcfg import EXAMPLE, run_vppcfg
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler()
+
+    def test_disabled(self):
+        @self.profiler.timed
+        def func(value):
+            return value + 1
+
+        self.assertEqual(2, func(1))
+        with self.profiler.timer("block"):
+            pass
+        self.assertEqual({}, self.profiler.get_report()["timers"])
+        self.assertEqual(0.0, self.profiler.get_report()["elapsed"])
+
+    def test_enabled(self):
+        @self.profiler.timed
+        def func(value):
+            return value + 1
+
+        self.profiler.enable()
+        self.assertEqual(2, func(1))
+        self.assertEqual(3, func(2))
+        with self.profiler.timer("block"):
+            pass
+        self.profiler.add("api.sw_interface_dump", 0.5, 10)
+
+        timers = self.profiler.get_report()["timers"]
+        self.assertEqual(
+            [
+                "TestProfiler.test_enabled.<locals>.func",
+                "block",
+                "api.sw_interface_dump",
+            ],
+            list(timers),
+        )
+        self.assertEqual(2, timers["TestProfiler.test_enabled.<locals>.func"]["calls"])
+        self.assertEqual(1, timers["block"]["calls"])
+        self.assertEqual(
+            {"calls": 1, "seconds": 0.5, "items": 10}, timers["api.sw_interface_dump"]
+        )
+
+        output = io.StringIO()
+        self.profiler.write_table(output)
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("timer"))
+        self.assertTrue(lines[1].startswith("api.sw_interface_dump"))
+        self.assertTrue(lines[-1].startswith("elapsed"))
+
+        ## Enabling again forgets the earlier timers
+        self.profiler.enable()
+        self.assertEqual({}, self.profiler.get_report()["timers"])
+
+    def test_plan_profile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profile = os.path.join(tmpdir, "profile.json")
+            run_vppcfg(
+                "--profile-json",
+                profile,
+                "plan",
+                "--novpp",
+                "-c",
+                EXAMPLE,
+                "-o",
+                os.devnull,
+            )
+            with open(profile, "r", encoding="utf-8") as file:
+                report = json.load(file)
+        for name in [
+            "yamale.validate",
+            "Validator.validate_interfaces",
+            "Reconciler.prune",
+            "Reconciler.__prune_lcps",
+            "Reconciler.__sync_addresses",
+        ]:
+            self.assertEqual(1, report["timers"][name]["calls"])
+        self.assertGreater(report["elapsed"], 0)
@@ -0,0 +1,72 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for the vppcfg startup cost """
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+TOPDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+EXAMPLE = os.path.join(TOPDIR, "vppcfg", "example.yaml")
+
+## Set VPPCFG_STARTUP_BUDGET to a number of seconds to also check that starting the
+## interpreter and running `vppcfg check` on the example config takes no longer than
+## that, to catch heavy imports sneaking back in. Wall clock time varies too much
+## between (loaded) machines to check it by default.
+STARTUP_BUDGET = os.environ.get("VPPCFG_STARTUP_BUDGET")
+
+RUNNER = """
+import json, os, sys, time
+start = time.monotonic()
+sys.path.insert(0, sys.argv[1])
+sys.argv = ["vppcfg"] + sys.argv[2:]
+from vppcfg import vppcfg
+try:
+    vppcfg.main()
+except SystemExit:
+    pass
+print(json.dumps({"elapsed": time.monotonic() - start, "modules": sorted(sys.modules)}))
+"""
+
+
+def run_vppcfg(*args):
+    """Run vppcfg in a fresh interpreter, and return the wall clock time it took and
+    the modules it imported. The tests of other vppcfg commands use this as well."""
+    result = subprocess.run(
+        [sys.executable, "-c", RUNNER, TOPDIR, "--quiet"] + list(args),
+        capture_output=True,
+        check=True,
+        encoding="utf-8",
+    )
+    ret = json.loads(result.stdout.splitlines()[-1])
+    return ret["elapsed"], ret["modules"]
+
+
+class TestStartup(unittest.TestCase):
+    def test_check(self):
+        elapsed, modules = run_vppcfg("check", "-c", EXAMPLE)
+        self.assertNotIn("vpp_papi", modules)
+        self.assertNotIn("vppcfg.vpp.reconciler", modules)
+        self.assertNotIn("vppcfg.vpp.dumper", modules)
+        if STARTUP_BUDGET:
+            self.assertLess(elapsed, float(STARTUP_BUDGET))
+
+    def test_plan_novpp(self):
+        _elapsed, modules = run_vppcfg(
+            "plan", "--novpp", "-c", EXAMPLE, "-o", os.devnull
+        )
+        self.assertIn("vppcfg.vpp.reconciler", modules)
+        self.assertNotIn("vpp_papi", modules)
@@ -16,17 +16,22 @@
 """ This is a unit test suite for vppcfg """
 # pylint: disable=duplicate-code
 import os
+import io
+import contextlib
 import sys
 import glob
+import math
 import re
+import time
 import unittest
-import yaml
+from concurrent.futures import ProcessPoolExecutor
 
 try:
     from vppcfg.config import Validator
 except ModuleNotFoundError:
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
     from vppcfg.config import Validator
+from vppcfg.config import yamlio
 
 try:
     import argparse
@@ -59,7 +64,7 @@ class YAMLTest(unittest.TestCase):
         cfg = None
         ncount = 0
         with open(self.yaml_filename, "r", encoding="utf-8") as file:
-            for data in yaml.load_all(file, Loader=yaml.Loader):
+            for data in yamlio.load_all(file):
                 if ncount == 0:
                     test = data
                     ncount += 1
@@ -114,6 +119,157 @@ class YAMLTest(unittest.TestCase):
         return
 
 
+class ResultStream(io.StringIO):
+    """A stream for unittest results to write to, that is kept in memory so that the
+    output of a worker process can be sent back to the parent process"""
+
+    def writeln(self, arg=None):
+        """Write a line to the stream, like unittest's own stream decorator does"""
+        if arg:
+            self.write(arg)
+        self.write("\n")
+
+
+def run_suite(suite, verbosity):
+    """Run the unittest suite, and return its output and results in a form that can be
+    sent back from a worker process, see report()"""
+    stream = ResultStream()
+    ## The output of failed tests is written to stdout and stderr, which are the
+    ## stream as well, so that it shows up in between the progress of the tests.
+    with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+        result = unittest.TextTestResult(stream, True, verbosity)
+        result.buffer = True
+        result.startTestRun()
+        try:
+            suite(result)
+        finally:
+            result.stopTestRun()
+    return {
+        "output": stream.getvalue(),
+        "run": result.testsRun,
+        "errors": [(result.getDescription(test), err) for test, err in result.errors],
+        "failures": [
+            (result.getDescription(test), err) for test, err in result.failures
+        ],
+        "skipped": len(result.skipped),
+        "expected_failures": len(result.expectedFailures),
+        "unexpected_successes": len(result.unexpectedSuccesses),
+        "ok": result.wasSuccessful(),
+    }
+
+
+def run_tests(kind, names, schema, verbosity):
+    """Run the YAML test files (if 'kind' is 'yaml') or the unit test modules (if 'kind'
+    is 'unit') in the list 'names'. This is the unit of work of a worker process."""
+    if kind == "yaml":
+        suite = unittest.TestSuite(
+            YAMLTest("test_yaml", yaml_filename=fn, yaml_schema=schema) for fn in names
+        )
+    else:
+        if os.path.abspath(".") not in sys.path:
+            sys.path.insert(0, os.path.abspath("."))
+        suite = unittest.TestLoader().loadTestsFromNames(names)
+    return run_suite(suite, verbosity)
+
+
+def report(results, elapsed, verbosity):
+    """Write the merged output of the results of run_suite() to stderr, in the same way
+    that unittest.TextTestRunner does, and return True if all of them were successful"""
+    stream = ResultStream()
+    for result in results:
+        stream.write(result["output"])
+    if verbosity > 0:
+        stream.writeln()
+    for flavour, key in [("ERROR", "errors"), ("FAIL", "failures")]:
+        for result in results:
+            for description, err in result[key]:
+                stream.writeln(unittest.TextTestResult.separator1)
+                stream.writeln(f"{flavour}: {description}")
+                stream.writeln(unittest.TextTestResult.separator2)
+                stream.writeln(err)
+    stream.writeln(unittest.TextTestResult.separator2)
+    run = sum(result["run"] for result in results)
+    stream.writeln(f"Ran {run} test{'s' if run != 1 else ''} in {elapsed:.3f}s")
+    stream.writeln()
+
+    infos = []
+    for key, name in [
+        ("failures", "failures"),
+        ("errors", "errors"),
+        ("skipped", "skipped"),
+        ("expected_failures", "expected failures"),
+        ("unexpected_successes", "unexpected successes"),
+    ]:
+        count = sum(
+            len(result[key]) if isinstance(result[key], list) else result[key]
+            for result in results
+        )
+        if count:
+            infos.append(f"{name}={count}")
+    ok = all(result["ok"] for result in results)
+    stream.write("OK" if ok else "FAILED")
+    stream.writeln(f" ({', '.join(infos)})" if infos else "")
+    sys.stderr.write(stream.getvalue())
+    sys.stderr.flush()
+    return ok
+
+
+def get_test_names(suite):
+    """Return the list of module names of the tests in the unittest suite. Modules that
+    could not be imported are in the suite as a test that fails with the import error,
+    which loading them by name reproduces."""
+    names = []
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            name_list = get_test_names(test)
+        elif type(test).__module__ == "unittest.loader":
+            name_list = [test.id().split("_FailedTest.", 1)[-1]]
+        else:
+            name_list = [type(test).__module__]
+        names.extend(name for name in name_list if name not in names)
+    return names
+
+
+def job_count(value):
+    """An argparse type for the number of worker processes, which is 0 or more"""
+    try:
+        jobs = int(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'") from err
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {jobs}")
+    return jobs
+
+
+def run_parallel(filenames, schema, jobs, verbosity):
+    """Run the YAML test files 'filenames' and the unit test modules across 'jobs' worker
+    processes, and report their merged results. The YAML files are run in chunks,
+    and each unit test module on its own. Returns a tuple of two booleans, which are
+    True if the YAML tests and the unit tests were successful."""
+    chunksize = max(1, math.ceil(len(filenames) / (jobs * 4)))
+    yaml_chunks = [
+        filenames[i : i + chunksize] for i in range(0, len(filenames), chunksize)
+    ]
+    unit_names = get_test_names(
+        unittest.TestLoader().discover(start_dir=".", pattern="test_*.py")
+    )
+
+    start = time.monotonic()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yaml_futures = [
+            pool.submit(run_tests, "yaml", chunk, schema, verbosity)
+            for chunk in yaml_chunks
+        ]
+        unit_futures = [
+            pool.submit(run_tests, "unit", [name], schema, verbosity)
+            for name in unit_names
+        ]
+        yaml_results = [future.result() for future in yaml_futures]
+        yaml_passed = report(yaml_results, time.monotonic() - start, verbosity)
+        unit_results = [future.result() for future in unit_futures]
+    return yaml_passed, report(unit_results, time.monotonic() - start, verbosity)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
     parser.add_argument(
@@ -147,6 +303,14 @@ if __name__ == "__main__":
         action="store_true",
         help="""Be quiet (only log warnings/errors), default False""",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=job_count,
+        default=1,
+        help="""Run the tests in this many processes, 0 for one per CPU, default 1""",
+    )
 
     args = parser.parse_args()
     if args.debug:
@@ -155,24 +319,32 @@ if __name__ == "__main__":
         VERBOSITY = 0
     else:
         VERBOSITY = 1
-    yaml_suite = unittest.TestSuite()
+    yaml_files = []
     for pattern in args.test:
-        for fn in glob.glob(pattern):
+        yaml_files.extend(glob.glob(pattern))
+
+    if args.jobs != 1:
+        yaml_ok, unit_ok = run_parallel(
+            yaml_files, args.schema, args.jobs or os.cpu_count(), VERBOSITY
+        )
+    else:
+        yaml_suite = unittest.TestSuite()
+        for fn in yaml_files:
             yaml_suite.addTest(
                 YAMLTest("test_yaml", yaml_filename=fn, yaml_schema=args.schema)
             )
-    yaml_ok = (
-        unittest.TextTestRunner(verbosity=VERBOSITY, buffer=True)
-        .run(yaml_suite)
-        .wasSuccessful()
-    )
+        yaml_ok = (
+            unittest.TextTestRunner(verbosity=VERBOSITY, buffer=True)
+            .run(yaml_suite)
+            .wasSuccessful()
+        )
 
-    tests = unittest.TestLoader().discover(start_dir=".", pattern="test_*.py")
-    unit_ok = (
-        unittest.TextTestRunner(verbosity=VERBOSITY, buffer=True)
-        .run(tests)
-        .wasSuccessful()
-    )
+        tests = unittest.TestLoader().discover(start_dir=".", pattern="test_*.py")
+        unit_ok = (
+            unittest.TextTestRunner(verbosity=VERBOSITY, buffer=True)
+            .run(tests)
+            .wasSuccessful()
+        )
 
     RETVAL = 0
     if not yaml_ok:
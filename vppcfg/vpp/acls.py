@@ -0,0 +1,135 @@
+#
+# Copyright (c) 2023 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file plan the ACLs of a configuration for the Reconciler: they
+compare the ACLs in the config with those in the VPP config cache, and add the
+operations that make VPP reflect the config to a Plan.
+"""
+import logging
+import ipaddress
+from vppcfg.config import acl
+
+
+def get_tags(vpp):
+    """Returns a dict of the names of the ACLs in the VPP config cache of 'vpp' that
+    vppcfg created, found by their tag, to their acl_index. If more than one ACL has
+    the same tag, the one with the lowest acl_index is returned."""
+    ret = {}
+    for acl_index, vpp_acl in sorted(vpp.cache["acls"].items()):
+        aclname = acl.get_name_by_tag(vpp_acl.tag)
+        if aclname is not None:
+            ret.setdefault(aclname, acl_index)
+    return ret
+
+
+def get_rule(vpp_rule):
+    """Returns the rule of an ACL in VPP in the form of a compiled rule (see
+    config/acl.py get_rules()), so that the two can be compared"""
+    return acl.AclRule(
+        is_permit=int(vpp_rule.is_permit),
+        src_prefix=ipaddress.ip_network(str(vpp_rule.src_prefix), strict=False),
+        dst_prefix=ipaddress.ip_network(str(vpp_rule.dst_prefix), strict=False),
+        proto=int(vpp_rule.proto),
+        srcport_or_icmptype_first=int(vpp_rule.srcport_or_icmptype_first),
+        srcport_or_icmptype_last=int(vpp_rule.srcport_or_icmptype_last),
+        dstport_or_icmpcode_first=int(vpp_rule.dstport_or_icmpcode_first),
+        dstport_or_icmpcode_last=int(vpp_rule.dstport_or_icmpcode_last),
+        tcp_flags_mask=int(vpp_rule.tcp_flags_mask),
+        tcp_flags_value=int(vpp_rule.tcp_flags_value),
+    )
+
+
+def prune(yaml, vpp, plan):
+    """Plan to remove all ACLs from VPP that vppcfg created, whose tag does not refer to
+    an ACL in the config, and those that have the same tag as an ACL with a lower
+    acl_index. ACLs that are applied to an interface are left in place, with a warning.
+    ACLs that vppcfg did not create (including untagged ones) are never removed."""
+    logger = logging.getLogger("vppcfg.reconciler")
+    logger.addHandler(logging.NullHandler())
+
+    acl_names = acl.get_acls(yaml)
+    acl_tags = get_tags(vpp)
+    acls_in_use = set()
+    for iface_acls in vpp.cache["interface_acls"].values():
+        acls_in_use.update(iface_acls.acls)
+
+    for acl_index, vpp_acl in sorted(vpp.cache["acls"].items()):
+        aclname = acl.get_name_by_tag(vpp_acl.tag)
+        if aclname is None:
+            logger.debug(
+                f"ACL {vpp_acl.tag} (index {int(acl_index)}) was not created by vppcfg, not removing it"
+            )
+            continue
+        if aclname in acl_names and acl_tags[aclname] == acl_index:
+            continue
+        if acl_index in acls_in_use:
+            logger.warning(
+                f"ACL {vpp_acl.tag} (index {int(acl_index)}) is applied to an interface, not removing it"
+            )
+            continue
+        plan.add("prune", "delete_acl", acl_index)
+        del vpp.cache["acls"][acl_index]
+    return True
+
+
+def create(yaml, vpp, plan):
+    """Plan to create all ACLs that occur in the config but not in VPP, tagged with
+    their name. Returns False if an ACL has more rules than it may have."""
+    logger = logging.getLogger("vppcfg.reconciler")
+    logger.addHandler(logging.NullHandler())
+
+    ret = True
+    acl_tags = get_tags(vpp)
+    for aclname in acl.get_acls(yaml):
+        if aclname in acl_tags:
+            continue
+        rules = acl.get_rules(yaml, aclname)
+        if rules is None:
+            logger.error(
+                f"ACL {aclname} has more than {acl.get_max_rules(yaml, aclname)} rules"
+            )
+            ret = False
+            continue
+        plan.add("create", "create_acl", aclname, rules)
+    return ret
+
+
+def sync(yaml, vpp, plan):
+    """Plan to replace the rules of the ACLs that occur in both the config and VPP. An
+    ACL is replaced in place, keeping its acl_index, only if the rules it compiles into
+    differ from the ones it has in VPP. Returns False if an ACL has more rules than it
+    may have."""
+    logger = logging.getLogger("vppcfg.reconciler")
+    logger.addHandler(logging.NullHandler())
+
+    ret = True
+    acl_tags = get_tags(vpp)
+    for aclname in acl.get_acls(yaml):
+        if aclname not in acl_tags:
+            continue
+        rules = acl.get_rules(yaml, aclname)
+        if rules is None:
+            logger.error(
+                f"ACL {aclname} has more than {acl.get_max_rules(yaml, aclname)} rules"
+            )
+            ret = False
+            continue
+        vpp_acl = vpp.cache["acls"][acl_tags[aclname]]
+        if len(vpp_acl.r) == len(rules) and all(
+            rule == get_rule(vpp_rule) for rule, vpp_rule in zip(rules, vpp_acl.r)
+        ):
+            continue
+        plan.add("sync", "replace_acl", vpp_acl.acl_index, aclname, rules)
+    return ret
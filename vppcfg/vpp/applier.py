@@ -17,141 +17,579 @@ The functions in this file interact with the VPP API to modify certain
 interface metadata.
 """
 
+import time
+from vppcfg.config import acl
+from vppcfg.config import bondethernet
 from .vppapi import VPPApi
+from .pipeline import VPPApiPipeline
+from .plan import PHASES
+
+## See src/vnet/interface_types.api, src/vnet/l2/l2.api and src/vnet/l2/l2_vtr.h
+IF_STATUS_API_FLAG_ADMIN_UP = 1
+SUB_IF_API_FLAG_ONE_TAG = 2
+SUB_IF_API_FLAG_TWO_TAGS = 4
+SUB_IF_API_FLAG_DOT1AD = 8
+SUB_IF_API_FLAG_EXACT_MATCH = 16
+L2_API_PORT_TYPE_NORMAL = 0
+L2_API_PORT_TYPE_BVI = 1
+VXLAN_INPUT_NEXT_L2_INPUT = 1
+
+## The bridge_flags bit for each of the bridgedomain settings, see src/vnet/l2/l2.api
+BRIDGE_API_FLAGS = {
+    "learn": 1,
+    "unicast-forward": 2,
+    "unicast-flood": 4,
+    "unknown-unicast-flood": 8,
+    "arp-termination": 16,
+    "arp-unicast-forward": 32,
+}
+
+## The tables of the VPP config cache that each operation changes, which are marked
+## stale once it has been applied. Interface tables are only marked stale for the
+## interface that the operation acts upon. Operations that create or delete interfaces
+## keep the cache up to date themselves, see __created() and __deleted().
+OP_CACHE_TABLES = {
+    "set_interface_unnumbered": ["interface_unnumbered"],
+    "set_interface_ip_address": ["interface_addresses"],
+    "set_interface_l2_tag_rewrite": ["interfaces"],
+    "set_interface_l3": ["bridgedomains", "l2xcs"],
+    "delete_bridgedomain": ["bridgedomains"],
+    "bond_remove_member": ["bondethernet_members", "interfaces"],
+    "set_interface_link_mtu": ["interfaces"],
+    "lcp_delete": ["lcps", "interfaces", "taps"],
+    "lcp_create": ["lcps", "interfaces", "interface_acls", "taps"],
+    "set_interface_packet_mtu": ["interfaces"],
+    "set_interface_state": ["interfaces"],
+    "create_bridgedomain": ["bridgedomains"],
+    "set_interface_mac": ["interfaces"],
+    "bond_add_member": ["bondethernet_members", "interfaces"],
+    "set_bridgedomain_settings": ["bridgedomains"],
+    "set_interface_l2_bridge_bvi": ["bridgedomains", "l2xcs"],
+    "set_interface_l2_bridge": ["bridgedomains", "l2xcs"],
+    "set_interface_l2xc": ["l2xcs", "bridgedomains"],
+    "set_sflow": ["sflow"],
+    "set_interface_sflow": ["interface_sflow"],
+    "delete_acl": ["acls"],
+    "create_acl": ["acls"],
+    "replace_acl": ["acls"],
+    "set_interface_mpls": ["interface_mpls"],
+}
 
 
 class Applier(VPPApi):
     """The methods in the Applier class modify the running state in the VPP dataplane
     and will ensure that the local cache is consistent after creations and
-    modifications."""
+    modifications.
 
-    # pylint: disable=unnecessary-pass
+    API calls are not waited for one by one: each method submits its request to a
+    VPPApiPipeline and returns, and replies are collected as they arrive. The only
+    time the Applier waits for VPP, is when a request refers to an interface that is
+    still being created, because its sw_if_index is only known once VPP replies."""
+
+    # pylint: disable=too-many-public-methods
 
     def __init__(
         self,
         vpp_api_socket="/run/vpp/api.sock",
         vpp_json_dir=None,
         clientname="vppcfg",
+        window=256,
     ):
         VPPApi.__init__(self, vpp_api_socket, vpp_json_dir, clientname)
         self.logger.info("VPP Applier: changing the dataplane is enabled")
+        self.window = window
+        self.pipeline = None
+        self.op = None
+        self.failed = None
+        self.creating = set()
+
+    def apply(self, plan):
+        """Apply the prune, create and sync phases of the Plan made by the Reconciler
+        to the VPP Dataplane. The phases are applied in order, and each phase stops at
+        the first operation that VPP rejects. Returns True if all operations were
+        applied."""
+        if not self.cache_read and not self.readconfig():
+            self.logger.error("Could not read the VPP configuration")
+            return False
+
+        for phase in PHASES:
+            if not self.apply_phase(phase, plan[phase]):
+                self.logger.error(f"Could not apply the {phase} phase")
+                return False
+        return True
+
+    def apply_phase(self, phase, ops):
+        """Apply a list of planned operations to the VPP Dataplane, keeping up to
+        'window' requests in flight. Each operation is carried out by the Applier
+        method of the same name. Returns False upon the first operation that could not
+        be applied, or that VPP returned an error for, and True otherwise."""
+        start = time.monotonic()
+        self.pipeline = VPPApiPipeline(self.vpp, window=self.window)
+        self.failed = None
+        self.creating = set()
+
+        for op in ops:
+            self.op = op
+            if not getattr(self, op.op)(*op.args) and not self.failed:
+                self.failed = f"{op}: could not be applied"
+            self.__cache_stale_op(op)
+            if self.failed:
+                break
+        if not self.pipeline.flush() and not self.failed:
+            self.failed = "VPP stopped answering"
+        self.creating = set()
+
+        if self.failed:
+            self.logger.error(f"Failed to apply {phase}: {self.failed}")
+            return False
+        self.logger.info(
+            f"Applied {len(ops)} {phase} operation(s) in {time.monotonic() - start:.3f}s"
+        )
+        return True
+
+    def comment(self, text):
+        """Comments are rendered in the CLI output for the operator, but have no
+        effect on the dataplane"""
+        self.logger.debug(f"Skipping comment: {text}")
+        return True
+
+    def __cache_stale_op(self, op):
+        """Mark the tables of the VPP config cache that the operation changes as stale.
+        The LCP operations create or delete the host interface, which is not known by
+        name, so they mark all interfaces as stale. Interfaces that are still being
+        created are marked stale by __created() once VPP replies."""
+        sw_if_index = None
+        if op.ifname and not op.op.startswith("lcp_"):
+            sw_if_index = self.cache["interface_names"].get(op.ifname)
+        for table in OP_CACHE_TABLES.get(op.op, []):
+            if table not in ["interfaces", "interface_addresses"]:
+                self.cache_stale_add(table)
+            elif sw_if_index is not None:
+                self.cache_stale_add(table, sw_if_index)
+            elif op.ifname not in self.creating:
+                self.cache_stale_add(table)
+
+    def __submit(self, msgname, on_success=None, **kwargs):
+        """Submit an API request to the pipeline. When VPP replies with retval 0, the
+        'on_success' function is called with the reply. Otherwise the current phase is
+        marked as failed, by the operation that submitted the request."""
+        op = self.op
+
+        def callback(reply, _details):
+            if reply is not None and reply.retval != 0:
+                if not self.failed:
+                    self.failed = f"{op}: {msgname} returned {reply.retval}"
+                return
+            if on_success:
+                on_success(reply)
+
+        try:
+            if self.pipeline.submit(msgname, callback=callback, **kwargs) is None:
+                self.failed = "VPP stopped answering"
+                return False
+        except AttributeError as err:
+            self.logger.error(f"Cannot apply {op}: {err}")
+            return False
+        return True
+
+    def __sw_if_index(self, ifname):
+        """Return the sw_if_index of the interface given by name, waiting for VPP to
+        reply if the interface is still being created. Returns None if the interface
+        does not exist."""
+        if ifname in self.creating:
+            self.logger.debug(f"Waiting for {ifname} to be created")
+            if not self.pipeline.flush():
+                self.failed = "VPP stopped answering"
+                return None
+            self.creating = set()
+        try:
+            return self.cache["interface_names"][ifname]
+        except KeyError:
+            pass
+        self.logger.error(f"Interface {ifname} does not exist in VPP")
+        return None
+
+    def __created(self, ifname):
+        """Mark the interface given by name as being created, and return a function
+        that adds it to the config cache once VPP replies with its sw_if_index"""
+        self.creating.add(ifname)
+
+        def on_success(reply):
+            self.cache["interface_names"][ifname] = reply.sw_if_index
+            self.cache["interface_addresses"][reply.sw_if_index] = []
+            self.cache_interface_created(reply.sw_if_index)
+
+        return on_success
+
+    def __deleted(self, ifname):
+        """Return a function that removes the interface given by name from the config
+        cache once VPP has deleted it"""
+
+        def on_success(_reply):
+            sw_if_index = self.cache["interface_names"].pop(ifname, None)
+            if sw_if_index is not None:
+                self.cache_interface_deleted(sw_if_index)
+
+        return on_success
 
     def set_interface_ip_address(self, ifname, address, is_set=True):
         """Add (if_set=True) or remove (if_set=False) an IPv4 or IPv6 address including
         prefixlen (ie 192.0.2.0/24 or 2001:db8::1/64) to an interface given by name
         (ie GigabitEthernet3/0/0)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_add_del_address",
+            sw_if_index=sw_if_index,
+            is_add=is_set,
+            prefix=address,
+        )
+
+    def set_interface_unnumbered(self, ifname, target_ifname=None, is_add=True):
+        """Make the interface given by name (ie loop0.100) unnumbered, using the
+        addresses of target_ifname (ie loop0). If is_add is False, remove the unnumbered
+        use of the interface, and target_ifname is taken from the config cache."""
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        if target_ifname:
+            target_sw_if_index = self.__sw_if_index(target_ifname)
+        else:
+            target_sw_if_index = self.cache["interface_unnumbered"].get(sw_if_index)
+        if target_sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_set_unnumbered",
+            sw_if_index=target_sw_if_index,
+            unnumbered_sw_if_index=sw_if_index,
+            is_add=is_add,
+        )
 
     def delete_loopback(self, ifname):
         """Delete a loopback identified by name (ie loop0)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "delete_loopback", self.__deleted(ifname), sw_if_index=sw_if_index
+        )
 
     def delete_subinterface(self, ifname):
         """Delete a sub-int identified by name (ie GigabitEthernet3/0/0.100)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "delete_subif", self.__deleted(ifname), sw_if_index=sw_if_index
+        )
 
     def set_interface_l2_tag_rewrite(
-        self, ifname, vtr_op, vtr_push_dot1q, vtr_tag1, vtr_tag2
+        self, ifname, vtr_op, vtr_push_dot1q=0, vtr_tag1=0, vtr_tag2=0
     ):
         """Set l2 tag rewrite on an interface identified by name (ie GigabitEthernet3/0/0.100)
-        into a certain operational mode. TODO(pim) clarify the vtr_* arguments."""
-        ## somewhere in interface.api see vtr_* fields
-        pass
+        into a certain operational mode. The vtr_op is one of the L2_VTR_* operations,
+        and vtr_push_dot1q/vtr_tag1/vtr_tag2 are only used by the push/translate ones.
+        """
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "l2_interface_vlan_tag_rewrite",
+            sw_if_index=sw_if_index,
+            vtr_op=vtr_op,
+            push_dot1q=vtr_push_dot1q,
+            tag1=vtr_tag1,
+            tag2=vtr_tag2,
+        )
 
     def set_interface_l3(self, ifname):
         """Set an interface or sub-interface identified by name (ie GigabitEthernet3/0/0)
         to L3 mode, removing it from bridges and l2xcs"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_set_l2_bridge",
+            rx_sw_if_index=sw_if_index,
+            bd_id=0,
+            port_type=L2_API_PORT_TYPE_NORMAL,
+            enable=False,
+        )
 
     def delete_bridgedomain(self, bd_id):
         """Delete a bridgedomain given by instance bd_id (ie 100). Cannot delete instance==0."""
-        pass
+        return self.__submit("bridge_domain_add_del", bd_id=bd_id, is_add=False)
 
     def delete_tap(self, ifname):
         """Delete a tap identified by name (ie tap100)"""
-        pass
-
-    def bond_remove_member(self, bondname, membername):
-        """Remove a member interface given by name (ie GigabitEthernet3/0/0) from a bondethernet
-        interface given by name (ie BondEthernet0)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "tap_delete_v2", self.__deleted(ifname), sw_if_index=sw_if_index
+        )
+
+    def bond_remove_member(self, membername):
+        """Remove a member interface given by name (ie GigabitEthernet3/0/0) from the
+        bondethernet it is a member of"""
+        sw_if_index = self.__sw_if_index(membername)
+        if sw_if_index is None:
+            return False
+        return self.__submit("bond_detach_member", sw_if_index=sw_if_index)
 
     def delete_bond(self, ifname):
         """Delete a bondethernet identified by name (ie BondEthernet0)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "bond_delete", self.__deleted(ifname), sw_if_index=sw_if_index
+        )
 
     def create_vxlan_tunnel(self, instance, config, is_create=True):
         """'config' is the YAML configuration for the vxlan_tunnels: entry"""
-        pass
+        ifname = f"vxlan_tunnel{int(instance)}"
+        if is_create:
+            on_success = self.__created(ifname)
+        else:
+            on_success = self.__deleted(ifname)
+        return self.__submit(
+            "vxlan_add_del_tunnel_v3",
+            on_success,
+            is_add=is_create,
+            instance=int(instance),
+            src_address=config["local"],
+            dst_address=config["remote"],
+            vni=int(config["vni"]),
+            mcast_sw_if_index=0xFFFFFFFF,
+            decap_next_index=VXLAN_INPUT_NEXT_L2_INPUT,
+        )
 
     def set_interface_link_mtu(self, ifname, link_mtu):
         """Set the max frame size of an interface given by name to the link_mtu value (typically
         1500, 9000, 9216"""
-
-        pass
-
-    def lcp_delete(self, lcpname):
-        """Delete a linux control plane interface pair by name (ie 'xe0' or 'be10')"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "hw_interface_set_mtu", sw_if_index=sw_if_index, mtu=int(link_mtu)
+        )
+
+    def lcp_delete(self, ifname):
+        """Delete the linux control plane interface pair of an interface given by name
+        (ie GigabitEthernet3/0/0)"""
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "lcp_itf_pair_add_del", is_add=False, sw_if_index=sw_if_index
+        )
 
     def set_interface_packet_mtu(self, ifname, packet_mtu):
         """Set the L3 MTU of an interface given by name (ie GigabitEthernet3/0/0)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_set_mtu",
+            sw_if_index=sw_if_index,
+            mtu=[int(packet_mtu), 0, 0, 0],
+        )
 
     def set_interface_state(self, ifname, state):
         """Set the admin link state (True is up, False is down) of an interface given
         by name (ie GigabitEthernet3/0/0)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        flags = 0
+        if state:
+            flags = IF_STATUS_API_FLAG_ADMIN_UP
+        return self.__submit(
+            "sw_interface_set_flags", sw_if_index=sw_if_index, flags=flags
+        )
 
     def create_loopback_interface(self, instance, config):
         """'config' is the YAML configuration for the loopbacks: entry"""
-        pass
+        kwargs = {}
+        if "mac" in config:
+            kwargs["mac_address"] = config["mac"]
+        return self.__submit(
+            "create_loopback_instance",
+            self.__created(f"loop{int(instance)}"),
+            is_specified=True,
+            user_instance=int(instance),
+            **kwargs,
+        )
 
     def create_bond(self, instance, config):
         """'config' is the YAML configuration for the bondethernets: entry"""
-        pass
+        kwargs = {}
+        if "mac" in config:
+            kwargs["use_custom_mac"] = True
+            kwargs["mac_address"] = config["mac"]
+        if "load-balance" in config:
+            kwargs["lb"] = bondethernet.lb_to_int(config["load-balance"])
+        return self.__submit(
+            "bond_create2",
+            self.__created(f"BondEthernet{int(instance)}"),
+            id=int(instance),
+            mode=bondethernet.mode_to_int(config.get("mode", "lacp")),
+            **kwargs,
+        )
 
     def create_subinterface(self, parent_ifname, sub_id, config):
         """'config' is the YAML configuration for the sub-interfaces: entry"""
-        pass
+        sw_if_index = self.__sw_if_index(parent_ifname)
+        if sw_if_index is None:
+            return False
+        encap = config["encapsulation"]
+        flags = SUB_IF_API_FLAG_ONE_TAG
+        outer = encap["dot1q"]
+        if encap["dot1ad"] > 0:
+            flags |= SUB_IF_API_FLAG_DOT1AD
+            outer = encap["dot1ad"]
+        if encap["inner-dot1q"] > 0:
+            flags = (flags & ~SUB_IF_API_FLAG_ONE_TAG) | SUB_IF_API_FLAG_TWO_TAGS
+        if encap["exact-match"]:
+            flags |= SUB_IF_API_FLAG_EXACT_MATCH
+        return self.__submit(
+            "create_subif",
+            self.__created(f"{parent_ifname}.{int(sub_id)}"),
+            sw_if_index=sw_if_index,
+            sub_id=int(sub_id),
+            sub_if_flags=flags,
+            outer_vlan_id=int(outer),
+            inner_vlan_id=int(encap["inner-dot1q"]),
+        )
 
     def create_tap(self, instance, config):
         """'config' is the YAML configuration for the taps: entry"""
-        pass
+        host = config["host"]
+        kwargs = {"host_if_name_set": True, "host_if_name": host["name"]}
+        if "mac" in host:
+            kwargs["host_mac_addr_set"] = True
+            kwargs["host_mac_addr"] = host["mac"]
+        if "namespace" in host:
+            kwargs["host_namespace_set"] = True
+            kwargs["host_namespace"] = str(host["namespace"])
+        if "bridge" in host:
+            kwargs["host_bridge_set"] = True
+            kwargs["host_bridge"] = host["bridge"]
+        if "mtu" in host:
+            kwargs["host_mtu_set"] = True
+            kwargs["host_mtu_size"] = int(host["mtu"])
+        if "rx-ring-size" in config:
+            kwargs["rx_ring_sz"] = int(config["rx-ring-size"])
+        if "tx-ring-size" in config:
+            kwargs["tx_ring_sz"] = int(config["tx-ring-size"])
+        return self.__submit(
+            "tap_create_v3",
+            self.__created(f"tap{int(instance)}"),
+            id=int(instance),
+            use_random_mac=True,
+            **kwargs,
+        )
 
     def create_bridgedomain(self, bd_id, config):
         """'config' is the YAML configuration for the bridgedomains: entry"""
-        pass
+        settings = config["settings"]
+        return self.__submit(
+            "bridge_domain_add_del",
+            bd_id=int(bd_id),
+            is_add=True,
+            learn=settings["learn"],
+            forward=settings["unicast-forward"],
+            flood=settings["unicast-flood"],
+            uu_flood=settings["unknown-unicast-flood"],
+            arp_term=settings["arp-termination"],
+            arp_ufwd=settings["arp-unicast-forward"],
+            mac_age=int(settings["mac-age-minutes"]),
+        )
 
     def lcp_create(self, ifname, host_if_name):
         """Create a linux control plane interface pair for an interface given by name
         (ie GigabitEthernet3/0/0) under a Linux TAP device name host_if_name (ie e3-0-0)
         """
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "lcp_itf_pair_add_del",
+            is_add=True,
+            sw_if_index=sw_if_index,
+            host_if_name=host_if_name,
+        )
 
     def set_interface_mac(self, ifname, mac):
         """Set the MAC address of interface given by name (ie GigabitEthernet3/0/0), the
         MAC is of form aa:bb:cc:dd:ee:ff"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_set_mac_address", sw_if_index=sw_if_index, mac_address=mac
+        )
 
     def bond_add_member(self, bondname, membername):
         """Add a member interface given by name (ie GigabitEthernet3/0/0) to a bondethernet
         given by name (ie BondEthernet0)"""
-        pass
-
-    def sync_bridgedomain(self, bd_id, config):
-        """'config' is the YAML configuration for the bridgedomains: entry"""
-        pass
+        bond_sw_if_index = self.__sw_if_index(bondname)
+        sw_if_index = self.__sw_if_index(membername)
+        if bond_sw_if_index is None or sw_if_index is None:
+            return False
+        return self.__submit(
+            "bond_add_member",
+            sw_if_index=sw_if_index,
+            bond_sw_if_index=bond_sw_if_index,
+        )
+
+    def set_bridgedomain_settings(self, bd_id, settings):
+        """Change the bridgedomain settings given as a dict of name to value, using the
+        names of the YAML configuration for the bridgedomains: settings entry"""
+        ret = True
+        for key, value in settings.items():
+            if key == "mac-age-minutes":
+                ret &= self.__submit(
+                    "bridge_domain_set_mac_age", bd_id=int(bd_id), mac_age=int(value)
+                )
+            else:
+                ret &= self.__submit(
+                    "bridge_flags",
+                    bd_id=int(bd_id),
+                    is_set=bool(value),
+                    flags=BRIDGE_API_FLAGS[key],
+                )
+        return ret
 
     def set_interface_l2_bridge_bvi(self, bd_id, ifname):
         """Set a loopback / BVI interface given by name (ie 'loop100') as a BVI of a bridge
         domain identified by bd_id (ie 100)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_set_l2_bridge",
+            rx_sw_if_index=sw_if_index,
+            bd_id=int(bd_id),
+            port_type=L2_API_PORT_TYPE_BVI,
+            enable=True,
+        )
 
     def set_interface_l2_bridge(self, bd_id, ifname):
         """Set an interface given by name (ie 'GigabitEthernet3/0/0') into a bridge
         domain identified by bd_id (ie 100)"""
-        pass
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_set_l2_bridge",
+            rx_sw_if_index=sw_if_index,
+            bd_id=int(bd_id),
+            port_type=L2_API_PORT_TYPE_NORMAL,
+            enable=True,
+        )
 
     def set_interface_l2xc(self, rx_ifname, tx_ifname):
         """Cross connect the rx_ifname (ie GigabitEthernet3/0/0) to emit into the tx_ifname
@@ -159,4 +597,72 @@ class Applier(VPPApi):
         for the a->b crossconnect, and again for the b->a crossconnect. Note that
         crossconnecting sub-interfaces requires as well L2 rewriting (pop N for the amount
         of tags on the source interface)"""
-        pass
+        rx_sw_if_index = self.__sw_if_index(rx_ifname)
+        tx_sw_if_index = self.__sw_if_index(tx_ifname)
+        if rx_sw_if_index is None or tx_sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_set_l2_xconnect",
+            rx_sw_if_index=rx_sw_if_index,
+            tx_sw_if_index=tx_sw_if_index,
+            enable=True,
+        )
+
+    def set_sflow(self, settings):
+        """Change the sFlow settings given as a dict of name to value, using the names
+        of the YAML configuration for the sflow: entry"""
+        ret = True
+        if "header-bytes" in settings:
+            ret &= self.__submit(
+                "sflow_header_bytes_set", header_B=int(settings["header-bytes"])
+            )
+        if "polling-interval" in settings:
+            ret &= self.__submit(
+                "sflow_polling_interval_set",
+                polling_S=int(settings["polling-interval"]),
+            )
+        if "sampling-rate" in settings:
+            ret &= self.__submit(
+                "sflow_sampling_rate_set", sampling_N=int(settings["sampling-rate"])
+            )
+        return ret
+
+    def set_interface_sflow(self, ifname, enable):
+        """Enable (enable=True) or disable (enable=False) sFlow sampling on a PHY given
+        by name (ie GigabitEthernet3/0/0)"""
+        hw_if_index = self.__sw_if_index(ifname)
+        if hw_if_index is None:
+            return False
+        return self.__submit(
+            "sflow_enable_disable", hw_if_index=hw_if_index, enable_disable=enable
+        )
+
+    def delete_acl(self, acl_index):
+        """Delete the ACL given by its index"""
+        return self.__submit("acl_del", acl_index=int(acl_index))
+
+    def create_acl(self, aclname, rules):
+        """Create an ACL tagged with its name (see config/acl.py get_tag()), holding the list of rules it compiles
+        into (see config/acl.py get_rules())"""
+        return self.replace_acl(0xFFFFFFFF, aclname, rules)
+
+    def replace_acl(self, acl_index, aclname, rules):
+        """Replace the rules of the ACL given by its index with the list of rules that
+        the ACL by name compiles into. With an acl_index of ~0, a new ACL is created."""
+        return self.__submit(
+            "acl_add_replace",
+            acl_index=int(acl_index),
+            tag=acl.get_tag(aclname),
+            count=len(rules),
+            r=[rule._asdict() for rule in rules],
+        )
+
+    def set_interface_mpls(self, ifname, enable):
+        """Enable (enable=True) or disable (enable=False) MPLS on an interface given by
+        name (ie GigabitEthernet3/0/0)"""
+        sw_if_index = self.__sw_if_index(ifname)
+        if sw_if_index is None:
+            return False
+        return self.__submit(
+            "sw_interface_set_mpls_enable", sw_if_index=sw_if_index, enable=enable
+        )
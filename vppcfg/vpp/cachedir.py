@@ -0,0 +1,48 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file find a writable directory for vppcfg to keep its
+on-disk caches in.
+"""
+
+import os
+import logging
+
+CACHE_DIRS = [
+    "/var/cache/vppcfg",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "vppcfg"
+    ),
+]
+
+
+def get_cache_dir(subdir=None):
+    """Return the first of CACHE_DIRS (with subdir appended, if given) that exists or
+    can be created, and that is writable. Returns None if no such directory can be
+    found, in which case callers should carry on without an on-disk cache."""
+    logger = logging.getLogger("vppcfg.cachedir")
+    logger.addHandler(logging.NullHandler())
+
+    for cache_dir in CACHE_DIRS:
+        if subdir:
+            cache_dir = os.path.join(cache_dir, subdir)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            continue
+        if os.access(cache_dir, os.W_OK | os.X_OK):
+            return cache_dir
+    logger.debug(f"No writable cache directory found in {CACHE_DIRS}")
+    return None
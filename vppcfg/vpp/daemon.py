@@ -0,0 +1,309 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file keep a VPP Dataplane in sync with a YAML configuration
+file, by watching the file for changes and reconciling the dataplane each time it
+changes.
+"""
+import os
+import ctypes
+import ctypes.util
+import logging
+import select
+import struct
+import time
+from vppcfg.config import Validator
+from vppcfg.config import yamlio
+from vppcfg.config.index import IndexedConfig
+from .applier import Applier
+from .reconciler import Reconciler
+from .plan import PHASES
+from . import events
+
+## See inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """The FileWatcher class waits for a file to change. It watches the directory that
+    holds the file using inotify, so that it also notices editors and configuration
+    management tools that replace the file by renaming a new one over it. If inotify is
+    not available, the file is polled for changes instead."""
+
+    def __init__(self, filename, settle=0.1, interval=1.0):
+        self.logger = logging.getLogger("vppcfg.daemon")
+        self.logger.addHandler(logging.NullHandler())
+
+        self.filename = os.path.abspath(filename)
+        self.dirname, self.basename = os.path.split(self.filename)
+        self.settle = settle
+        self.interval = interval
+        self.fd = None
+        self.stat = self.__stat()
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+            mask |= IN_DELETE_SELF | IN_MOVE_SELF
+            if libc.inotify_add_watch(fd, self.dirname.encode(), mask) < 0:
+                err = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(err, f"Cannot watch {self.dirname}")
+            self.fd = fd
+            self.logger.debug(f"Watching {self.filename} with inotify")
+        except (AttributeError, OSError) as err:
+            self.logger.warning(
+                f"Polling {self.filename} every {interval}s, inotify is not available: {err}"
+            )
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Stop watching the file"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __stat(self):
+        """Returns what identifies the current contents of the file, or None if it does
+        not exist"""
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def __read_events(self):
+        """Read the pending inotify events, and return a tuple of two booleans: whether
+        the file has changed, and whether the directory can still be watched"""
+        changed, watching = False, True
+        try:
+            buf = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed, watching
+        offset = 0
+        while offset < len(buf):
+            _wd, mask, _cookie, length = INOTIFY_EVENT.unpack_from(buf, offset)
+            offset += INOTIFY_EVENT.size
+            name = buf[offset : offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                watching = False
+            elif name == self.basename:
+                changed = True
+        return changed, watching
+
+    def wait(self, timeout=None):
+        """Block until the file has changed, and return True. Changes that follow each
+        other within 'settle' seconds are returned as one. Returns False if the file can
+        no longer be watched, for example because its directory was removed. If a
+        timeout (in seconds) is given, returns None once it has passed without the
+        file having changed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self.fd is None:
+            while deadline is None or time.monotonic() < deadline:
+                time.sleep(self.interval)
+                stat = self.__stat()
+                if stat != self.stat:
+                    self.stat = stat
+                    return True
+            return None
+
+        changed = False
+        while True:
+            if changed:
+                timeout = self.settle
+            elif deadline is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+            readable, _, _ = select.select([self.fd], [], [], timeout)
+            if not readable:
+                return True if changed else None
+            event, watching = self.__read_events()
+            if not watching:
+                self.logger.error(f"Cannot watch {self.dirname} anymore")
+                return False
+            if event:
+                changed = True
+
+
+class Daemon:
+    """The Daemon class keeps a VPP Dataplane in sync with a YAML configuration file.
+    Unlike `vppcfg apply`, which starts from scratch every time it runs, the daemon
+    keeps its connection to VPP, the VPP API message table, the compiled schema and the
+    VPP config cache, so that a change to the configuration file only costs planning
+    and applying the changes themselves. Once a configuration has been applied, only
+    the objects that changed since then are planned.
+
+    Changes made to the dataplane by others are only partly seen by the VPP config
+    cache (see events.py), so every 'resync' seconds the cache is read afresh as a
+    whole and the full configuration is planned against it, which corrects them.
+    A 'resync' of 0 turns this off."""
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        config,
+        schema=None,
+        force=False,
+        vpp_api_socket="/run/vpp/api.sock",
+        vpp_json_dir=None,
+        resync=300,
+    ):
+        self.logger = logging.getLogger("vppcfg.daemon")
+        self.logger.addHandler(logging.NullHandler())
+
+        self.config = config
+        self.force = force
+        self.validator = Validator(schema=schema)
+        self.applier = Applier(vpp_api_socket, vpp_json_dir)
+        self.watcher = None
+        self.resync = resync
+
+        ## The configuration that was last applied successfully, or None if the
+        ## dataplane is not known to reflect any configuration.
+        self.applied = None
+
+    def run(self):
+        """Reconcile the dataplane with the configuration file, and then again each time
+        the file changes, and in full every 'resync' seconds. Returns False if the file
+        can no longer be watched."""
+        self.watcher = FileWatcher(self.config)
+        self.logger.info(f"Watching configfile {self.config}")
+        self.reconcile()
+        while True:
+            changed = self.watcher.wait(timeout=self.resync or None)
+            if changed is False:
+                return False
+            if changed:
+                self.logger.info(f"Configfile {self.config} changed")
+                self.reconcile()
+            else:
+                self.logger.info("Resynchronizing the dataplane with the configuration")
+                self.reconcile(full=True)
+
+    def load(self):
+        """Read and validate the configuration file. Returns the configuration, or None
+        if it could not be read or is not valid."""
+        try:
+            with open(self.config, "r", encoding="utf-8") as file:
+                cfg = yamlio.load(file)
+        except (OSError, yamlio.YAMLError) as err:
+            self.logger.error(f"Couldn't read config from {self.config}: {err}")
+            return None
+
+        ## The index that is built while validating, is used again while planning.
+        cfg = IndexedConfig(cfg or {})
+        if not self.validator.valid_config(cfg):
+            self.logger.error("Configuration is not valid, not applying it")
+            return None
+        return cfg
+
+    def plan(self, cfg, prev_cfg=None):
+        """Plan the changes from the VPP config cache to the given configuration. The
+        Reconciler changes the cache while it plans, so it is given a copy of the cache.
+        If the dataplane reflects 'prev_cfg', only what changed since is planned.
+        Returns the Plan, or None if planning failed."""
+        reconciler = Reconciler(cfg, vpp=self.applier.cache_clone(), prev_cfg=prev_cfg)
+        if not reconciler.phys_exist_in_vpp():
+            self.logger.error("Not all PHYs in the config exist in VPP")
+            return None
+        if not reconciler.phys_exist_in_config():
+            self.logger.error("Not all PHYs in VPP exist in the config")
+            return None
+        if not reconciler.lcps_exist_with_lcp_enabled():
+            self.logger.error(
+                "Linux Control Plane is needed, but linux-cp API is not available"
+            )
+            return None
+
+        failed = False
+        for phase in PHASES:
+            if getattr(reconciler, phase)():
+                continue
+            if not self.force:
+                self.logger.error(f"Planning {phase} failure")
+                return None
+            failed = True
+            self.logger.warning(f"Planning {phase} failure, continuing due to --force")
+        if failed:
+            self.logger.error("Planning failed")
+            return None
+        return reconciler.plan
+
+    def reconcile(self, full=False):
+        """Make the dataplane reflect the configuration file. Returns True upon success,
+        and False if the configuration could not be loaded, planned or applied, in which
+        case the dataplane is left as it is (or was partially applied). If 'full' is set,
+        the VPP config cache is read afresh as a whole, and all objects are planned, so
+        that changes made to the dataplane by others are corrected as well."""
+        start = time.monotonic()
+        cfg = self.load()
+        if cfg is None:
+            return False
+
+        ## Until this reconcile succeeds, the dataplane is not known to reflect any
+        ## configuration, so the next one plans all objects.
+        applied, self.applied = self.applied, None
+        if full:
+            applied = None
+            self.applier.cache_clear()
+
+        ## Interface events keep the cache up to date with changes made by others. They
+        ## are asked for before the cache is read as a whole, so that none are missed.
+        if not self.applier.cache_read and self.applier.cache_events is None:
+            events.enable(self.applier)
+        if not self.applier.cache_refresh():
+            self.logger.error("Could not read the VPP configuration")
+            self.applier.disconnect()
+            return False
+
+        plan = self.plan(cfg, applied)
+        if plan is None:
+            return False
+        if len(plan) == 0:
+            if applied is None:
+                self.logger.info("Dataplane already reflects the configuration")
+            else:
+                self.logger.info("Configuration has no changes to apply")
+            self.applied = cfg
+            return True
+
+        ret = self.applier.apply(plan)
+
+        ## The Applier marks what it changed as stale, which is read afresh right away,
+        ## to be ready for the next change.
+        if not self.applier.cache_refresh():
+            self.logger.error("Could not read the VPP configuration")
+            self.applier.disconnect()
+            return False
+
+        if not ret:
+            self.logger.error("Applying failed")
+            return False
+        self.logger.info(
+            f"Applied {len(plan)} operation(s) in {time.monotonic() - start:.3f}s"
+        )
+        self.applied = cfg
+        return True
@@ -18,8 +18,8 @@ interface metadata and write it to a YAML file.
 """
 
 import sys
-import yaml
 from vppcfg.config import bondethernet
+from vppcfg.config import yamlio
 from .vppapi import VPPApi
 
 
@@ -49,7 +49,7 @@ class Dumper(VPPApi):
 
         config = self.cache_to_config()
 
-        print(yaml.dump(config), file=file)
+        print(yamlio.dump(config), file=file)
 
         if file is not sys.stdout:
             file.close()
@@ -0,0 +1,81 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file keep the VPP config cache of a VPPApi up to date with the
+interface events that VPP sends, so that it need not be read afresh as a whole.
+"""
+import os
+import logging
+from collections import deque
+
+
+def enable(vpp):
+    """Ask VPP to send interface events to the VPPApi 'vpp', which tell about interfaces
+    being created and deleted, and about changes to their admin and link state. The
+    events are queued in its 'cache_events', and applied to its VPP config cache in
+    place by VPPApi.cache_refresh(). Returns False if VPP cannot send them, in which
+    case cache_refresh() reads all interfaces afresh instead."""
+    logger = logging.getLogger("vppcfg.events")
+    logger.addHandler(logging.NullHandler())
+
+    def callback(msgname, msg):
+        ## vpp_papi calls this from its own thread for each event VPP sends
+        if vpp.cache_events is not None:
+            vpp.cache_events.append((msgname, msg))
+
+    # pylint: disable=no-member
+    if not vpp.connected and not vpp.connect():
+        return False
+    vpp.cache_events = deque()
+    vpp.vpp.register_event_callback(callback)
+    try:
+        reply = vpp.vpp.api.want_interface_events(enable_disable=True, pid=os.getpid())
+    except AttributeError as err:
+        logger.warning(f"Interface events not available: {err}")
+        vpp.cache_events = None
+        return False
+    if reply.retval != 0:
+        logger.warning(f"Interface events not available: {reply.retval}")
+        vpp.cache_events = None
+        return False
+    logger.debug("Receiving interface events")
+    return True
+
+
+def apply(vpp):
+    """Apply the events that VPP sent since the last time to the VPP config cache of the
+    VPPApi 'vpp'. Changes in admin or link state are applied in place. Interfaces that
+    are deleted are removed from the cache, and interfaces that are not in the cache
+    yet are marked stale, to be read by VPPApi.cache_refresh()."""
+    logger = logging.getLogger("vppcfg.events")
+    logger.addHandler(logging.NullHandler())
+
+    count = 0
+    while vpp.cache_events:
+        msgname, event = vpp.cache_events.popleft()
+        if msgname != "sw_interface_event":
+            continue
+        count += 1
+        iface = vpp.cache["interfaces"].get(event.sw_if_index)
+        if event.deleted:
+            vpp.cache_interface_deleted(event.sw_if_index)
+        elif not iface:
+            vpp.cache_interface_created(event.sw_if_index)
+        else:
+            vpp.cache["interfaces"][event.sw_if_index] = iface._replace(
+                flags=event.flags
+            )
+    if count:
+        logger.debug(f"Applied {count} interface event(s)")
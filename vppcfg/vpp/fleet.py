@@ -0,0 +1,367 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file plan (and optionally apply) the configurations of many VPP
+Dataplanes at once, each with its own YAML configuration file and VPP API socket, as
+listed in a fleet manifest.
+"""
+import os
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from vppcfg.config import Validator
+from vppcfg.config import yamlio
+from vppcfg.config.index import IndexedConfig
+from .applier import Applier
+from .reconciler import Reconciler
+from .vppapi import VPPApi
+from . import snapshot
+from .synthetic import synthesize
+from .plan import PHASES
+
+SUMMARY_VERSION = 1
+
+## The keys of a target in the fleet manifest, all of which hold a filename
+TARGET_KEYS = [
+    "config",
+    "vpp-api-socket",
+    "vpp-json-dir",
+    "from-config",
+    "from-snapshot",
+    "output",
+]
+
+## The steps that each target goes through, in order, as they appear in the summary
+STEPS = ["load", "validate", "read", "plan", "write", "apply"]
+
+
+def read_manifest(filename):
+    """Read the fleet manifest 'filename', which holds a map of target name to its
+    settings in the 'targets' scope, for example:
+
+    targets:
+      router1:
+        config: router1.yaml
+        vpp-api-socket: /run/vpp/router1-api.sock
+      router2:
+        config: router2.yaml
+        from-config: router2-running.yaml
+
+    Each target needs a 'config'. It is read from the VPP Dataplane at 'vpp-api-socket'
+    (the default socket if it is not given), or instead from the snapshot file in
+    'from-snapshot' or synthesized from the configuration file in 'from-config'. Its
+    plan is written to 'output', if given. Relative filenames are taken relative to the
+    manifest. Returns the dict of target name to its settings, or None if the manifest
+    could not be read or is not valid."""
+    logger = logging.getLogger("vppcfg.fleet")
+    logger.addHandler(logging.NullHandler())
+
+    try:
+        with open(filename, "r", encoding="utf-8") as file:
+            manifest = yamlio.load(file)
+    except (OSError, yamlio.YAMLError) as err:
+        logger.error(f"Couldn't read fleet manifest from {filename}: {err}")
+        return None
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("targets"), dict):
+        logger.error(f"Fleet manifest {filename} does not contain any targets")
+        return None
+
+    basedir = os.path.dirname(os.path.abspath(filename))
+    targets = {}
+    result = True
+    for name, target in manifest["targets"].items():
+        if not isinstance(target, dict) or "config" not in target:
+            logger.error(f"Fleet target {name} does not have a config")
+            result = False
+            continue
+        for key, value in target.items():
+            if key not in TARGET_KEYS:
+                logger.error(f"Fleet target {name} has unknown key {key}")
+                result = False
+            elif not isinstance(value, str):
+                logger.error(f"Fleet target {name} has non-string {key}")
+                result = False
+        if "from-config" in target and "from-snapshot" in target:
+            logger.error(f"Fleet target {name} has both from-config and from-snapshot")
+            result = False
+        if not result:
+            continue
+        targets[str(name)] = {
+            key: os.path.join(basedir, value) for key, value in target.items()
+        }
+    if not result:
+        return None
+    return targets
+
+
+class Fleet:
+    """The Fleet class plans the configuration of each of a number of targets, and
+    applies it if asked to, with up to 'jobs' targets at a time. Each target is run in
+    a thread of its own, as most of their time is spent waiting for their VPP
+    Dataplanes. The work that all targets share, like compiling the schema and finding
+    the VPP API JSON files, is done once up front and reused by all of them."""
+
+    def __init__(
+        self,
+        targets,
+        schema=None,
+        jobs=8,
+        apply=False,
+        force=False,
+        output_dir=None,
+        vpp_json_dir=None,
+    ):
+        self.logger = logging.getLogger("vppcfg.fleet")
+        self.logger.addHandler(logging.NullHandler())
+
+        self.targets = targets
+        self.validator = Validator(schema=schema)
+        self.jobs = max(1, jobs)
+        self.apply = apply
+        self.force = force
+        self.output_dir = output_dir
+        self.vpp_json_dir = vpp_json_dir
+        self.results = []
+        self.elapsed = 0.0
+
+    def run(self):
+        """Run all targets, and return True if all of them succeeded. The results of
+        each target are kept in self.results, in the order of the manifest."""
+        start = time.monotonic()
+        self.validator.get_schema()
+        json_dirs = {
+            target.get("vpp-json-dir", self.vpp_json_dir)
+            for target in self.targets.values()
+            if self.apply or not ("from-config" in target or "from-snapshot" in target)
+        }
+        for json_dir in json_dirs:
+            try:
+                VPPApi(vpp_json_dir=json_dir).vpp_jsonfiles
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                self.logger.warning(f"Could not find the VPP API JSON files: {err}")
+
+        self.logger.info(
+            f"Running {len(self.targets)} target(s) with up to {self.jobs} at a time"
+        )
+        with ThreadPoolExecutor(
+            max_workers=self.jobs, thread_name_prefix="fleet"
+        ) as pool:
+            self.results = list(
+                pool.map(self.run_target, self.targets, self.targets.values())
+            )
+        self.elapsed = time.monotonic() - start
+        return all(result["ok"] for result in self.results)
+
+    def run_target(self, name, target):
+        """Run a single target, and return its result: a dict with its name, whether it
+        succeeded, the error if it did not, the number of planned operations, and the
+        time spent in each of its steps."""
+        thread = threading.current_thread()
+        thread_name, thread.name = thread.name, name
+        result = {
+            "target": name,
+            "ok": False,
+            "error": None,
+            "operations": None,
+            "seconds": {},
+        }
+        start = time.monotonic()
+        try:
+            result["ok"] = self.__run_target(target, result)
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            result["error"] = f"{type(err).__name__}: {err}"
+        result["seconds"]["total"] = time.monotonic() - start
+        if result["ok"]:
+            self.logger.info(
+                f"Planned {result['operations']} operation(s) in {result['seconds']['total']:.3f}s"
+            )
+        else:
+            self.logger.error(f"Failed: {result['error']}")
+        thread.name = thread_name
+        return result
+
+    def __run_target(self, target, result):
+        """Load, validate, read, plan, write and apply a target, in turn, recording the
+        time spent in each step in 'result'. Returns False with the error in 'result'
+        as soon as a step fails."""
+        # pylint: disable=too-many-return-statements
+        seconds = result["seconds"]
+
+        start = time.monotonic()
+        cfg = self.load(target["config"])
+        seconds["load"] = time.monotonic() - start
+        if cfg is None:
+            result["error"] = f"Couldn't read config from {target['config']}"
+            return False
+
+        start = time.monotonic()
+        cfg = IndexedConfig(cfg or {})
+        valid = self.validator.valid_config(cfg)
+        seconds["validate"] = time.monotonic() - start
+        if not valid:
+            result["error"] = "Configuration is not valid"
+            return False
+
+        start = time.monotonic()
+        vpp = self.read(target)
+        seconds["read"] = time.monotonic() - start
+        if vpp is None:
+            result["error"] = "Could not read the VPP configuration"
+            return False
+
+        try:
+            return self.__plan_target(target, result, vpp, cfg)
+        finally:
+            vpp.disconnect()
+
+    def __plan_target(self, target, result, vpp, cfg):
+        """Plan, write and apply a target against the VPP config cache in 'vpp'"""
+        seconds = result["seconds"]
+
+        start = time.monotonic()
+        reconciler = Reconciler(cfg, vpp=vpp.cache_clone())
+        ok, error = self.plan(reconciler)
+        seconds["plan"] = time.monotonic() - start
+        if not ok:
+            result["error"] = error
+            return False
+        result["operations"] = len(reconciler.plan)
+
+        outfile = target.get("output")
+        if not outfile and self.output_dir:
+            outfile = os.path.join(self.output_dir, f"{result['target']}.exec")
+        if outfile:
+            start = time.monotonic()
+            reconciler.write(outfile, emit_ok=error is None)
+            seconds["write"] = time.monotonic() - start
+        if error:
+            result["error"] = error
+            return False
+
+        if self.apply:
+            start = time.monotonic()
+            applied = vpp.apply(reconciler.plan)
+            seconds["apply"] = time.monotonic() - start
+            if not applied:
+                result["error"] = "Applying failed"
+                return False
+        return True
+
+    def load(self, filename):
+        """Read a configuration file, and return it, or None if it could not be read"""
+        try:
+            with open(filename, "r", encoding="utf-8") as file:
+                return yamlio.load(file)
+        except (OSError, yamlio.YAMLError) as err:
+            self.logger.error(f"Couldn't read config from {filename}: {err}")
+            return None
+
+    def read(self, target):
+        """Return a VPPApi (an Applier, if the fleet is applied) holding the VPP config
+        cache of the target, or None if it could not be read"""
+        json_dir = target.get("vpp-json-dir", self.vpp_json_dir)
+        socket = target.get("vpp-api-socket", "/run/vpp/api.sock")
+        if self.apply:
+            if "from-config" in target or "from-snapshot" in target:
+                self.logger.error("Cannot apply to a target without a VPP Dataplane")
+                return None
+            vpp = Applier(socket, json_dir)
+        else:
+            vpp = VPPApi(socket, json_dir)
+
+        if "from-snapshot" in target:
+            if not snapshot.load(vpp, target["from-snapshot"]):
+                return None
+        elif "from-config" in target:
+            from_cfg = self.load(target["from-config"])
+            if from_cfg is None or not self.validator.valid_config(from_cfg):
+                self.logger.error(f"Configuration {target['from-config']} is not valid")
+                return None
+            synthesize(vpp, from_cfg)
+        elif not vpp.readconfig():
+            vpp.disconnect()
+            return None
+        return vpp
+
+    def plan(self, reconciler):
+        """Plan the changes of a target with the given Reconciler. Returns a tuple of
+        whether a plan was made, and the reason why planning failed, if it did. With
+        'force', a plan is made despite failing phases, but it still has failed."""
+        if not reconciler.phys_exist_in_vpp():
+            return False, "Not all PHYs in the config exist in VPP"
+        if not reconciler.phys_exist_in_config():
+            return False, "Not all PHYs in VPP exist in the config"
+        if not reconciler.lcps_exist_with_lcp_enabled():
+            return (
+                False,
+                "Linux Control Plane is needed, but linux-cp API is not available",
+            )
+
+        error = None
+        for phase in PHASES:
+            if getattr(reconciler, phase)():
+                continue
+            error = f"Planning {phase} failure"
+            if not self.force:
+                return False, error
+            self.logger.warning(f"Planning {phase} failure, continuing due to --force")
+        return True, error
+
+    def write_summary(self, file):
+        """Write the results of all targets to 'file' as a table, with the time spent in
+        each of their steps"""
+        width = max([len(result["target"]) for result in self.results] + [6])
+        header = f"{'target':<{width}} {'status':<6} {'ops':>6}"
+        for step in STEPS + ["total"]:
+            header += f" {step:>8}"
+        print(header, file=file)
+        for result in self.results:
+            ops = result["operations"]
+            line = (
+                f"{result['target']:<{width}} {'ok' if result['ok'] else 'FAILED':<6}"
+            )
+            line += f" {ops if ops is not None else '-':>6}"
+            for step in STEPS + ["total"]:
+                if step in result["seconds"]:
+                    line += f" {result['seconds'][step]:8.3f}"
+                else:
+                    line += f" {'-':>8}"
+            print(line, file=file)
+        failed = [result for result in self.results if not result["ok"]]
+        print(
+            f"{len(self.results)} target(s), {len(failed)} failed, in {self.elapsed:.3f}s with up to {self.jobs} at a time",
+            file=file,
+        )
+        for result in failed:
+            print(f"{result['target']}: {result['error']}", file=file)
+
+    def write_json(self, filename):
+        """Write the results of all targets to the JSON file 'filename'"""
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": SUMMARY_VERSION,
+                    "elapsed": self.elapsed,
+                    "jobs": self.jobs,
+                    "apply": self.apply,
+                    "targets": self.results,
+                },
+                file,
+                indent=2,
+            )
+            file.write("\n")
@@ -0,0 +1,123 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file keep many VPP API requests in flight on a single
+connection, and collect their replies as they arrive.
+"""
+
+import logging
+import time
+from vppcfg.profiler import PROFILER
+
+
+class VPPApiPipeline:
+    """The VPPApiPipeline class sends API messages on a connected VPPApiClient without
+    waiting for their replies. Replies are matched to their request by context, and a
+    request is complete once its final reply has been read. Like the blocking calls in
+    vpp_papi, old style dumps (which only return details messages) are terminated by
+    sending a control_ping with the same context right after the request.
+
+    Callers submit() any number of requests, and then flush() to wait for all of them
+    to complete. Upon completion, the request's callback is called with the final reply
+    (or None for old style dumps) and the list of details messages (empty if the API
+    call is not a dump)."""
+
+    def __init__(self, vpp, window=256, timeout=5):
+        self.logger = logging.getLogger("vppcfg.pipeline")
+        self.logger.addHandler(logging.NullHandler())
+
+        self.vpp = vpp
+        self.window = window
+        self.timeout = timeout
+        self.pending = {}
+
+    def submit(self, msgname, callback=None, **kwargs):
+        """Send the API message 'msgname' with the given arguments to VPP, and return its
+        context. If the API message is not known to VPP (for example, because a plugin is
+        not loaded), AttributeError is raised, just like calling self.vpp.api.msgname().
+        """
+        # pylint: disable=protected-access
+        if not hasattr(self.vpp.api, msgname):
+            raise AttributeError(f"VPP API message {msgname} not found")
+        msg = self.vpp.messages[msgname]
+        msgid = self.vpp.transport.get_msg_index(f"{msgname}_{msg.crc[2:]}")
+        service = self.vpp.services[msgname]
+
+        while len(self.pending) >= self.window:
+            if not self.__read_one():
+                return None
+
+        context = self.vpp.get_context()
+        details = None
+        terminator = service["reply"]
+        if "stream_msg" in service:
+            details = service["stream_msg"]
+        elif "stream" in service:
+            details = service["reply"]
+            terminator = "control_ping_reply"
+
+        self.pending[context] = {
+            "msgname": msgname,
+            "terminator": terminator,
+            "details": details,
+            "callback": callback,
+            "messages": [],
+            "start": time.perf_counter() if PROFILER.enabled else None,
+        }
+        self.vpp._call_vpp_async(msgid, msg, context=context, **kwargs)
+        if terminator == "control_ping_reply":
+            self.vpp._control_ping(context)
+        return context
+
+    def __read_one(self):
+        """Read one message from VPP, and complete its request if it was the final reply.
+        Returns False if no message could be read within the timeout."""
+        reply = self.vpp.read_blocking(timeout=self.timeout)
+        if reply is None:
+            self.logger.error(
+                f"Timed out waiting for VPP, {len(self.pending)} request(s) outstanding"
+            )
+            return False
+
+        request = self.pending.get(reply.context)
+        if not request:
+            self.logger.debug(f"Ignoring unexpected message: {reply}")
+            return True
+
+        if type(reply).__name__ != request["terminator"]:
+            request["messages"].append(reply)
+            return True
+
+        del self.pending[reply.context]
+        if request["terminator"] == "control_ping_reply":
+            reply = None
+        if request["callback"]:
+            request["callback"](reply, request["messages"])
+        if request["start"] is not None:
+            PROFILER.add(
+                f"api.{request['msgname']}",
+                time.perf_counter() - request["start"],
+                len(request["messages"]),
+            )
+        return True
+
+    def flush(self):
+        """Wait for all outstanding requests to complete. Returns True upon success,
+        or False if VPP stopped answering."""
+        while self.pending:
+            if not self.__read_one():
+                self.pending = {}
+                return False
+        return True
@@ -0,0 +1,415 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file hold the operations planned by the Reconciler, and
+render them as VPP CLI statements, which can be written to a (compressed) file.
+"""
+import sys
+import bz2
+import gzip
+import lzma
+from vppcfg.config.acl import ACL_ACTIONS, get_tag
+
+## See src/vnet/l2/l2_vtr.h
+L2_VTR_DISABLED = 0
+L2_VTR_POP_1 = 3
+L2_VTR_POP_2 = 4
+
+PHASES = ["prune", "create", "sync"]
+
+## The filename suffixes of plan output files that are written compressed, and the
+## function that opens them for writing text.
+OUTPUT_COMPRESSORS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+## The size of the write buffer of plan output files
+OUTPUT_BUFFER_SIZE = 1 << 16
+
+
+class Op:
+    """An Op is one planned operation. Its 'op' is the name of the Applier method that
+    carries it out, and 'args' are the positional arguments of that method. The Op
+    can be rendered as a VPP CLI statement with str()."""
+
+    __slots__ = ("op", "args")
+
+    def __init__(self, op, *args):
+        if op not in OPS:
+            raise KeyError(f"Unknown plan operation: {op}")
+        self.op = op
+        self.args = args
+
+    @property
+    def ifname(self):
+        """The name of the interface this operation acts upon, or None if it does not
+        act upon an interface (for example, bridgedomain or sFlow settings)"""
+        target = OPS[self.op][1]
+        if target is None:
+            return None
+        return self.args[target]
+
+    def __str__(self):
+        return OPS[self.op][0](*self.args)
+
+    def __repr__(self):
+        return f"Op({self.op!r}, {', '.join(repr(arg) for arg in self.args)})"
+
+    def __eq__(self, other):
+        return isinstance(other, Op) and self.op == other.op and self.args == other.args
+
+
+class Plan:
+    """A Plan holds the operations of the prune, create and sync phases, in the order
+    in which they are to be carried out."""
+
+    def __init__(self):
+        self.phases = {phase: [] for phase in PHASES}
+
+    def add(self, phase, op, *args):
+        """Append an operation to the given phase"""
+        self.phases[phase].append(Op(op, *args))
+
+    def __getitem__(self, phase):
+        return self.phases[phase]
+
+    def __len__(self):
+        return sum(len(ops) for ops in self.phases.values())
+
+    def cli(self, phase):
+        """Return the VPP CLI statements of all operations in the given phase"""
+        return [str(op) for op in self.phases[phase]]
+
+    def iter_cli(self, emit_ok=False):
+        """Return an iterator over the VPP CLI statements of all phases, one line at a
+        time, each phase preceded by a comment. If the 'emit_ok' flag is False, add a
+        warning at the top and bottom."""
+        if not emit_ok:
+            yield "comment { vppcfg: Planning failed, be careful with this output! }"
+
+        for phase in PHASES:
+            ncount = len(self.phases[phase])
+            if ncount > 0:
+                yield f"comment {{ vppcfg {phase}: {ncount} CLI statement(s) follow }}"
+                for op in self.phases[phase]:
+                    yield str(op)
+
+        if not emit_ok:
+            yield "comment { vppcfg: Planning failed, be careful with this output! }"
+
+
+class Scope:
+    """A Scope holds the names of the objects that the Reconciler plans, see
+    config/diff.py get_dirty(). If it has no names, all objects are in scope."""
+
+    def __init__(self, names=None):
+        self.names = names
+
+    def __contains__(self, name):
+        return self.names is None or name in self.names
+
+    def filter(self, names):
+        """Returns the names in the given list that are in scope, in their order"""
+        if self.names is None:
+            return names
+        return [name for name in names if name in self.names]
+
+    def items(self, cache, table):
+        """Returns a list of the (key, value) items of the given table in the VPP config
+        cache, whose interface or bridgedomain is in scope"""
+        items = cache[table]
+        if self.names is None:
+            return list(items.items())
+        if table == "bridgedomains":
+            keys = [
+                int(name[2:])
+                for name in self.names
+                if name.startswith("bd") and name[2:].isdigit()
+            ]
+        else:
+            interface_names = cache["interface_names"]
+            keys = [
+                interface_names[name] for name in self.names if name in interface_names
+            ]
+        return [(key, items[key]) for key in sorted(set(keys)) if key in items]
+
+
+def open_outfile(outfile):
+    """Open the file 'outfile' for writing plan output, compressed if its name ends in
+    one of OUTPUT_COMPRESSORS, and return it"""
+    for suffix, compressor in OUTPUT_COMPRESSORS.items():
+        if outfile.endswith(suffix):
+            return compressor(outfile, "wt", encoding="utf-8")
+    # pylint: disable=consider-using-with
+    return open(outfile, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE)
+
+
+def write_lines(outfile, lines):
+    """Write the given lines to stdout (if outfile=='-') or a named file otherwise,
+    which is compressed if its name ends in one of OUTPUT_COMPRESSORS. The lines are
+    written as they are iterated over, rather than all of them at once. Returns the
+    number of lines written."""
+    if outfile and outfile == "-":
+        file = sys.stdout
+    else:
+        file = open_outfile(outfile)
+    nlines = 0
+    try:
+        for line in lines:
+            file.write(line)
+            file.write("\n")
+            nlines += 1
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    return nlines
+
+
+def _set_interface_unnumbered(ifname, target_ifname=None, is_add=True):
+    if not is_add:
+        return f"set interface unnumbered del {ifname}"
+    return f"set interface unnumbered {ifname} use {target_ifname}"
+
+
+def _set_interface_ip_address(ifname, address, is_set=True):
+    if not is_set:
+        return f"set interface ip address del {ifname} {address}"
+    return f"set interface ip address {ifname} {address}"
+
+
+def _set_interface_l2_tag_rewrite(
+    ifname, vtr_op, _vtr_push_dot1q=0, _vtr_tag1=0, _vtr_tag2=0
+):
+    operation = {
+        L2_VTR_DISABLED: "disable",
+        L2_VTR_POP_1: "pop 1",
+        L2_VTR_POP_2: "pop 2",
+    }
+    return f"set interface l2 tag-rewrite {ifname} {operation[vtr_op]}"
+
+
+def _create_vxlan_tunnel(instance, config, is_create=True):
+    if not is_create:
+        return (
+            f"create vxlan tunnel instance {instance} "
+            f"src {config['local']} dst {config['remote']} vni {config['vni']} del"
+        )
+    return (
+        f"create vxlan tunnel src {config['local']} dst {config['remote']} "
+        f"instance {instance} vni {config['vni']} decap-next l2"
+    )
+
+
+def _create_loopback_interface(instance, config):
+    cli = f"create loopback interface instance {int(instance)}"
+    if "mac" in config:
+        cli += f" mac {config['mac']}"
+    return cli
+
+
+def _create_bond(instance, config):
+    cli = f"create bond id {int(instance)} mode {config['mode']}"
+    if "load-balance" in config:
+        cli += f" load-balance {config['load-balance']}"
+    if "mac" in config:
+        cli += f" hw-addr {config['mac']}"
+    return cli
+
+
+def _create_subinterface(parent_ifname, sub_id, config):
+    encap = config["encapsulation"]
+    if encap["dot1ad"] > 0:
+        encapstr = f"dot1ad {int(encap['dot1ad'])}"
+    else:
+        encapstr = f"dot1q {int(encap['dot1q'])}"
+    if encap["inner-dot1q"] > 0:
+        encapstr += f" inner-dot1q {int(encap['inner-dot1q'])}"
+    if encap["exact-match"]:
+        encapstr += " exact-match"
+    return f"create sub {parent_ifname} {int(sub_id)} {encapstr}"
+
+
+def _create_tap(instance, config):
+    cli = f"create tap id {int(instance)} host-if-name {config['host']['name']}"
+    if "mac" in config["host"]:
+        cli += f" host-mac-addr {config['host']['mac']}"
+    if "namespace" in config["host"]:
+        cli += f" host-ns {int(config['host']['namespace'])}"
+    if "bridge" in config["host"]:
+        cli += f" host-bridge {config['host']['bridge']}"
+    if "mtu" in config["host"]:
+        cli += f" host-mtu-size {int(config['host']['mtu'])}"
+    if "rx-ring-size" in config:
+        cli += f" rx-ring-size {int(config['rx-ring-size'])}"
+    if "tx-ring-size" in config:
+        cli += f" tx-ring-size {int(config['tx-ring-size'])}"
+    return cli
+
+
+def _create_bridgedomain(bd_id, config):
+    settings = config["settings"]
+    cli = f"create bridge-domain {int(bd_id)}"
+    if not settings["learn"]:
+        cli += " learn 0"
+    if not settings["unicast-flood"]:
+        cli += " flood 0"
+    if not settings["unknown-unicast-flood"]:
+        cli += " uu-flood 0"
+    if not settings["unicast-forward"]:
+        cli += " forward 0"
+    if settings["arp-termination"]:
+        cli += " arp-term 1"
+    if settings["arp-unicast-forward"]:
+        cli += " arp-ufwd 1"
+    if settings["mac-age-minutes"] > 0:
+        cli += f" mac-age {int(settings['mac-age-minutes'])}"
+    return cli
+
+
+def _set_bridgedomain_settings(bd_id, settings):
+    keywords = {
+        "learn": "learn",
+        "unicast-forward": "forward",
+        "unicast-flood": "flood",
+        "unknown-unicast-flood": "uu-flood",
+        "arp-termination": "arp term",
+        "arp-unicast-forward": "arp-ufwd",
+    }
+    ret = []
+    for key, value in settings.items():
+        if key == "mac-age-minutes":
+            ret.append(f"set bridge-domain mac-age {int(bd_id)} {int(value)}")
+            continue
+        cli = f"set bridge-domain {keywords[key]} {int(bd_id)}"
+        if not value:
+            cli += " disable"
+        ret.append(cli)
+    return "\n".join(ret)
+
+
+def _set_sflow(settings):
+    return "\n".join(f"sflow {key} {value}" for key, value in settings.items())
+
+
+def _set_interface_sflow(ifname, enable):
+    if enable:
+        return f"sflow enable {ifname}"
+    return f"sflow enable-disable {ifname} disable"
+
+
+def _acl_rules(rules):
+    actions = {value: key for key, value in ACL_ACTIONS.items()}
+    ret = []
+    for rule in rules:
+        cli = f"{actions[rule.is_permit]} src {rule.src_prefix} dst {rule.dst_prefix}"
+        if rule.proto:
+            cli += f" proto {int(rule.proto)}"
+        sport = (rule.srcport_or_icmptype_first, rule.srcport_or_icmptype_last)
+        if sport != (0, 65535):
+            cli += f" sport {int(sport[0])}-{int(sport[1])}"
+        dport = (rule.dstport_or_icmpcode_first, rule.dstport_or_icmpcode_last)
+        if dport != (0, 65535):
+            cli += f" dport {int(dport[0])}-{int(dport[1])}"
+        ret.append(cli)
+    return ", ".join(ret)
+
+
+def _create_acl(aclname, rules):
+    return f"set acl-plugin acl {_acl_rules(rules)} tag {get_tag(aclname)}"
+
+
+def _replace_acl(acl_index, aclname, rules):
+    return (
+        f"set acl-plugin acl index {int(acl_index)} {_acl_rules(rules)} "
+        f"tag {get_tag(aclname)}"
+    )
+
+
+## For each operation: the function that renders it as VPP CLI, and the position of
+## the interface name in its arguments (or None if it does not act on an interface).
+OPS = {
+    "comment": (lambda text: f"comment {{ {text} }}", None),
+    "set_interface_unnumbered": (_set_interface_unnumbered, 0),
+    "set_interface_ip_address": (_set_interface_ip_address, 0),
+    "delete_loopback": (lambda ifname: f"delete loopback interface intfc {ifname}", 0),
+    "delete_subinterface": (lambda ifname: f"delete sub {ifname}", 0),
+    "set_interface_l2_tag_rewrite": (_set_interface_l2_tag_rewrite, 0),
+    "set_interface_l3": (lambda ifname: f"set interface l3 {ifname}", 0),
+    "delete_bridgedomain": (
+        lambda bd_id: f"create bridge-domain {int(bd_id)} del",
+        None,
+    ),
+    "delete_tap": (lambda ifname: f"delete tap {ifname}", 0),
+    "bond_remove_member": (lambda membername: f"bond del {membername}", 0),
+    "delete_bond": (lambda ifname: f"delete bond {ifname}", 0),
+    "create_vxlan_tunnel": (_create_vxlan_tunnel, None),
+    "set_interface_link_mtu": (
+        lambda ifname, link_mtu: f"set interface mtu {int(link_mtu)} {ifname}",
+        0,
+    ),
+    "lcp_delete": (lambda ifname: f"lcp delete {ifname}", 0),
+    "lcp_create": (
+        lambda ifname, host_if_name: f"lcp create {ifname} host-if {host_if_name}",
+        0,
+    ),
+    "set_interface_packet_mtu": (
+        lambda ifname, packet_mtu: f"set interface mtu packet {int(packet_mtu)} {ifname}",
+        0,
+    ),
+    "set_interface_state": (
+        lambda ifname, state: f"set interface state {ifname} {'up' if state else 'down'}",
+        0,
+    ),
+    "create_loopback_interface": (_create_loopback_interface, None),
+    "create_bond": (_create_bond, None),
+    "create_subinterface": (_create_subinterface, None),
+    "create_tap": (_create_tap, None),
+    "create_bridgedomain": (_create_bridgedomain, None),
+    "set_interface_mac": (
+        lambda ifname, mac: f"set interface mac address {ifname} {mac}",
+        0,
+    ),
+    "bond_add_member": (
+        lambda bondname, membername: f"bond add {bondname} {membername}",
+        1,
+    ),
+    "set_bridgedomain_settings": (_set_bridgedomain_settings, None),
+    "set_interface_l2_bridge_bvi": (
+        lambda bd_id, ifname: f"set interface l2 bridge {ifname} {int(bd_id)} bvi",
+        1,
+    ),
+    "set_interface_l2_bridge": (
+        lambda bd_id, ifname: f"set interface l2 bridge {ifname} {int(bd_id)}",
+        1,
+    ),
+    "set_interface_l2xc": (
+        lambda rx_ifname, tx_ifname: f"set interface l2 xconnect {rx_ifname} {tx_ifname}",
+        0,
+    ),
+    "set_sflow": (_set_sflow, None),
+    "set_interface_sflow": (_set_interface_sflow, 0),
+    "delete_acl": (
+        lambda acl_index: f"delete acl-plugin acl index {int(acl_index)}",
+        None,
+    ),
+    "create_acl": (_create_acl, None),
+    "replace_acl": (_replace_acl, None),
+    "set_interface_mpls": (
+        lambda ifname, enable: f"set interface mpls {ifname} {'enable' if enable else 'disable'}",
+        0,
+    ),
+}
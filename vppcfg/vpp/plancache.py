@@ -0,0 +1,153 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file keep the output of planning in an on-disk cache, so that
+planning the same configuration against the same dataplane state again is instant.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from importlib import metadata
+from .cachedir import get_cache_dir
+
+PLAN_CACHE_VERSION = 2
+
+## The maximum number of plans that are kept, after which the least recently used
+## ones are removed.
+PLAN_CACHE_ENTRIES = 64
+
+
+def get_version():
+    """Return the version of vppcfg. When it is not installed (for example, when it
+    runs from the source tree), return a hash over the path, size and modification
+    time of its source files instead, so that a changed planner never returns a plan
+    made by the code before it."""
+    try:
+        return metadata.version("vppcfg")
+    except metadata.PackageNotFoundError:
+        pass
+
+    topdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(topdir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.endswith(".py"):
+                continue
+            stat = os.stat(os.path.join(dirpath, filename))
+            digest.update(
+                f"{dirpath}/{filename}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode()
+            )
+    return f"src-{digest.hexdigest()[:16]}"
+
+
+class PlanCache:
+    """The PlanCache class stores the planned output for a configuration, keyed by a
+    hash over the configuration, the VPP config cache that it was planned against, and
+    the version of vppcfg. Each plan is stored in its own file, whose modification time
+    is updated when it is used, so that the least recently used plans can be removed
+    when there are more than 'maxentries' of them."""
+
+    def __init__(self, cache_dir=None, maxentries=PLAN_CACHE_ENTRIES):
+        self.logger = logging.getLogger("vppcfg.plancache")
+        self.logger.addHandler(logging.NullHandler())
+
+        self.cache_dir = cache_dir or get_cache_dir("plans")
+        self.maxentries = maxentries
+
+    def key(self, cfg, vpp):
+        """Return the key for planning the configuration 'cfg' against the VPP config
+        cache of the VPPApi 'vpp'"""
+        digest = hashlib.sha256(f"{PLAN_CACHE_VERSION}\0{get_version()}\0".encode())
+        digest.update(json.dumps(cfg, sort_keys=True, default=str).encode())
+        digest.update(f"\0{vpp.cache_fingerprint()}".encode())
+        return digest.hexdigest()
+
+    def __filename(self, key):
+        """Return the filename of the plan with the given key"""
+        return os.path.join(self.cache_dir, f"plan-{key}.jsonl")
+
+    def get(self, key):
+        """Return an iterator over the output lines of the plan with the given key, or
+        None if it is not in the cache. The lines are read from the cache as they are
+        iterated over."""
+        if not self.cache_dir:
+            return None
+        filename = self.__filename(key)
+        try:
+            with open(filename, "r", encoding="utf-8") as file:
+                header = json.loads(file.readline())
+            if header.get("key") != key:
+                return None
+            os.utime(filename)
+        except (OSError, ValueError, AttributeError):
+            return None
+        self.logger.info(f"Using cached plan {key[:16]}")
+        return self.__read_lines(filename)
+
+    @staticmethod
+    def __read_lines(filename):
+        """Yield the output lines of the plan stored in 'filename', skipping its header"""
+        with open(filename, "r", encoding="utf-8") as file:
+            file.readline()
+            for line in file:
+                yield json.loads(line)
+
+    def put(self, key, output):
+        """Atomically store the output lines of a plan with the given key, which are
+        read from the iterable 'output' as they are written, and remove the least
+        recently used plans if there are too many. Each line is stored as a JSON string
+        on a line of its own, after a JSON header which holds the key. Returns True upon
+        success, False otherwise."""
+        if not self.cache_dir:
+            return False
+        filename = self.__filename(key)
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.cache_dir, delete=False
+            ) as file:
+                file.write(json.dumps({"key": key}))
+                file.write("\n")
+                for line in output:
+                    file.write(json.dumps(line))
+                    file.write("\n")
+            os.replace(file.name, filename)
+        except OSError as err:
+            self.logger.debug(f"Could not write {filename}: {err}")
+            return False
+        self.logger.debug(f"Stored plan {key[:16]}")
+        self.__evict()
+        return True
+
+    def __evict(self):
+        """Remove the least recently used plans, until at most 'maxentries' remain"""
+        entries = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.startswith("plan-"):
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+        except OSError as err:
+            self.logger.debug(f"Could not read {self.cache_dir}: {err}")
+            return
+        entries.sort()
+        for _mtime, filename in entries[: max(0, len(entries) - self.maxentries)]:
+            try:
+                os.unlink(filename)
+            except OSError:
+                continue
+            self.logger.debug(f"Removed {filename}")
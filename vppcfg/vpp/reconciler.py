@@ -17,7 +17,6 @@
 The functions in this file interact with the VPP API to retrieve certain
 metadata, and plan configuration changes towards a given YAML target configuration.
 """
-import sys
 import logging
 from vppcfg.config import loopback
 from vppcfg.config import interface
@@ -26,7 +25,12 @@ from vppcfg.config import bridgedomain
 from vppcfg.config import vxlan_tunnel
 from vppcfg.config import lcp
 from vppcfg.config import tap
+from vppcfg.config import diff
+from vppcfg.config.index import IndexedConfig
+from vppcfg.profiler import PROFILER
 from .vppapi import VPPApi
+from .plan import Plan, Scope, write_lines, L2_VTR_DISABLED, L2_VTR_POP_1, L2_VTR_POP_2
+from . import acls
 
 
 class Reconciler:
@@ -43,15 +47,32 @@ class Reconciler:
         cfg,
         vpp_api_socket="/run/vpp/api.sock",
         vpp_json_dir=None,
+        vpp=None,
+        prev_cfg=None,
     ):
         self.logger = logging.getLogger("vppcfg.reconciler")
         self.logger.addHandler(logging.NullHandler())
 
-        self.vpp = VPPApi(vpp_api_socket, vpp_json_dir)
+        ## Planning changes the VPP config cache, so a VPPApi that is handed in (for
+        ## example a VPPApi.cache_clone()) is not to be shared with anyone else.
+        if vpp is None:
+            vpp = VPPApi(vpp_api_socket, vpp_json_dir)
+        self.vpp = vpp
+        if not isinstance(cfg, IndexedConfig):
+            cfg = IndexedConfig(cfg)
         self.cfg = cfg
 
-        ## List of CLI calls emitted during the prune, create and sync phases.
-        self.cli = {"prune": [], "create": [], "sync": []}
+        ## If the dataplane is known to reflect a previous config, only the objects that
+        ## differ from it, and the objects that depend on those, are planned.
+        self.scope = Scope()
+        if prev_cfg is not None:
+            if not isinstance(prev_cfg, IndexedConfig):
+                prev_cfg = IndexedConfig(prev_cfg)
+            self.scope = Scope(diff.get_dirty(prev_cfg, self.cfg))
+            self.logger.debug(f"Planning {len(self.scope.names)} changed object(s)")
+
+        ## The operations planned during the prune, create and sync phases.
+        self.plan = Plan()
 
     def __del__(self):
         self.vpp.disconnect()
@@ -79,12 +100,14 @@ class Reconciler:
         in the config. Return False otherwise."""
 
         ret = True
+        config_ifnames = set(interface.get_interfaces(self.cfg))
         for ifname in self.vpp.get_phys():
-            if not ifname in interface.get_interfaces(self.cfg):
+            if not ifname in config_ifnames:
                 self.logger.warning(f"Interface {ifname} does not exist in the config")
                 ret = False
         return ret
 
+    @PROFILER.timed
     def prune(self):
         """Remove all objects from VPP that do not occur in the config. For an indepth explanation
         of how and why this particular pruning order is chosen, see README.md section on
@@ -120,17 +143,20 @@ class Reconciler:
         if not self.__prune_phys():
             self.logger.warning("Could not prune PHYs from VPP")
             ret = False
+        if not self.__prune_acls():
+            self.logger.warning("Could not prune ACLs from VPP")
+            ret = False
         return ret
 
     def __prune_unnumbered_usage(self, target_ifname):
         """Remove the unnumbered use of all VPP interfaces that are using the given 'target_ifname'."""
         target_iface = self.vpp.get_interface_by_name(target_ifname)
 
-        for idx, target_idx in self.vpp.cache["interface_unnumbered"].items():
-            if target_idx == target_iface.sw_if_index:
-                unnumbered_ifname = self.vpp.cache["interfaces"][idx].interface_name
-                cli = f"set interface unnumbered del {unnumbered_ifname}"
-                self.cli["prune"].append(cli)
+        for idx in self.vpp.get_unnumbered_users(target_iface.sw_if_index):
+            unnumbered_ifname = self.vpp.cache["interfaces"][idx].interface_name
+            self.plan.add(
+                "prune", "set_interface_unnumbered", unnumbered_ifname, None, False
+            )
         return True
 
     def __prune_addresses(self, ifname, address_list):
@@ -148,19 +174,19 @@ class Reconciler:
         removed_addresses = []
         for addr in self.vpp.cache["interface_addresses"][idx]:
             if not addr in address_list:
-                cli = f"set interface ip address del {ifname} {addr}"
-                self.cli["prune"].append(cli)
+                self.plan.add("prune", "set_interface_ip_address", ifname, addr, False)
                 removed_addresses.append(addr)
             else:
                 self.logger.debug(f"Address OK: {ifname} {addr}")
         for addr in removed_addresses:
             self.vpp.cache["interface_addresses"][idx].remove(addr)
 
+    @PROFILER.timed
     def __prune_loopbacks(self):
         """Remove loopbacks from VPP, if they do not occur in the config."""
         removed_interfaces = []
         for numtags in [2, 1, 0]:
-            for _idx, vpp_iface in self.vpp.cache["interfaces"].items():
+            for _idx, vpp_iface in self.scope.items(self.vpp.cache, "interfaces"):
                 if vpp_iface.interface_dev_type != "Loopback":
                     continue
                 if vpp_iface.sub_number_of_tags != numtags:
@@ -172,12 +198,14 @@ class Reconciler:
                     self.__prune_addresses(vpp_iface.interface_name, [])
                     self.__prune_unnumbered_usage(vpp_iface.interface_name)
                     if numtags == 0:
-                        cli = f"delete loopback interface intfc {vpp_iface.interface_name}"
-                        self.cli["prune"].append(cli)
+                        self.plan.add(
+                            "prune", "delete_loopback", vpp_iface.interface_name
+                        )
                         removed_interfaces.append(vpp_iface.interface_name)
                     else:
-                        cli = f"delete sub {vpp_iface.interface_name}"
-                        self.cli["prune"].append(cli)
+                        self.plan.add(
+                            "prune", "delete_subinterface", vpp_iface.interface_name
+                        )
                         removed_interfaces.append(vpp_iface.interface_name)
                     continue
                 self.logger.debug(f"Loopback OK: {vpp_iface.interface_name}")
@@ -191,11 +219,12 @@ class Reconciler:
 
         return True
 
+    @PROFILER.timed
     def __prune_bridgedomains(self):
         """Remove bridge-domains from VPP, if they do not occur in the config. If any interfaces are
         found in to-be removed bridge-domains, they are returned to L3 mode, and tag-rewrites removed.
         """
-        for idx, bridge in self.vpp.cache["bridgedomains"].items():
+        for idx, bridge in self.scope.items(self.vpp.cache, "bridgedomains"):
             bridgename = f"bd{int(idx)}"
             _config_ifname, config_iface = bridgedomain.get_by_name(
                 self.cfg, bridgename
@@ -207,18 +236,19 @@ class Reconciler:
                     member_iface = self.vpp.cache["interfaces"][member.sw_if_index]
                     member_ifname = member_iface.interface_name
                     if member_iface.sub_id > 0:
-                        cli = f"set interface l2 tag-rewrite {member_ifname} disable"
-                        self.cli["prune"].append(cli)
-                    cli = f"set interface l3 {member_ifname}"
-                    self.cli["prune"].append(cli)
+                        self.plan.add(
+                            "prune",
+                            "set_interface_l2_tag_rewrite",
+                            member_ifname,
+                            L2_VTR_DISABLED,
+                        )
+                    self.plan.add("prune", "set_interface_l3", member_ifname)
                 if bridge.bvi_sw_if_index in self.vpp.cache["interfaces"]:
                     bviname = self.vpp.cache["interfaces"][
                         bridge.bvi_sw_if_index
                     ].interface_name
-                    cli = f"set interface l3 {bviname}"
-                    self.cli["prune"].append(cli)
-                cli = f"create bridge-domain {int(idx)} del"
-                self.cli["prune"].append(cli)
+                    self.plan.add("prune", "set_interface_l3", bviname)
+                self.plan.add("prune", "delete_bridgedomain", int(idx))
             else:
                 self.logger.debug(f"BridgeDomain OK: {bridgename}")
                 for member in bridge.sw_if_details:
@@ -230,12 +260,13 @@ class Reconciler:
                         and member_ifname in config_iface["members"]
                     ):
                         if interface.is_sub(self.cfg, member_ifname):
-                            cli = (
-                                f"set interface l2 tag-rewrite {member_ifname} disable"
+                            self.plan.add(
+                                "prune",
+                                "set_interface_l2_tag_rewrite",
+                                member_ifname,
+                                L2_VTR_DISABLED,
                             )
-                            self.cli["prune"].append(cli)
-                        cli = f"set interface l3 {member_ifname}"
-                        self.cli["prune"].append(cli)
+                        self.plan.add("prune", "set_interface_l3", member_ifname)
                 if (
                     "bvi" in config_iface
                     and bridge.bvi_sw_if_index in self.vpp.cache["interfaces"]
@@ -244,17 +275,17 @@ class Reconciler:
                         bridge.bvi_sw_if_index
                     ].interface_name
                     if bviname != config_iface["bvi"]:
-                        cli = f"set interface l3 {bviname}"
-                        self.cli["prune"].append(cli)
+                        self.plan.add("prune", "set_interface_l3", bviname)
 
         return True
 
+    @PROFILER.timed
     def __prune_l2xcs(self):
         """Remove all L2XC source interfaces from VPP, if they do not occur in the config. If they occur,
         but are crossconnected to a different interface name, also remove them. Interfaces are put
         back into L3 mode, and their tag-rewrites removed."""
         removed_l2xcs = []
-        for _idx, l2xc in self.vpp.cache["l2xcs"].items():
+        for _idx, l2xc in self.scope.items(self.vpp.cache, "l2xcs"):
             vpp_rx_ifname = self.vpp.cache["interfaces"][
                 l2xc.rx_sw_if_index
             ].interface_name
@@ -263,19 +294,25 @@ class Reconciler:
             )
             if not config_rx_ifname:
                 if self.vpp.cache["interfaces"][l2xc.rx_sw_if_index].sub_id > 0:
-                    cli = f"set interface l2 tag-rewrite {vpp_rx_ifname} disable"
-                    self.cli["prune"].append(cli)
-                cli = f"set interface l3 {vpp_rx_ifname}"
-                self.cli["prune"].append(cli)
+                    self.plan.add(
+                        "prune",
+                        "set_interface_l2_tag_rewrite",
+                        vpp_rx_ifname,
+                        L2_VTR_DISABLED,
+                    )
+                self.plan.add("prune", "set_interface_l3", vpp_rx_ifname)
                 removed_l2xcs.append(vpp_rx_ifname)
                 continue
 
             if not interface.is_l2xc_interface(self.cfg, config_rx_ifname):
                 if interface.is_sub(self.cfg, config_rx_ifname):
-                    cli = f"set interface l2 tag-rewrite {vpp_rx_ifname} disable"
-                    self.cli["prune"].append(cli)
-                cli = f"set interface l3 {vpp_rx_ifname}"
-                self.cli["prune"].append(cli)
+                    self.plan.add(
+                        "prune",
+                        "set_interface_l2_tag_rewrite",
+                        vpp_rx_ifname,
+                        L2_VTR_DISABLED,
+                    )
+                self.plan.add("prune", "set_interface_l3", vpp_rx_ifname)
                 removed_l2xcs.append(vpp_rx_ifname)
                 continue
             vpp_tx_ifname = self.vpp.cache["interfaces"][
@@ -283,10 +320,13 @@ class Reconciler:
             ].interface_name
             if vpp_tx_ifname != config_rx_iface["l2xc"]:
                 if interface.is_sub(self.cfg, config_rx_ifname):
-                    cli = f"set interface l2 tag-rewrite {vpp_rx_ifname} disable"
-                    self.cli["prune"].append(cli)
-                cli = f"set interface l3 {vpp_rx_ifname}"
-                self.cli["prune"].append(cli)
+                    self.plan.add(
+                        "prune",
+                        "set_interface_l2_tag_rewrite",
+                        vpp_rx_ifname,
+                        L2_VTR_DISABLED,
+                    )
+                self.plan.add("prune", "set_interface_l3", vpp_rx_ifname)
                 removed_l2xcs.append(vpp_rx_ifname)
                 continue
             self.logger.debug(f"L2XC OK: {vpp_rx_ifname} -> {vpp_tx_ifname}")
@@ -396,12 +436,13 @@ class Reconciler:
 
         return False
 
+    @PROFILER.timed
     def __prune_taps(self):
         """Remove all TAPs from VPP, if they are not in the config. As an exception,
         TAPs which are a part of Linux Control Plane, are left alone, to be handled
         by __prune_lcps() later."""
         removed_taps = []
-        for _idx, vpp_tap in self.vpp.cache["taps"].items():
+        for _idx, vpp_tap in self.scope.items(self.vpp.cache, "taps"):
             vpp_iface = self.vpp.cache["interfaces"][vpp_tap.sw_if_index]
             vpp_ifname = vpp_iface.interface_name
             if self.vpp.tap_is_lcp(vpp_ifname):
@@ -411,17 +452,17 @@ class Reconciler:
                 continue
 
         for ifname in removed_taps:
-            cli = f"delete tap {ifname}"
-            self.cli["prune"].append(cli)
+            self.plan.add("prune", "delete_tap", ifname)
             self.vpp.cache_remove_interface(ifname)
         return True
 
+    @PROFILER.timed
     def __prune_bondethernets(self):
         """Remove all BondEthernets from VPP, if they are not in the config. If the bond has members,
         remove those from the bond before removing the bond."""
         removed_interfaces = []
         removed_bondethernet_members = []
-        for idx, bond in self.vpp.cache["bondethernets"].items():
+        for idx, bond in self.scope.items(self.vpp.cache, "bondethernets"):
             vpp_ifname = bond.interface_name
             _config_ifname, config_iface = bondethernet.get_by_name(
                 self.cfg, vpp_ifname
@@ -432,11 +473,9 @@ class Reconciler:
                 self.__prune_unnumbered_usage(vpp_ifname)
                 for member in self.vpp.cache["bondethernet_members"][idx]:
                     member_ifname = self.vpp.cache["interfaces"][member].interface_name
-                    cli = f"bond del {member_ifname}"
-                    self.cli["prune"].append(cli)
+                    self.plan.add("prune", "bond_remove_member", member_ifname)
                     removed_bondethernet_members.append(member_ifname)
-                cli = f"delete bond {vpp_ifname}"
-                self.cli["prune"].append(cli)
+                self.plan.add("prune", "delete_bond", vpp_ifname)
                 removed_interfaces.append(vpp_ifname)
                 continue
 
@@ -446,8 +485,7 @@ class Reconciler:
                     "interfaces" in config_iface
                     and not member_ifname in config_iface["interfaces"]
                 ):
-                    cli = f"bond del {member_ifname}"
-                    self.cli["prune"].append(cli)
+                    self.plan.add("prune", "bond_remove_member", member_ifname)
                     removed_bondethernet_members.append(member_ifname)
             addresses = []
             if "addresses" in config_iface:
@@ -463,20 +501,27 @@ class Reconciler:
 
         return True
 
+    @PROFILER.timed
     def __prune_vxlan_tunnels(self):
         """Remove all VXLAN Tunnels from VPP, if they are not in the config. If they are in the config
         but with differing attributes, remove them also."""
         removed_interfaces = []
-        for idx, vpp_vxlan in self.vpp.cache["vxlan_tunnels"].items():
+        for idx, vpp_vxlan in self.scope.items(self.vpp.cache, "vxlan_tunnels"):
             vpp_ifname = self.vpp.cache["interfaces"][idx].interface_name
             config_ifname, config_iface = vxlan_tunnel.get_by_name(self.cfg, vpp_ifname)
             if not config_iface or self.__vxlan_tunnel_has_diff(config_ifname):
                 self.__prune_addresses(vpp_ifname, [])
-                cli = (
-                    f"create vxlan tunnel instance {vpp_vxlan.instance} "
-                    f"src {vpp_vxlan.src_address} dst {vpp_vxlan.dst_address} vni {vpp_vxlan.vni} del"
+                self.plan.add(
+                    "prune",
+                    "create_vxlan_tunnel",
+                    vpp_vxlan.instance,
+                    {
+                        "local": vpp_vxlan.src_address,
+                        "remote": vpp_vxlan.dst_address,
+                        "vni": vpp_vxlan.vni,
+                    },
+                    False,
                 )
-                self.cli["prune"].append(cli)
                 removed_interfaces.append(vpp_ifname)
                 continue
             config_ifname, config_iface = interface.get_by_name(self.cfg, vpp_ifname)
@@ -493,13 +538,14 @@ class Reconciler:
 
         return True
 
+    @PROFILER.timed
     def __prune_sub_interfaces(self):
         """Remove interfaces from VPP if they are not in the config, if their encapsulation is different,
         or if the BondEthernet they reside on is different.
         Start with inner-most (QinQ/QinAD), then Dot1Q/Dot1AD."""
         removed_interfaces = []
         for numtags in [2, 1]:
-            for vpp_ifname in self.vpp.get_sub_interfaces():
+            for vpp_ifname in self.scope.filter(self.vpp.get_sub_interfaces()):
                 vpp_iface = self.vpp.get_interface_by_name(vpp_ifname)
                 if not vpp_iface or vpp_iface.sub_number_of_tags != numtags:
                     continue
@@ -532,8 +578,7 @@ class Reconciler:
                 if prune:
                     self.__prune_addresses(vpp_ifname, [])
                     self.__prune_unnumbered_usage(vpp_ifname)
-                    cli = f"delete sub {vpp_ifname}"
-                    self.cli["prune"].append(cli)
+                    self.plan.add("prune", "delete_subinterface", vpp_ifname)
                     removed_interfaces.append(vpp_ifname)
                     continue
 
@@ -548,9 +593,10 @@ class Reconciler:
 
         return True
 
+    @PROFILER.timed
     def __prune_phys(self):
         """Set default MTU and remove IPs for PHYs that are not in the config."""
-        for vpp_ifname in self.vpp.get_phys():
+        for vpp_ifname in self.scope.filter(self.vpp.get_phys()):
             vpp_iface = self.vpp.get_interface_by_name(vpp_ifname)
             if not vpp_iface:
                 continue
@@ -560,8 +606,7 @@ class Reconciler:
                 ## Interfaces were sent DOWN in the __prune_admin_state() step previously
                 self.__prune_addresses(vpp_ifname, [])
                 if vpp_iface.link_mtu != 9000:
-                    cli = f"set interface mtu 9000 {vpp_ifname}"
-                    self.cli["prune"].append(cli)
+                    self.plan.add("prune", "set_interface_link_mtu", vpp_ifname, 9000)
                 continue
             addresses = []
             if "addresses" in config_iface:
@@ -570,26 +615,24 @@ class Reconciler:
             self.logger.debug(f"Interface OK: {vpp_ifname}")
         return True
 
+    @PROFILER.timed
+    def __prune_acls(self):
+        """Remove the ACLs that vppcfg created from VPP that are not in the config, see
+        acls.prune()"""
+        if "acls" not in self.scope:
+            return True
+        return acls.prune(self.cfg, self.vpp, self.plan)
+
     def __parent_iface_by_encap(self, sup_sw_if_index, outer, dot1ad=True):
         """Returns the sw_if_index of an interface on a given super_sw_if_index with given dot1q/dot1ad outer and inner-dot1q=0,
         in other words the intermediary Dot1Q/Dot1AD belonging to a QinX interface. If the interface doesn't exist, None is
         returned."""
-        for idx, iface in self.vpp.cache["interfaces"].items():
-            if iface.sup_sw_if_index != sup_sw_if_index:
-                continue
-            if iface.sub_inner_vlan_id > 0:
-                continue
-            if dot1ad and (iface.sub_if_flags & 8) and iface.sub_outer_vlan_id == outer:
-                self.logger.debug(f"match: {iface.interface_name} (dot1ad)")
-                return idx
-            if (
-                not dot1ad
-                and not (iface.sub_if_flags & 8)
-                and iface.sub_outer_vlan_id == outer
-            ):
-                self.logger.debug(f"match: {iface.interface_name} (dot1q)")
-                return idx
-        return None
+        idx = self.vpp.get_sub_interface_by_encap(sup_sw_if_index, outer, dot1ad)
+        if idx is not None:
+            self.logger.debug(
+                f"match: {self.vpp.cache['interfaces'][idx].interface_name} ({'dot1ad' if dot1ad else 'dot1q'})"
+            )
+        return idx
 
     def __get_encapsulation(self, iface):
         """Return a dictionary-based encapsulation of the sub-interface, which helps comparing them to the same object
@@ -609,6 +652,7 @@ class Reconciler:
             "exact-match": bool(exact_match),
         }
 
+    @PROFILER.timed
     def __prune_lcps(self):
         """Remove LCPs which are not in the configuration, starting with QinQ/QinAD interfaces, then Dot1Q/Dot1AD,
         and finally PHYs/BondEthernets/Tunnels/Loopbacks. For QinX, special care is taken to ensure that
@@ -623,7 +667,7 @@ class Reconciler:
 
         removed_lcps = []
         for numtags in [2, 1, 0]:
-            for _idx, lcp_iface in lcps.items():
+            for _idx, lcp_iface in self.scope.items(self.vpp.cache, "lcps"):
                 vpp_iface = self.vpp.cache["interfaces"][lcp_iface.phy_sw_if_index]
                 if vpp_iface.sub_number_of_tags != numtags:
                     continue
@@ -719,14 +763,17 @@ class Reconciler:
             vpp_ifname = self.vpp.cache["interfaces"][
                 lcp_iface.phy_sw_if_index
             ].interface_name
-            cli = f"lcp delete {vpp_ifname}"
-            self.cli["prune"].append(cli)
+            self.plan.add("prune", "lcp_delete", vpp_ifname)
             self.vpp.cache_remove_lcp(lcp_iface.host_if_name)
         return True
 
+    @PROFILER.timed
     def __prune_admin_state(self):
         """Set admin-state down for all interfaces that are not in the config."""
-        for ifname in (
+        config_ifnames = set(
+            interface.get_interfaces(self.cfg) + loopback.get_loopbacks(self.cfg)
+        )
+        for ifname in self.scope.filter(
             self.vpp.get_qinx_interfaces()
             + self.vpp.get_dot1x_interfaces()
             + self.vpp.get_bondethernets()
@@ -734,9 +781,7 @@ class Reconciler:
             + self.vpp.get_vxlan_tunnels()
             + self.vpp.get_loopbacks()
         ):
-            if not ifname in interface.get_interfaces(
-                self.cfg
-            ) + loopback.get_loopbacks(self.cfg):
+            if not ifname in config_ifnames:
                 vpp_iface = self.vpp.get_interface_by_name(ifname)
                 if not vpp_iface:
                     continue
@@ -745,11 +790,11 @@ class Reconciler:
                     continue
 
                 if vpp_iface.flags & 1:  # IF_STATUS_API_FLAG_ADMIN_UP
-                    cli = f"set interface state {ifname} down"
-                    self.cli["prune"].append(cli)
+                    self.plan.add("prune", "set_interface_state", ifname, False)
 
         return True
 
+    @PROFILER.timed
     def create(self):
         """Create all objects in VPP that occur in the config but not in VPP. For an indepth
         explanation of how and why this particular pruning order is chosen, see README.md
@@ -776,57 +821,57 @@ class Reconciler:
         if not self.__create_lcps():
             self.logger.warning("Could not create LCPs in VPP")
             ret = False
+        if not self.__create_acls():
+            self.logger.warning("Could not create ACLs in VPP")
+            ret = False
         return ret
 
+    @PROFILER.timed
     def __create_loopbacks(self):
         """Create all loopbacks that occur in the config but not in VPP"""
-        for ifname in loopback.get_loopbacks(self.cfg):
+        for ifname in self.scope.filter(loopback.get_loopbacks(self.cfg)):
             if ifname in self.vpp.cache["interface_names"]:
                 continue
             instance = int(ifname[4:])
-            cli = f"create loopback interface instance {int(instance)}"
             ifname, iface = loopback.get_by_name(self.cfg, ifname)
-            if "mac" in iface:
-                cli += f" mac {iface['mac']}"
-            self.cli["create"].append(cli)
+            self.plan.add("create", "create_loopback_interface", instance, iface)
         return True
 
+    @PROFILER.timed
     def __create_bondethernets(self):
         """Create all bondethernets that occur in the config but not in VPP"""
-        for ifname in bondethernet.get_bondethernets(self.cfg):
+        for ifname in self.scope.filter(bondethernet.get_bondethernets(self.cfg)):
             if ifname in self.vpp.cache["interface_names"]:
                 continue
             ifname, iface = bondethernet.get_by_name(self.cfg, ifname)
             instance = int(ifname[12:])
             mode = bondethernet.get_mode(self.cfg, ifname)
-            cli = f"create bond id {int(instance)} mode {mode}"
+            config = {"mode": mode}
             loadbalance = bondethernet.get_lb(self.cfg, ifname)
             if loadbalance:
-                cli += f" load-balance {loadbalance}"
+                config["load-balance"] = loadbalance
             if "mac" in iface:
-                cli += f" hw-addr {iface['mac']}"
-            self.cli["create"].append(cli)
+                config["mac"] = iface["mac"]
+            self.plan.add("create", "create_bond", instance, config)
         return True
 
+    @PROFILER.timed
     def __create_vxlan_tunnels(self):
         """Create all vxlan_tunnels that occur in the config but not in VPP"""
-        for ifname in vxlan_tunnel.get_vxlan_tunnels(self.cfg):
+        for ifname in self.scope.filter(vxlan_tunnel.get_vxlan_tunnels(self.cfg)):
             if ifname in self.vpp.cache["interface_names"]:
                 continue
             ifname, iface = vxlan_tunnel.get_by_name(self.cfg, ifname)
             instance = int(ifname[12:])
-            cli = (
-                f"create vxlan tunnel src {iface['local']} dst {iface['remote']} "
-                f"instance {instance} vni {iface['vni']} decap-next l2"
-            )
-            self.cli["create"].append(cli)
+            self.plan.add("create", "create_vxlan_tunnel", instance, iface)
         return True
 
+    @PROFILER.timed
     def __create_sub_interfaces(self):
         """Create all sub-interfaces that occur in the config but not in VPP"""
         ## First create 1-tag (Dot1Q/Dot1AD), and then create 2-tag (Qin*) sub-interfaces
         for do_qinx in [False, True]:
-            for ifname in interface.get_sub_interfaces(self.cfg):
+            for ifname in self.scope.filter(interface.get_sub_interfaces(self.cfg)):
                 if not do_qinx == interface.is_qinx(self.cfg, ifname):
                     continue
 
@@ -834,80 +879,53 @@ class Reconciler:
                 if ifname in self.vpp.cache["interface_names"]:
                     continue
 
-                ## Assemble the encapsulation string
                 encap = interface.get_encapsulation(self.cfg, ifname)
-                if encap["dot1ad"] > 0:
-                    encapstr = f"dot1ad {int(encap['dot1ad'])}"
-                else:
-                    encapstr = f"dot1q {int(encap['dot1q'])}"
-                if do_qinx:
-                    encapstr += f" inner-dot1q {int(encap['inner-dot1q'])}"
-                if encap["exact-match"]:
-                    encapstr += " exact-match"
                 parent, subid = ifname.split(".")
-                cli = f"create sub {parent} {int(int(subid))} {encapstr}"
-                self.cli["create"].append(cli)
+                self.plan.add(
+                    "create",
+                    "create_subinterface",
+                    parent,
+                    int(subid),
+                    {"encapsulation": encap},
+                )
         return True
 
+    @PROFILER.timed
     def __create_taps(self):
         """Create all taps that occur in the config but not in VPP"""
-        for ifname in tap.get_taps(self.cfg):
+        for ifname in self.scope.filter(tap.get_taps(self.cfg)):
             ifname, iface = tap.get_by_name(self.cfg, ifname)
             if ifname in self.vpp.cache["interface_names"]:
                 continue
             instance = int(ifname[3:])
-            cli = f"create tap id {int(instance)} host-if-name {iface['host']['name']}"
-            if "mac" in iface["host"]:
-                cli += f" host-mac-addr {iface['host']['mac']}"
-            if "namespace" in iface["host"]:
-                cli += f" host-ns {int(iface['host']['namespace'])}"
-            if "bridge" in iface["host"]:
-                cli += f" host-bridge {iface['host']['bridge']}"
-            if "mtu" in iface["host"]:
-                cli += f" host-mtu-size {int(iface['host']['mtu'])}"
-            if "rx-ring-size" in iface:
-                cli += f" rx-ring-size {int(iface['rx-ring-size'])}"
-            if "tx-ring-size" in iface:
-                cli += f" tx-ring-size {int(iface['tx-ring-size'])}"
-            self.cli["create"].append(cli)
+            self.plan.add("create", "create_tap", instance, iface)
 
         return True
 
+    @PROFILER.timed
     def __create_bridgedomains(self):
         """Create all bridgedomains that occur in the config but not in VPP"""
-        for ifname in bridgedomain.get_bridgedomains(self.cfg):
+        for ifname in self.scope.filter(bridgedomain.get_bridgedomains(self.cfg)):
             ifname, _iface = bridgedomain.get_by_name(self.cfg, ifname)
             instance = int(ifname[2:])
             settings = bridgedomain.get_settings(self.cfg, ifname)
             if instance in self.vpp.cache["bridgedomains"]:
                 continue
-            cli = f"create bridge-domain {instance}"
-            if not settings["learn"]:
-                cli += " learn 0"
-            if not settings["unicast-flood"]:
-                cli += " flood 0"
-            if not settings["unknown-unicast-flood"]:
-                cli += " uu-flood 0"
-            if not settings["unicast-forward"]:
-                cli += " forward 0"
-            if settings["arp-termination"]:
-                cli += " arp-term 1"
-            if settings["arp-unicast-forward"]:
-                cli += " arp-ufwd 1"
-            if settings["mac-age-minutes"] > 0:
-                cli += f" mac-age {int(settings['mac-age-minutes'])}"
-            self.cli["create"].append(cli)
+            self.plan.add(
+                "create", "create_bridgedomain", instance, {"settings": settings}
+            )
         return True
 
+    @PROFILER.timed
     def __create_lcps(self):
         """Create all LCPs that occur in the config but not in VPP"""
-        lcpnames = [
+        lcpnames = {
             self.vpp.cache["lcps"][x].host_if_name for x in self.vpp.cache["lcps"]
-        ]
+        }
 
         ## First create untagged ...
-        for ifname in loopback.get_loopbacks(self.cfg) + interface.get_interfaces(
-            self.cfg
+        for ifname in self.scope.filter(
+            loopback.get_loopbacks(self.cfg) + interface.get_interfaces(self.cfg)
         ):
             if interface.is_sub(self.cfg, ifname):
                 continue
@@ -920,12 +938,11 @@ class Reconciler:
                 continue
             if iface["lcp"] in lcpnames:
                 continue
-            cli = f"lcp create {ifname} host-if {iface['lcp']}"
-            self.cli["create"].append(cli)
+            self.plan.add("create", "lcp_create", ifname, iface["lcp"])
 
         ## ... then 1-tag (Dot1Q/Dot1AD), and then create 2-tag (Qin*) LCPs
         for do_qinx in [False, True]:
-            for ifname in interface.get_sub_interfaces(self.cfg):
+            for ifname in self.scope.filter(interface.get_sub_interfaces(self.cfg)):
                 if not do_qinx == interface.is_qinx(self.cfg, ifname):
                     continue
                 ifname, iface = interface.get_by_name(self.cfg, ifname)
@@ -933,10 +950,17 @@ class Reconciler:
                     continue
                 if iface["lcp"] in lcpnames:
                     continue
-                cli = f"lcp create {ifname} host-if {iface['lcp']}"
-                self.cli["create"].append(cli)
+                self.plan.add("create", "lcp_create", ifname, iface["lcp"])
         return True
 
+    @PROFILER.timed
+    def __create_acls(self):
+        """Create all ACLs that occur in the config but not in VPP, see acls.create()"""
+        if "acls" not in self.scope:
+            return True
+        return acls.create(self.cfg, self.vpp, self.plan)
+
+    @PROFILER.timed
     def sync(self):
         """Synchronize the VPP Dataplane configuration for all objects in the config"""
         ret = True
@@ -970,14 +994,18 @@ class Reconciler:
         if not self.__sync_sflow_state():
             self.logger.warning("Could not sync interface sFlow state in VPP")
             ret = False
+        if not self.__sync_acls():
+            self.logger.warning("Could not sync ACLs in VPP")
+            ret = False
         if not self.__sync_admin_state():
             self.logger.warning("Could not sync interface adminstate in VPP")
             ret = False
         return ret
 
+    @PROFILER.timed
     def __sync_loopbacks(self):
         """Synchronize the VPP Dataplane configuration for loopbacks"""
-        for ifname in loopback.get_loopbacks(self.cfg):
+        for ifname in self.scope.filter(loopback.get_loopbacks(self.cfg)):
             if not ifname in self.vpp.cache["interface_names"]:
                 ## New loopback
                 continue
@@ -989,13 +1017,15 @@ class Reconciler:
             if "mac" in config_iface and config_iface["mac"] != str(
                 vpp_iface.l2_address
             ):
-                cli = f"set interface mac address {config_ifname} {config_iface['mac']}"
-                self.cli["sync"].append(cli)
+                self.plan.add(
+                    "sync", "set_interface_mac", config_ifname, config_iface["mac"]
+                )
         return True
 
+    @PROFILER.timed
     def __sync_phys(self):
         """Synchronize the VPP Dataplane configuration for PHYs"""
-        for ifname in interface.get_phys(self.cfg):
+        for ifname in self.scope.filter(interface.get_phys(self.cfg)):
             if not ifname in self.vpp.cache["interface_names"]:
                 ## New interface
                 continue
@@ -1007,13 +1037,15 @@ class Reconciler:
             if "mac" in config_iface and config_iface["mac"] != str(
                 vpp_iface.l2_address
             ):
-                cli = f"set interface mac address {config_ifname} {config_iface['mac']}"
-                self.cli["sync"].append(cli)
+                self.plan.add(
+                    "sync", "set_interface_mac", config_ifname, config_iface["mac"]
+                )
         return True
 
+    @PROFILER.timed
     def __sync_bondethernets(self):
         """Synchronize the VPP Dataplane configuration for bondethernets"""
-        for ifname in bondethernet.get_bondethernets(self.cfg):
+        for ifname in self.scope.filter(bondethernet.get_bondethernets(self.cfg)):
             vpp_iface = self.vpp.get_interface_by_name(ifname)
             if vpp_iface:
                 vpp_members = [
@@ -1045,15 +1077,17 @@ class Reconciler:
                         and member_iface.l2_address != "00:00:00:00:00:00"
                     ):
                         bondmac = member_iface.l2_address
-                    cli = f"bond add {config_bond_ifname} {member_ifname}"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync", "bond_add_member", config_bond_ifname, member_ifname
+                    )
             if (
                 vpp_iface
                 and "mac" in config_iface
                 and str(vpp_iface.l2_address) != config_iface["mac"]
             ):
-                cli = f"set interface mac address {config_ifname} {config_iface['mac']}"
-                self.cli["sync"].append(cli)
+                self.plan.add(
+                    "sync", "set_interface_mac", config_ifname, config_iface["mac"]
+                )
             elif bondmac and "lcp" in config_iface:
                 ## TODO(pim) - Ensure LCP has the same MAC as the BondEthernet
                 ## VPP, when creating a BondEthernet, will give it an ephemeral MAC. Then, when the
@@ -1061,15 +1095,17 @@ class Reconciler:
                 ## However, LinuxCP does not propagate this change to the Linux side (because there
                 ## is no API callback for MAC address changes). To ensure consistency, every time we
                 ## sync members, we ought to ensure the Linux device has the same MAC as its BondEthernet.
-                cli = (
-                    f"comment {{ ip link set {config_iface['lcp']} address {bondmac} }}"
+                self.plan.add(
+                    "sync",
+                    "comment",
+                    f"ip link set {config_iface['lcp']} address {bondmac}",
                 )
-                self.cli["sync"].append(cli)
         return True
 
+    @PROFILER.timed
     def __sync_bridgedomains(self):
         """Synchronize the VPP Dataplane configuration for bridgedomains"""
-        for ifname in bridgedomain.get_bridgedomains(self.cfg):
+        for ifname in self.scope.filter(bridgedomain.get_bridgedomains(self.cfg)):
             instance = int(ifname[2:])
             if instance in self.vpp.cache["bridgedomains"]:
                 vpp_bridge = self.vpp.cache["bridgedomains"][instance]
@@ -1095,45 +1131,62 @@ class Reconciler:
                 # Sync settings on existing bridge. __create_bridgedomain() will have set them for new bridges.
                 settings = bridgedomain.get_settings(self.cfg, config_bridge_ifname)
                 if settings["learn"] != vpp_bridge.learn:
-                    cli = f"set bridge-domain learn {int(instance)}"
-                    if not settings["learn"]:
-                        cli += " disable"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_bridgedomain_settings",
+                        instance,
+                        {"learn": settings["learn"]},
+                    )
                 if settings["unicast-forward"] != vpp_bridge.forward:
-                    cli = f"set bridge-domain forward {int(instance)}"
-                    if not settings["unicast-forward"]:
-                        cli += " disable"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_bridgedomain_settings",
+                        instance,
+                        {"unicast-forward": settings["unicast-forward"]},
+                    )
                 if settings["unicast-flood"] != vpp_bridge.flood:
-                    cli = f"set bridge-domain flood {int(instance)}"
-                    if not settings["unicast-flood"]:
-                        cli += " disable"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_bridgedomain_settings",
+                        instance,
+                        {"unicast-flood": settings["unicast-flood"]},
+                    )
                 if settings["unknown-unicast-flood"] != vpp_bridge.uu_flood:
-                    cli = f"set bridge-domain uu-flood {int(instance)}"
-                    if not settings["unknown-unicast-flood"]:
-                        cli += " disable"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_bridgedomain_settings",
+                        instance,
+                        {"unknown-unicast-flood": settings["unknown-unicast-flood"]},
+                    )
                 if settings["arp-termination"] != vpp_bridge.arp_term:
-                    cli = f"set bridge-domain arp term {int(instance)}"
-                    if not settings["arp-termination"]:
-                        cli += " disable"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_bridgedomain_settings",
+                        instance,
+                        {"arp-termination": settings["arp-termination"]},
+                    )
                 if settings["arp-unicast-forward"] != vpp_bridge.arp_ufwd:
-                    cli = f"set bridge-domain arp-ufwd {int(instance)}"
-                    if not settings["arp-unicast-forward"]:
-                        cli += " disable"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_bridgedomain_settings",
+                        instance,
+                        {"arp-unicast-forward": settings["arp-unicast-forward"]},
+                    )
                 if settings["mac-age-minutes"] != vpp_bridge.mac_age:
-                    cli = f"set bridge-domain mac-age {int(instance)} {int(settings['mac-age-minutes'])}"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_bridgedomain_settings",
+                        instance,
+                        {"mac-age-minutes": settings["mac-age-minutes"]},
+                    )
 
             if "bvi" in config_bridge_iface:
                 bviname = config_bridge_iface["bvi"]
                 bvi_iface = self.vpp.get_interface_by_name(bviname)
                 if not bvi_iface or bvi_iface.sw_if_index != bvi_sw_if_index:
-                    cli = f"set interface l2 bridge {bviname} {int(instance)} bvi"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync", "set_interface_l2_bridge_bvi", int(instance), bviname
+                    )
 
             if "interfaces" in config_bridge_iface:
                 for member_ifname in config_bridge_iface["interfaces"]:
@@ -1141,22 +1194,29 @@ class Reconciler:
                         self.cfg, member_ifname
                     )
                     if not member_ifname in bridge_members:
-                        cli = f"set interface l2 bridge {member_ifname} {int(instance)}"
-                        self.cli["sync"].append(cli)
-                        operation = "disable"
+                        self.plan.add(
+                            "sync",
+                            "set_interface_l2_bridge",
+                            int(instance),
+                            member_ifname,
+                        )
+                        operation = L2_VTR_DISABLED
                         if interface.is_qinx(self.cfg, member_ifname):
-                            operation = "pop 2"
+                            operation = L2_VTR_POP_2
                         elif interface.is_sub(self.cfg, member_ifname):
-                            operation = "pop 1"
-                        cli = (
-                            f"set interface l2 tag-rewrite {member_ifname} {operation}"
+                            operation = L2_VTR_POP_1
+                        self.plan.add(
+                            "sync",
+                            "set_interface_l2_tag_rewrite",
+                            member_ifname,
+                            operation,
                         )
-                        self.cli["sync"].append(cli)
         return True
 
+    @PROFILER.timed
     def __sync_l2xcs(self):
         """Synchronize the VPP Dataplane configuration for L2 cross connects"""
-        for ifname in interface.get_l2xc_interfaces(self.cfg):
+        for ifname in self.scope.filter(interface.get_l2xc_interfaces(self.cfg)):
             config_rx_ifname, config_rx_iface = interface.get_by_name(self.cfg, ifname)
             config_tx_ifname, _config_tx_iface = interface.get_by_name(
                 self.cfg, config_rx_iface["l2xc"]
@@ -1176,16 +1236,18 @@ class Reconciler:
                 l2xc_changed = True
 
             if l2xc_changed:
-                cli = f"set interface l2 xconnect {config_rx_ifname} {config_tx_ifname}"
-                self.cli["sync"].append(cli)
+                self.plan.add(
+                    "sync", "set_interface_l2xc", config_rx_ifname, config_tx_ifname
+                )
 
-                operation = "disable"
+                operation = L2_VTR_DISABLED
                 if interface.is_qinx(self.cfg, config_rx_ifname):
-                    operation = "pop 2"
+                    operation = L2_VTR_POP_2
                 elif interface.is_sub(self.cfg, config_rx_ifname):
-                    operation = "pop 1"
-                cli = f"set interface l2 tag-rewrite {config_rx_ifname} {operation}"
-                self.cli["sync"].append(cli)
+                    operation = L2_VTR_POP_1
+                self.plan.add(
+                    "sync", "set_interface_l2_tag_rewrite", config_rx_ifname, operation
+                )
         return True
 
     def __sync_mtu_direction(self, shrink=True):
@@ -1198,8 +1260,8 @@ class Reconciler:
             tag_list = [0, 1, 2]
 
         for numtags in tag_list:
-            for ifname in loopback.get_loopbacks(self.cfg) + interface.get_interfaces(
-                self.cfg
+            for ifname in self.scope.filter(
+                loopback.get_loopbacks(self.cfg) + interface.get_interfaces(self.cfg)
             ):
                 if numtags == 0 and interface.is_sub(self.cfg, ifname):
                     continue
@@ -1228,18 +1290,20 @@ class Reconciler:
                     config_mtu = interface.get_mtu(self.cfg, ifname)
 
                 if shrink and config_mtu < vpp_mtu:
-                    cli = f"set interface mtu packet {int(config_mtu)} {vpp_ifname}"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync", "set_interface_packet_mtu", vpp_ifname, int(config_mtu)
+                    )
                 elif not shrink and config_mtu > vpp_mtu:
-                    cli = f"set interface mtu packet {int(config_mtu)} {vpp_ifname}"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync", "set_interface_packet_mtu", vpp_ifname, int(config_mtu)
+                    )
         return True
 
     def __sync_link_mtu_direction(self, shrink=True):
         """Synchronize the VPP Dataplane max frame size (link MTU), where 'shrink' determines the
         direction (if shrink is True, go from inner-most (QinQ) to outer-most (untagged),
         and the other direction if shrink is False"""
-        for _idx, vpp_iface in self.vpp.cache["interfaces"].items():
+        for _idx, vpp_iface in self.scope.items(self.vpp.cache, "interfaces"):
             if vpp_iface.sub_number_of_tags != 0:
                 continue
             if vpp_iface.interface_dev_type in ["local", "Loopback", "VXLAN", "virtio"]:
@@ -1270,29 +1334,42 @@ class Reconciler:
             if shrink and config_mtu < vpp_iface.link_mtu:
                 ## If the interface is up, temporarily down it in order to change the Max Frame Size
                 if vpp_iface.flags & 1:  # IF_STATUS_API_FLAG_ADMIN_UP
-                    cli = f"set interface state {vpp_iface.interface_name} down"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync", "set_interface_state", vpp_iface.interface_name, False
+                    )
 
-                cli = f"set interface mtu {int(config_mtu)} {vpp_iface.interface_name}"
-                self.cli["sync"].append(cli)
+                self.plan.add(
+                    "sync",
+                    "set_interface_link_mtu",
+                    vpp_iface.interface_name,
+                    int(config_mtu),
+                )
 
                 if vpp_iface.flags & 1:  # IF_STATUS_API_FLAG_ADMIN_UP
-                    cli = f"set interface state {vpp_iface.interface_name} up"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync", "set_interface_state", vpp_iface.interface_name, True
+                    )
             elif not shrink and config_mtu > vpp_iface.link_mtu:
                 ## If the interface is up, temporarily down it in order to change the Max Frame Size
                 if vpp_iface.flags & 1:  # IF_STATUS_API_FLAG_ADMIN_UP
-                    cli = f"set interface state {vpp_iface.interface_name} down"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync", "set_interface_state", vpp_iface.interface_name, False
+                    )
 
-                cli = f"set interface mtu {int(config_mtu)} {vpp_iface.interface_name}"
-                self.cli["sync"].append(cli)
+                self.plan.add(
+                    "sync",
+                    "set_interface_link_mtu",
+                    vpp_iface.interface_name,
+                    int(config_mtu),
+                )
 
                 if vpp_iface.flags & 1:  # IF_STATUS_API_FLAG_ADMIN_UP
-                    cli = f"set interface state {vpp_iface.interface_name} up"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync", "set_interface_state", vpp_iface.interface_name, True
+                    )
         return True
 
+    @PROFILER.timed
     def __sync_mtu(self):
         """Synchronize the VPP Dataplane configuration for interface MTU"""
         ret = True
@@ -1314,33 +1391,43 @@ class Reconciler:
             ret = False
         return ret
 
+    @PROFILER.timed
     def __sync_sflow_state(self):
         """Synchronize the VPP Dataplane configuration and phy sFlow state"""
 
-        if "sflow" in self.cfg and self.vpp.cache["sflow"]:
+        if "sflow" in self.cfg and self.vpp.cache["sflow"] and "sflow" in self.scope:
             if "header-bytes" in self.cfg["sflow"]:
                 if (
                     self.vpp.cache["sflow"]["header-bytes"]
                     != self.cfg["sflow"]["header-bytes"]
                 ):
-                    cli = f"sflow header-bytes {self.cfg['sflow']['header-bytes']}"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_sflow",
+                        {"header-bytes": self.cfg["sflow"]["header-bytes"]},
+                    )
             if "polling-interval" in self.cfg["sflow"]:
                 if (
                     self.vpp.cache["sflow"]["polling-interval"]
                     != self.cfg["sflow"]["polling-interval"]
                 ):
-                    cli = f"sflow polling-interval {self.cfg['sflow']['polling-interval']}"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_sflow",
+                        {"polling-interval": self.cfg["sflow"]["polling-interval"]},
+                    )
             if "sampling-rate" in self.cfg["sflow"]:
                 if (
                     self.vpp.cache["sflow"]["sampling-rate"]
                     != self.cfg["sflow"]["sampling-rate"]
                 ):
-                    cli = f"sflow sampling-rate {self.cfg['sflow']['sampling-rate']}"
-                    self.cli["sync"].append(cli)
+                    self.plan.add(
+                        "sync",
+                        "set_sflow",
+                        {"sampling-rate": self.cfg["sflow"]["sampling-rate"]},
+                    )
 
-        for ifname in interface.get_interfaces(self.cfg):
+        for ifname in self.scope.filter(interface.get_interfaces(self.cfg)):
             vpp_ifname, config_iface = interface.get_by_name(self.cfg, ifname)
 
             try:
@@ -1356,17 +1443,23 @@ class Reconciler:
                 except KeyError:
                     pass
             if vpp_sflow != config_sflow:
-                if config_sflow:
-                    cli = f"sflow enable {vpp_ifname}"
-                else:
-                    cli = f"sflow enable-disable {vpp_ifname} disable"
-                self.cli["sync"].append(cli)
+                self.plan.add(
+                    "sync", "set_interface_sflow", vpp_ifname, bool(config_sflow)
+                )
         return True
 
+    @PROFILER.timed
+    def __sync_acls(self):
+        """Synchronize the VPP Dataplane configuration for ACLs, see acls.sync()"""
+        if "acls" not in self.scope:
+            return True
+        return acls.sync(self.cfg, self.vpp, self.plan)
+
+    @PROFILER.timed
     def __sync_mpls_state(self):
         """Synchronize the VPP Dataplane configuration for interface and loopback MPLS state"""
-        for ifname in loopback.get_loopbacks(self.cfg) + interface.get_interfaces(
-            self.cfg
+        for ifname in self.scope.filter(
+            loopback.get_loopbacks(self.cfg) + interface.get_interfaces(self.cfg)
         ):
             if ifname.startswith("loop"):
                 vpp_ifname, config_iface = loopback.get_by_name(self.cfg, ifname)
@@ -1386,17 +1479,16 @@ class Reconciler:
                 except KeyError:
                     pass
             if vpp_mpls != config_mpls:
-                state = "disable"
-                if config_mpls:
-                    state = "enable"
-                cli = f"set interface mpls {vpp_ifname} {state}"
-                self.cli["sync"].append(cli)
+                self.plan.add(
+                    "sync", "set_interface_mpls", vpp_ifname, bool(config_mpls)
+                )
         return True
 
+    @PROFILER.timed
     def __sync_unnumbered(self):
         """Synchronize the VPP Dataplane configuration for unnumbered interface"""
-        for ifname in loopback.get_loopbacks(self.cfg) + interface.get_interfaces(
-            self.cfg
+        for ifname in self.scope.filter(
+            loopback.get_loopbacks(self.cfg) + interface.get_interfaces(self.cfg)
         ):
             if ifname.startswith("loop"):
                 config_ifname, config_iface = loopback.get_by_name(self.cfg, ifname)
@@ -1423,9 +1515,10 @@ class Reconciler:
                     vpp_iface
                     and vpp_iface.sw_if_index in self.vpp.cache["interface_unnumbered"]
                 ):
-                    cli = f"set interface unnumbered del {config_ifname}"
-                    self.cli["sync"].append(cli)
-                    del self.vpp.cache["interface_unnumbered"][vpp_iface.sw_if_index]
+                    self.plan.add(
+                        "sync", "set_interface_unnumbered", config_ifname, None, False
+                    )
+                    self.vpp.cache_remove_unnumbered(config_ifname)
                     continue
                 continue
 
@@ -1440,15 +1533,20 @@ class Reconciler:
                 ):
                     continue
 
-            cli = f"set interface unnumbered {config_ifname} use {config_unnumbered_ifname}"
-            self.cli["sync"].append(cli)
+            self.plan.add(
+                "sync",
+                "set_interface_unnumbered",
+                config_ifname,
+                config_unnumbered_ifname,
+            )
 
         return True
 
+    @PROFILER.timed
     def __sync_addresses(self):
         """Synchronize the VPP Dataplane configuration for interface addresses"""
-        for ifname in loopback.get_loopbacks(self.cfg) + interface.get_interfaces(
-            self.cfg
+        for ifname in self.scope.filter(
+            loopback.get_loopbacks(self.cfg) + interface.get_interfaces(self.cfg)
         ):
             config_addresses = []
             vpp_addresses = []
@@ -1472,14 +1570,14 @@ class Reconciler:
             for addr in config_addresses:
                 if addr in vpp_addresses:
                     continue
-                cli = f"set interface ip address {vpp_ifname} {addr}"
-                self.cli["sync"].append(cli)
+                self.plan.add("sync", "set_interface_ip_address", vpp_ifname, addr)
         return True
 
+    @PROFILER.timed
     def __sync_admin_state(self):
         """Synchronize the VPP Dataplane configuration for interface admin state"""
-        for ifname in interface.get_interfaces(self.cfg) + loopback.get_loopbacks(
-            self.cfg
+        for ifname in self.scope.filter(
+            interface.get_interfaces(self.cfg) + loopback.get_loopbacks(self.cfg)
         ):
             if ifname.startswith("loop"):
                 vpp_ifname, _config_iface = loopback.get_by_name(self.cfg, ifname)
@@ -1495,46 +1593,24 @@ class Reconciler:
 
             if config_admin_state == vpp_admin_state:
                 continue
-            state = "up"
-            if config_admin_state == 0:
-                state = "down"
-            cli = f"set interface state {vpp_ifname} {state}"
-            self.cli["sync"].append(cli)
-        return True
-
-    def write(self, outfile, emit_ok=False):
-        """Emit the CLI contents to stdout (if outfile=='-') or a named file otherwise.
-        If the 'emit_ok' flag is False, emit a warning at the top and bottom of the file.
-        """
-        # Assemble the intended output into a list
-        output = []
-        if not emit_ok:
-            output.append(
-                "comment { vppcfg: Planning failed, be careful with this output! }"
-            )
-
-        for phase in ["prune", "create", "sync"]:
-            ncount = len(self.cli[phase])
-            if ncount > 0:
-                output.append(
-                    f"comment {{ vppcfg {phase}: {ncount} CLI statement(s) follow }}"
-                )
-                output.extend(self.cli[phase])
-
-        if not emit_ok:
-            output.append(
-                "comment { vppcfg: Planning failed, be careful with this output! }"
+            self.plan.add(
+                "sync", "set_interface_state", vpp_ifname, config_admin_state != 0
             )
+        return True
 
-        # Emit the output list to stdout or a file
-        if outfile and outfile == "-":
-            file = sys.stdout
-            outfile = "(stdout)"
-        else:
-            file = open(outfile, "w", encoding="utf-8")
-        if len(output) > 0:
-            print("\n".join(output), file=file)
-        if file is not sys.stdout:
-            file.close()
-
-        self.logger.info(f"Wrote {len(output)} lines to {outfile}")
+    def iter_output(self, emit_ok=False):
+        """Return an iterator over the CLI contents of the plan, one line at a time, see
+        Plan.iter_cli()"""
+        return self.plan.iter_cli(emit_ok)
+
+    def write(self, outfile, emit_ok=False, output=None):
+        """Emit the CLI contents to stdout (if outfile=='-') or a named file otherwise,
+        see plan.write_lines(). If the 'emit_ok' flag is False, emit a warning at the
+        top and bottom of the file. If 'output' is given, emit the lines it iterates
+        over instead, see iter_output()."""
+        if output is None:
+            output = self.iter_output(emit_ok)
+        nlines = write_lines(outfile, output)
+        self.logger.info(
+            f"Wrote {nlines} lines to {outfile if outfile != '-' else '(stdout)'}"
+        )
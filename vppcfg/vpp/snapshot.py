@@ -0,0 +1,216 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file serialize a VPP config cache to a snapshot file, and read it
+back, so that changes can be planned against a VPP Dataplane without talking to it.
+
+A snapshot is a gzip compressed pickle of a dict with the metadata of the snapshot and
+the config cache, which only holds plain Python values and IP addresses. The VPP API
+replies in the cache are namedtuples, whose classes are generated by the VPP API, so
+they are stored as a tuple of the index of their type (its name and fields, kept in
+the 'types' list) and their values. Enums and flags are stored as integers, and other
+values, such as MAC addresses, as their string, to which they compare equal. Reading
+a snapshot does not need the VPP API, and only allows the classes of the ipaddress
+module to be unpickled, so it does not run any code from the snapshot.
+"""
+
+import gc
+import gzip
+import io
+import ipaddress
+import logging
+import pickle
+import socket
+import time
+from collections import namedtuple
+from vppcfg.profiler import PROFILER
+
+SNAPSHOT_VERSION = 1
+
+IP_CLASSES = (
+    ipaddress.IPv4Address,
+    ipaddress.IPv6Address,
+    ipaddress.IPv4Network,
+    ipaddress.IPv6Network,
+    ipaddress.IPv4Interface,
+    ipaddress.IPv6Interface,
+)
+
+CONTAINERS = (tuple, list, dict)
+
+
+def encode(cache):
+    """Return the list of namedtuple types, and the picklable form of the VPP config
+    cache 'cache'. Each type is a list of its name, its fields, and the indexes of the
+    fields that hold lists, dicts or namedtuples, which need to be decoded as well."""
+    types = {}
+    nested = []
+
+    def enc(value):
+        if value is None or type(value) in (bool, int, float, str, bytes):
+            return value
+        if isinstance(value, tuple) and hasattr(value, "_fields"):
+            typeid = types.setdefault((type(value).__name__, value._fields), len(types))
+            if typeid == len(nested):
+                nested.append(set())
+            ret = tuple(enc(item) for item in value)
+            for idx, item in enumerate(ret):
+                if isinstance(item, CONTAINERS):
+                    nested[typeid].add(idx)
+            return (typeid,) + ret
+        if isinstance(value, (list, tuple)):
+            return [enc(item) for item in value]
+        if isinstance(value, dict):
+            return {enc(key): enc(item) for key, item in value.items()}
+        if isinstance(value, int):
+            return int(value)
+        if isinstance(value, IP_CLASSES):
+            return value
+        return str(value)
+
+    tree = {table: enc(entries) for table, entries in cache.items()}
+    return [
+        [name, list(fields), sorted(nested[typeid])]
+        for (name, fields), typeid in types.items()
+    ], tree
+
+
+def decode(types, tree):
+    """Return the VPP config cache from its list of namedtuple types and its picklable
+    form, see encode()"""
+    classes = [
+        (namedtuple(name, fields, rename=True), nested)
+        for name, fields, nested in types
+    ]
+
+    def dec(value):
+        if isinstance(value, tuple):
+            cls, nested = classes[value[0]]
+            if not nested:
+                return cls._make(value[1:])
+            values = list(value[1:])
+            for idx in nested:
+                values[idx] = dec(values[idx])
+            return cls._make(values)
+        if isinstance(value, list):
+            if any(isinstance(item, CONTAINERS) for item in value):
+                return [dec(item) for item in value]
+            return value
+        if isinstance(value, dict):
+            return {
+                key: dec(item) if isinstance(item, CONTAINERS) else item
+                for key, item in value.items()
+            }
+        return value
+
+    return {table: dec(entries) for table, entries in tree.items()}
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    """An Unpickler that only allows the classes of IP addresses and prefixes"""
+
+    def find_class(self, module, name):
+        if module == "ipaddress" and name in [cls.__name__ for cls in IP_CLASSES]:
+            return getattr(ipaddress, name)
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a snapshot")
+
+
+def write(filename, cache, lcp_enabled):
+    """Write the VPP config cache 'cache' to a snapshot file. Raises OSError if it
+    cannot be written."""
+    types, tree = encode(cache)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "hostname": socket.gethostname(),
+        "created": int(time.time()),
+        "lcp_enabled": lcp_enabled,
+        "types": types,
+        "cache": tree,
+    }
+    with gzip.open(filename, "wb") as file:
+        pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read(filename):
+    """Read a snapshot file, and return its metadata and its VPP config cache. Raises
+    OSError if it cannot be read, and ValueError if it is not a valid snapshot."""
+    ## The snapshot is read into many small objects, none of which are garbage, so the
+    ## garbage collector is paused while reading it, rather than scanning them often.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with gzip.open(filename, "rb") as file:
+            data = io.BytesIO(file.read())
+        try:
+            snapshot = SnapshotUnpickler(data).load()
+        except (pickle.UnpicklingError, EOFError) as err:
+            raise ValueError(f"not a vppcfg snapshot: {err}") from err
+        if (
+            not isinstance(snapshot, dict)
+            or snapshot.get("version") != SNAPSHOT_VERSION
+        ):
+            raise ValueError("not a vppcfg snapshot, or of an unsupported version")
+        try:
+            cache = decode(snapshot.pop("types"), snapshot.pop("cache"))
+        except (KeyError, IndexError, TypeError) as err:
+            raise ValueError(f"invalid snapshot: {err!r}") from err
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return snapshot, cache
+
+
+@PROFILER.timed
+def load(vpp, filename):
+    """Read the VPP config cache of the VPPApi 'vpp' from a snapshot file, see save(),
+    without talking to a running VPP Dataplane. Like VPPApi.mockconfig(), this does not
+    mark the cache as read from VPP. Returns True upon success."""
+    logger = logging.getLogger("vppcfg.snapshot")
+    logger.addHandler(logging.NullHandler())
+
+    start = time.monotonic()
+    vpp.cache_clear()
+    try:
+        header, cache = read(filename)
+    except (OSError, EOFError, ValueError) as err:
+        logger.error(f"Could not read snapshot from {filename}: {err}")
+        return False
+    vpp.cache.update(cache)
+    vpp.cache_index_build()
+    vpp.lcp_enabled = header.get("lcp_enabled", False)
+    logger.info(
+        f"Read {len(vpp.cache['interfaces'])} interfaces from snapshot of {header.get('hostname')} in {time.monotonic() - start:.3f}s"
+    )
+    return True
+
+
+def save(vpp, filename):
+    """Write the VPP config cache of the VPPApi 'vpp' to a snapshot file, so that it can
+    be planned against later on, see load(). Returns True upon success."""
+    logger = logging.getLogger("vppcfg.snapshot")
+    logger.addHandler(logging.NullHandler())
+
+    if not vpp.cache_read:
+        logger.error("No VPP config cache to write a snapshot of")
+        return False
+    try:
+        write(filename, vpp.cache, vpp.lcp_enabled)
+    except OSError as err:
+        logger.error(f"Could not write snapshot to {filename}: {err}")
+        return False
+    logger.info(
+        f"Wrote snapshot of {len(vpp.cache['interfaces'])} interfaces to {filename}"
+    )
+    return True
@@ -0,0 +1,372 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+"""
+The functions in this file synthesize the VPP config cache of a VPP Dataplane that has
+a given vppcfg configuration applied to it, as VPPApi.readconfig() would read it. This
+allows planning from one configuration to another without a running VPP Dataplane.
+"""
+import time
+import logging
+import ipaddress
+from collections import namedtuple
+from vppcfg.config import acl
+from vppcfg.config import bondethernet
+from vppcfg.config import bridgedomain
+from vppcfg.config import interface
+from vppcfg.config import lcp
+from vppcfg.config import loopback
+from vppcfg.config import tap
+from vppcfg.config import vxlan_tunnel
+from vppcfg.config.index import IndexedConfig
+from vppcfg.profiler import PROFILER
+
+## Lightweight stand-ins for the VPP API messages used by VPPApi.mockconfig() and by
+## synthesize(), so that planning without a running VPP Dataplane does not need to
+## load the VPP API.
+MOCK_SW_INTERFACE_DETAILS_FIELDS = [
+    "sw_if_index",
+    "sup_sw_if_index",
+    "l2_address",
+    "flags",
+    "type",
+    "link_duplex",
+    "link_speed",
+    "sub_id",
+    "sub_number_of_tags",
+    "sub_outer_vlan_id",
+    "sub_inner_vlan_id",
+    "sub_if_flags",
+    "vtr_op",
+    "vtr_push_dot1q",
+    "vtr_tag1",
+    "vtr_tag2",
+    "outer_tag",
+    "link_mtu",
+    "mtu",
+    "interface_name",
+    "interface_dev_type",
+    "tag",
+]
+MockSwInterfaceDetails = namedtuple(
+    "sw_interface_details",
+    MOCK_SW_INTERFACE_DETAILS_FIELDS,
+    defaults=(None,) * len(MOCK_SW_INTERFACE_DETAILS_FIELDS),
+)
+MockAclInterfaceListDetails = namedtuple(
+    "acl_interface_list_details",
+    ["sw_if_index", "count", "n_input", "acls"],
+    defaults=(None,) * 4,
+)
+
+
+## Stand-ins for the VPP API messages that are kept in the VPP config cache, holding
+## the fields that vppcfg uses.
+LcpItfPairDetails = namedtuple(
+    "lcp_itf_pair_details",
+    ["phy_sw_if_index", "host_sw_if_index", "vif_index", "host_if_name", "netns"],
+)
+SwBondInterfaceDetails = namedtuple(
+    "sw_bond_interface_details",
+    ["sw_if_index", "id", "mode", "lb", "numa_only", "active_members", "members"]
+    + ["interface_name"],
+)
+BridgeDomainSwIf = namedtuple("bridge_domain_sw_if", ["sw_if_index", "shg"])
+BridgeDomainDetails = namedtuple(
+    "bridge_domain_details",
+    ["bd_id", "flood", "uu_flood", "forward", "learn", "arp_term", "arp_ufwd"]
+    + ["mac_age", "bd_tag", "bvi_sw_if_index", "n_sw_ifs", "sw_if_details"],
+)
+VxlanTunnelDetails = namedtuple(
+    "vxlan_tunnel_v2_details",
+    ["sw_if_index", "instance", "src_address", "dst_address", "src_port"]
+    + ["dst_port", "vni", "mcast_sw_if_index", "encap_vrf_id", "decap_next_index"],
+)
+L2XconnectDetails = namedtuple(
+    "l2_xconnect_details", ["rx_sw_if_index", "tx_sw_if_index"]
+)
+SwInterfaceTapDetails = namedtuple(
+    "sw_interface_tap_v2_details",
+    ["sw_if_index", "id", "dev_name", "tx_ring_sz", "rx_ring_sz", "host_mtu_size"]
+    + ["host_mac_addr", "tap_flags", "host_if_name", "host_namespace", "host_bridge"],
+)
+AclDetails = namedtuple("acl_details", ["acl_index", "tag", "count", "r"])
+
+DEV_TYPES = {
+    "local": "local",
+    "phy": "dpdk",
+    "bond": "bond",
+    "loopback": "Loopback",
+    "vxlan": "VXLAN",
+    "tap": "virtio",
+}
+
+
+class SyntheticVPP:
+    """Builds the VPP config cache of a VPPApi, one object at a time, the way VPP would
+    number and report them"""
+
+    def __init__(self, vpp):
+        self.vpp = vpp
+        self.cache = vpp.cache
+
+    def add_interface(self, ifname, dev_type, mtu, parent=None, encap=None):
+        """Add an interface to the VPP config cache, as a sub-interface of 'parent'
+        with the encapsulation 'encap' (see interface.get_encapsulation()) if given,
+        and return its sw_if_index"""
+        idx = len(self.cache["interfaces"])
+        sub_id, tags, outer, inner, flags = 0, 0, 0, 0, 0
+        sup_idx = idx
+        if parent:
+            sup_idx = self.cache["interface_names"][parent]
+            sub_id = int(ifname.split(".")[-1])
+            outer = encap["dot1ad"] or encap["dot1q"]
+            inner = encap["inner-dot1q"]
+            tags = 2 if inner else 1
+            flags = (4 if inner else 2) | (8 if encap["dot1ad"] else 0)
+            if encap["exact-match"]:
+                flags |= 16
+            dev_type = self.cache["interfaces"][sup_idx].interface_dev_type
+        self.cache["interfaces"][idx] = MockSwInterfaceDetails(
+            sw_if_index=idx,
+            sup_sw_if_index=sup_idx,
+            l2_address=f"02:fe:{idx >> 24 & 0xFF:02x}:{idx >> 16 & 0xFF:02x}:{idx >> 8 & 0xFF:02x}:{idx & 0xFF:02x}",
+            flags=0 if dev_type == "local" else 1,
+            type=0 if not parent else 1,
+            link_duplex=0,
+            link_speed=0,
+            sub_id=sub_id,
+            sub_number_of_tags=tags,
+            sub_outer_vlan_id=outer,
+            sub_inner_vlan_id=inner,
+            sub_if_flags=flags,
+            vtr_op=0,
+            vtr_push_dot1q=0,
+            vtr_tag1=0,
+            vtr_tag2=0,
+            outer_tag=0,
+            link_mtu=mtu,
+            mtu=[mtu, 0, 0, 0],
+            interface_name=ifname,
+            interface_dev_type=dev_type,
+            tag="",
+        )
+        self.cache["interface_names"][ifname] = idx
+        self.cache["interface_addresses"][idx] = []
+        self.cache["interface_acls"][idx] = MockAclInterfaceListDetails(
+            sw_if_index=idx, count=0, n_input=0, acls=[]
+        )
+        return idx
+
+    def add_bondethernet(self, yaml, ifname, mtu):
+        """Add a BondEthernet with its members to the VPP config cache"""
+        idx = self.add_interface(ifname, DEV_TYPES["bond"], mtu)
+        _ifname, iface = bondethernet.get_by_name(yaml, ifname)
+        members = [
+            self.cache["interface_names"][member]
+            for member in iface.get("interfaces", [])
+        ]
+        lb = bondethernet.get_lb(yaml, ifname)
+        self.cache["bondethernets"][idx] = SwBondInterfaceDetails(
+            sw_if_index=idx,
+            id=int(ifname[12:]),
+            mode=bondethernet.mode_to_int(bondethernet.get_mode(yaml, ifname)),
+            lb=bondethernet.lb_to_int(lb) if lb else 0,
+            numa_only=False,
+            active_members=len(members),
+            members=len(members),
+            interface_name=ifname,
+        )
+        self.cache["bondethernet_members"][idx] = members
+
+    def add_vxlan_tunnel(self, yaml, ifname, mtu):
+        """Add a VXLAN tunnel to the VPP config cache"""
+        idx = self.add_interface(ifname, DEV_TYPES["vxlan"], mtu)
+        _ifname, iface = vxlan_tunnel.get_by_name(yaml, ifname)
+        self.cache["vxlan_tunnels"][idx] = VxlanTunnelDetails(
+            sw_if_index=idx,
+            instance=int(ifname[12:]),
+            src_address=ipaddress.ip_address(iface["local"]),
+            dst_address=ipaddress.ip_address(iface["remote"]),
+            src_port=4789,
+            dst_port=4789,
+            vni=iface["vni"],
+            mcast_sw_if_index=0xFFFFFFFF,
+            encap_vrf_id=0,
+            decap_next_index=1,
+        )
+
+    def add_tap(self, ifname, mtu, host):
+        """Add a TAP to the VPP config cache, with the 'host' settings as in the
+        'taps' scope of the config, and return its sw_if_index"""
+        idx = self.add_interface(ifname, DEV_TYPES["tap"], mtu)
+        self.cache["taps"][idx] = SwInterfaceTapDetails(
+            sw_if_index=idx,
+            id=int(ifname[3:]),
+            dev_name=ifname,
+            tx_ring_sz=host.get("tx-ring-size", 256),
+            rx_ring_sz=host.get("rx-ring-size", 256),
+            host_mtu_size=host.get("mtu", 1500),
+            host_mac_addr=host.get("mac", self.cache["interfaces"][idx].l2_address),
+            tap_flags=0,
+            host_if_name=host["name"],
+            host_namespace=host.get("namespace", ""),
+            host_bridge=host.get("bridge", ""),
+        )
+        return idx
+
+    def add_lcp(self, ifname, host_if_name):
+        """Add the LCP with the name 'host_if_name' to the interface 'ifname', along
+        with the TAP that linux-cp creates for it"""
+        phy_idx = self.cache["interface_names"][ifname]
+        tap_id = 4096 + len(self.cache["lcps"])
+        mtu = self.cache["interfaces"][phy_idx].mtu[0]
+        host_idx = self.add_tap(f"tap{tap_id}", mtu, {"name": host_if_name, "mtu": mtu})
+        self.cache["lcps"][phy_idx] = LcpItfPairDetails(
+            phy_sw_if_index=phy_idx,
+            host_sw_if_index=host_idx,
+            vif_index=host_idx,
+            host_if_name=host_if_name,
+            netns="",
+        )
+
+    def add_bridgedomain(self, yaml, ifname):
+        """Add a bridgedomain with its members to the VPP config cache"""
+        _ifname, iface = bridgedomain.get_by_name(yaml, ifname)
+        settings = bridgedomain.get_settings(yaml, ifname)
+        bvi_idx = 0xFFFFFFFF
+        members = [
+            BridgeDomainSwIf(sw_if_index=self.cache["interface_names"][member], shg=0)
+            for member in iface.get("interfaces", [])
+        ]
+        if "bvi" in iface:
+            bvi_idx = self.cache["interface_names"][iface["bvi"]]
+            members.append(BridgeDomainSwIf(sw_if_index=bvi_idx, shg=0))
+        bd_id = int(ifname[2:])
+        self.cache["bridgedomains"][bd_id] = BridgeDomainDetails(
+            bd_id=bd_id,
+            flood=settings["unicast-flood"],
+            uu_flood=settings["unknown-unicast-flood"],
+            forward=settings["unicast-forward"],
+            learn=settings["learn"],
+            arp_term=settings["arp-termination"],
+            arp_ufwd=settings["arp-unicast-forward"],
+            mac_age=settings["mac-age-minutes"],
+            bd_tag="",
+            bvi_sw_if_index=bvi_idx,
+            n_sw_ifs=len(members),
+            sw_if_details=members,
+        )
+
+    def add_acl(self, yaml, aclname):
+        """Add an ACL to the VPP config cache, with the rules that it compiles into"""
+        rules = acl.get_rules(yaml, aclname) or []
+        acl_index = len(self.cache["acls"])
+        self.cache["acls"][acl_index] = AclDetails(
+            acl_index=acl_index, tag=acl.get_tag(aclname), count=len(rules), r=rules
+        )
+
+
+@PROFILER.timed
+def synthesize(vpp, yaml):
+    """Fill the VPP config cache of 'vpp' with the state of a VPP Dataplane that has the
+    (valid) configuration 'yaml' applied to it, as VPPApi.readconfig() would read it,
+    without talking to a running VPP Dataplane. Unlike VPPApi.mockconfig(), this
+    includes its loopbacks, BondEthernets, sub-interfaces, bridgedomains, LCPs,
+    addresses and so on, so that the Reconciler can plan from one configuration to
+    another, and has next to nothing left to do for 'yaml' itself. Like mockconfig(),
+    this does not mark the cache as read from VPP. Returns True."""
+    logger = logging.getLogger("vppcfg.synthetic")
+    logger.addHandler(logging.NullHandler())
+
+    start = time.monotonic()
+    if not isinstance(yaml, IndexedConfig):
+        yaml = IndexedConfig(yaml)
+    vpp.cache_clear()
+    state = SyntheticVPP(vpp)
+    state.add_interface("local0", DEV_TYPES["local"], 0)
+    for ifname in interface.get_phys(yaml):
+        state.add_interface(ifname, DEV_TYPES["phy"], interface.get_mtu(yaml, ifname))
+    for ifname in bondethernet.get_bondethernets(yaml):
+        state.add_bondethernet(yaml, ifname, interface.get_mtu(yaml, ifname))
+    for ifname in loopback.get_loopbacks(yaml):
+        _ifname, iface = loopback.get_by_name(yaml, ifname)
+        state.add_interface(ifname, DEV_TYPES["loopback"], iface.get("mtu", 1500))
+    for ifname in vxlan_tunnel.get_vxlan_tunnels(yaml):
+        state.add_vxlan_tunnel(yaml, ifname, interface.get_mtu(yaml, ifname))
+    for ifname in tap.get_taps(yaml):
+        _ifname, iface = tap.get_by_name(yaml, ifname)
+        state.add_tap(ifname, interface.get_mtu(yaml, ifname), iface["host"])
+    for numtags in [1, 2]:
+        for ifname in interface.get_sub_interfaces(yaml):
+            encap = interface.get_encapsulation(yaml, ifname)
+            if (2 if encap["inner-dot1q"] else 1) != numtags:
+                continue
+            state.add_interface(
+                ifname,
+                None,
+                interface.get_mtu(yaml, ifname),
+                parent=ifname.split(".")[0],
+                encap=encap,
+            )
+
+    ifaces = {}
+    for ifname in interface.get_interfaces(yaml):
+        ifaces[ifname] = interface.get_by_name(yaml, ifname)[1]
+    for ifname in loopback.get_loopbacks(yaml):
+        ifaces[ifname] = loopback.get_by_name(yaml, ifname)[1]
+    for ifname, iface in ifaces.items():
+        idx = vpp.cache["interface_names"][ifname]
+        vpp_iface = vpp.cache["interfaces"][idx]
+        if iface.get("state", "up") == "down":
+            vpp_iface = vpp_iface._replace(flags=0)
+        if "mac" in iface:
+            vpp_iface = vpp_iface._replace(l2_address=iface["mac"])
+        vpp.cache["interfaces"][idx] = vpp_iface
+        if "addresses" in iface:
+            ## VPP returns the IPv4 addresses before the IPv6 ones
+            vpp.cache["interface_addresses"][idx] = sorted(
+                iface["addresses"], key=lambda addr: ":" in addr
+            )
+        if "unnumbered" in iface:
+            vpp.cache["interface_unnumbered"][idx] = vpp.cache["interface_names"][
+                iface["unnumbered"]
+            ]
+        if iface.get("mpls"):
+            vpp.cache["interface_mpls"][idx] = True
+        if iface.get("sflow"):
+            vpp.cache["interface_sflow"][idx] = True
+        if "l2xc" in iface:
+            vpp.cache["l2xcs"][idx] = L2XconnectDetails(
+                rx_sw_if_index=idx,
+                tx_sw_if_index=vpp.cache["interface_names"][iface["l2xc"]],
+            )
+    for lcpname in lcp.get_lcps(yaml, bridgedomains=False):
+        ifname, _iface = interface.get_by_lcp_name(yaml, lcpname)
+        if not ifname:
+            ifname, _iface = loopback.get_by_lcp_name(yaml, lcpname)
+        state.add_lcp(ifname, lcpname)
+
+    for ifname in bridgedomain.get_bridgedomains(yaml):
+        state.add_bridgedomain(yaml, ifname)
+    for aclname in acl.get_acls(yaml):
+        state.add_acl(yaml, aclname)
+    vpp.cache["sflow"] = dict(yaml.get("sflow", {}))
+
+    vpp.cache_index_build()
+    vpp.lcp_enabled = True
+    logger.info(
+        f"Synthesized {len(vpp.cache['interfaces'])} interfaces in {time.monotonic() - start:.3f}s"
+    )
+    return True
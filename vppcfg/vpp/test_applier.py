@@ -0,0 +1,165 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for applying a plan to VPP """
+import unittest
+from collections import deque, namedtuple
+from types import SimpleNamespace
+from .applier import Applier, IF_STATUS_API_FLAG_ADMIN_UP
+from .plan import Plan
+
+StubReply = namedtuple("stub_reply", ["context", "retval", "sw_if_index"])
+
+
+class StubVPPApiClient:
+    """A stand-in for VPPApiClient, which records the API calls that are sent, and
+    answers each of them with a reply once it is read. Interfaces that are created
+    get a sw_if_index counting up from 100."""
+
+    def __init__(self, msgnames, retvals=None):
+        self.api = SimpleNamespace(**{msgname: None for msgname in msgnames})
+        self.messages = {
+            msgname: SimpleNamespace(name=msgname, crc="0x00000000")
+            for msgname in msgnames
+        }
+        self.services = {msgname: {"reply": f"{msgname}_reply"} for msgname in msgnames}
+        self.transport = SimpleNamespace(get_msg_index=lambda name: 0)
+        self.retvals = retvals or {}
+        self.calls = []
+        self.replies = deque()
+        self.context = 0
+        self.sw_if_index = 100
+
+    def get_context(self):
+        self.context += 1
+        return self.context
+
+    def _call_vpp_async(self, _msgid, msg, context, **kwargs):
+        self.calls.append((msg.name, kwargs))
+        reply_type = namedtuple(f"{msg.name}_reply", StubReply._fields)
+        sw_if_index = kwargs.get("sw_if_index")
+        if msg.name.startswith("create_"):
+            sw_if_index = self.sw_if_index
+            self.sw_if_index += 1
+        self.replies.append(
+            reply_type(context, self.retvals.get(msg.name, 0), sw_if_index)
+        )
+
+    def _control_ping(self, _context):
+        pass
+
+    def read_blocking(self, timeout=None):
+        if not self.replies:
+            return None
+        return self.replies.popleft()
+
+
+class TestApplier(unittest.TestCase):
+    def setUp(self):
+        self.applier = Applier()
+        self.applier.mockconfig(
+            {"interfaces": {"GigabitEthernet1/0/0": {"device-type": "dpdk"}}}
+        )
+        ## The mock config stands in for the config read from VPP
+        self.applier.cache_read = True
+        self.vpp = StubVPPApiClient(
+            [
+                "create_loopback_instance",
+                "sw_interface_add_del_address",
+                "sw_interface_set_flags",
+            ]
+        )
+        self.applier.vpp = self.vpp
+
+    def test_apply(self):
+        plan = Plan()
+        plan.add("create", "create_loopback_interface", 5, {})
+        plan.add("sync", "set_interface_ip_address", "loop5", "192.0.2.1/32")
+        plan.add("sync", "set_interface_state", "GigabitEthernet1/0/0", True)
+        self.assertTrue(self.applier.apply(plan))
+
+        self.assertEqual(
+            [
+                (
+                    "create_loopback_instance",
+                    {"is_specified": True, "user_instance": 5},
+                ),
+                (
+                    "sw_interface_add_del_address",
+                    {"sw_if_index": 100, "is_add": True, "prefix": "192.0.2.1/32"},
+                ),
+                (
+                    "sw_interface_set_flags",
+                    {"sw_if_index": 1, "flags": IF_STATUS_API_FLAG_ADMIN_UP},
+                ),
+            ],
+            self.vpp.calls,
+        )
+        self.assertEqual(100, self.applier.cache["interface_names"]["loop5"])
+        self.assertEqual([], self.applier.cache["interface_addresses"][100])
+        self.assertEqual({100}, self.applier.cache_stale["interface_addresses"])
+        self.assertEqual({1, 100}, self.applier.cache_stale["interfaces"])
+
+    def test_apply_waits_for_created_interface(self):
+        ## The address can only be added once VPP has replied with the sw_if_index of
+        ## loop5, so the pipeline is flushed before it is submitted, while the requests
+        ## that come before it are not waited for.
+        plan = Plan()
+        plan.add("create", "create_loopback_interface", 5, {})
+        plan.add("create", "set_interface_state", "GigabitEthernet1/0/0", True)
+        plan.add("create", "set_interface_ip_address", "loop5", "192.0.2.1/32")
+        self.assertTrue(self.applier.apply_phase("create", plan["create"]))
+
+        self.assertEqual(
+            [
+                "create_loopback_instance",
+                "sw_interface_set_flags",
+                "sw_interface_add_del_address",
+            ],
+            [msgname for msgname, _kwargs in self.vpp.calls],
+        )
+        self.assertEqual(100, self.vpp.calls[2][1]["sw_if_index"])
+        self.assertEqual(set(), self.applier.creating)
+
+    def test_apply_unknown_interface(self):
+        plan = Plan()
+        plan.add("sync", "set_interface_state", "loop5", True)
+        with self.assertLogs("vppcfg.vppapi", level="ERROR"):
+            self.assertFalse(self.applier.apply(plan))
+        self.assertEqual([], self.vpp.calls)
+
+    def test_apply_error(self):
+        self.vpp.retvals["create_loopback_instance"] = -1
+        plan = Plan()
+        plan.add("create", "create_loopback_interface", 5, {})
+        plan.add("create", "set_interface_ip_address", "loop5", "192.0.2.1/32")
+        plan.add("sync", "set_interface_state", "GigabitEthernet1/0/0", True)
+        with self.assertLogs("vppcfg.vppapi", level="ERROR"):
+            self.assertFalse(self.applier.apply(plan))
+
+        ## The phase stops at the first failure, and the sync phase is never applied
+        self.assertEqual(
+            ["create_loopback_instance"],
+            [msgname for msgname, _kwargs in self.vpp.calls],
+        )
+        self.assertNotIn("loop5", self.applier.cache["interface_names"])
+
+    def test_apply_unknown_message(self):
+        ## The stub does not know the message that sets the link MTU, like VPP when
+        ## the plugin that provides an API message is not loaded
+        plan = Plan()
+        plan.add("sync", "set_interface_link_mtu", "GigabitEthernet1/0/0", 9000)
+        with self.assertLogs("vppcfg.vppapi", level="ERROR"):
+            self.assertFalse(self.applier.apply(plan))
+        self.assertEqual([], self.vpp.calls)
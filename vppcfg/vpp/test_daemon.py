@@ -0,0 +1,105 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for the vppcfg daemon """
+import os
+import tempfile
+import unittest
+from unittest import mock
+from . import events
+from .daemon import Daemon, FileWatcher
+from .plan import Plan
+
+CONFIG = """
+interfaces:
+  GigabitEthernet1/0/0:
+    device-type: dpdk
+    mtu: 9000
+"""
+
+
+class TestFileWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.filename = os.path.join(self.tmpdir.name, "vppcfg.yaml")
+        self.watcher = FileWatcher(self.filename, settle=0.01, interval=0.01)
+        self.addCleanup(self.watcher.close)
+
+    def test_timeout(self):
+        self.assertIsNone(self.watcher.wait(timeout=0.05))
+        with open(self.filename, "w", encoding="utf-8") as file:
+            file.write(CONFIG)
+        self.assertTrue(self.watcher.wait(timeout=5))
+        self.assertIsNone(self.watcher.wait(timeout=0.05))
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        config = os.path.join(self.tmpdir.name, "vppcfg.yaml")
+        with open(config, "w", encoding="utf-8") as file:
+            file.write(CONFIG)
+        self.daemon = Daemon(config)
+
+        ## Reading from VPP is replaced by the mock config, and planning by recording
+        ## which configuration each plan was made against.
+        self.reads = 0
+        self.prev_cfgs = []
+        for patcher in [
+            mock.patch.object(
+                self.daemon.applier, "cache_refresh", side_effect=self.cache_refresh
+            ),
+            mock.patch.object(self.daemon, "plan", side_effect=self.plan),
+            mock.patch.object(events, "enable", return_value=False),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def cache_refresh(self):
+        if not self.daemon.applier.cache_read:
+            self.reads += 1
+            self.daemon.applier.mockconfig(
+                {"interfaces": {"GigabitEthernet1/0/0": {"device-type": "dpdk"}}}
+            )
+            self.daemon.applier.cache_read = True
+        return True
+
+    def plan(self, _cfg, prev_cfg=None):
+        self.prev_cfgs.append(prev_cfg)
+        return Plan()
+
+    def test_reconcile(self):
+        with self.assertLogs("vppcfg.daemon", level="INFO") as logs:
+            self.assertTrue(self.daemon.reconcile())
+        self.assertIn("Dataplane already reflects the configuration", logs.output[-1])
+        self.assertIsNone(self.prev_cfgs[-1])
+        self.assertEqual(1, self.reads)
+
+        ## Once applied, only the changes since are planned, against the cache
+        with self.assertLogs("vppcfg.daemon", level="INFO") as logs:
+            self.assertTrue(self.daemon.reconcile())
+        self.assertIn("Configuration has no changes to apply", logs.output[-1])
+        self.assertIsNotNone(self.prev_cfgs[-1])
+        self.assertEqual(1, self.reads)
+
+        ## A full reconcile reads the cache afresh, and plans all of the config
+        with self.assertLogs("vppcfg.daemon", level="INFO") as logs:
+            self.assertTrue(self.daemon.reconcile(full=True))
+        self.assertIn("Dataplane already reflects the configuration", logs.output[-1])
+        self.assertIsNone(self.prev_cfgs[-1])
+        self.assertEqual(2, self.reads)
+        self.assertTrue(self.daemon.reconcile())
+        self.assertIsNotNone(self.prev_cfgs[-1])
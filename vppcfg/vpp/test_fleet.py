@@ -0,0 +1,120 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for planning a fleet of VPP Dataplanes """
+import os
+import json
+import tempfile
+import unittest
+from vppcfg.test_vppcfg import TOPDIR, EXAMPLE, run_vppcfg
+from .fleet import read_manifest
+
+INTEST = os.path.join(TOPDIR, "vppcfg", "intest")
+
+
+class TestFleet(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.manifest = os.path.join(self.tmpdir.name, "manifest.yaml")
+
+    def write_manifest(self, contents):
+        with open(self.manifest, "w", encoding="utf-8") as file:
+            file.write(contents)
+
+    def test_read_manifest(self):
+        self.write_manifest(
+            """
+targets:
+  router1:
+    config: router1.yaml
+    vpp-api-socket: /run/vpp/router1-api.sock
+  router2:
+    config: /etc/vppcfg/router2.yaml
+    from-config: router2-running.yaml
+"""
+        )
+        self.assertEqual(
+            {
+                "router1": {
+                    "config": os.path.join(self.tmpdir.name, "router1.yaml"),
+                    "vpp-api-socket": "/run/vpp/router1-api.sock",
+                },
+                "router2": {
+                    "config": "/etc/vppcfg/router2.yaml",
+                    "from-config": os.path.join(
+                        self.tmpdir.name, "router2-running.yaml"
+                    ),
+                },
+            },
+            read_manifest(self.manifest),
+        )
+
+    def test_read_manifest_invalid(self):
+        for contents in [
+            "router1: {}\n",
+            "targets:\n  router1:\n    vpp-api-socket: api.sock\n",
+            "targets:\n  router1:\n    config: router1.yaml\n    unknown: foo\n",
+            "targets:\n  router1:\n    config: 1\n",
+            "targets:\n  router1:\n    config: r1.yaml\n"
+            "    from-config: r1.yaml\n    from-snapshot: r1.snap\n",
+        ]:
+            self.write_manifest(contents)
+            with self.assertLogs("vppcfg.fleet", level="ERROR"):
+                self.assertIsNone(read_manifest(self.manifest), contents)
+
+        with self.assertLogs("vppcfg.fleet", level="ERROR"):
+            self.assertIsNone(read_manifest(os.path.join(self.tmpdir.name, "none")))
+
+    def test_fleet(self):
+        self.write_manifest(
+            f"""
+targets:
+  hippo1:
+    config: {os.path.join(INTEST, "hippo1.yaml")}
+    from-config: {os.path.join(INTEST, "hippo-empty.yaml")}
+  example:
+    config: {EXAMPLE}
+    from-config: {EXAMPLE}
+  missing:
+    config: missing.yaml
+    from-config: {EXAMPLE}
+"""
+        )
+        summary = os.path.join(self.tmpdir.name, "summary.json")
+        _elapsed, modules = run_vppcfg(
+            "fleet",
+            "-m",
+            self.manifest,
+            "-o",
+            os.path.join(self.tmpdir.name, "out"),
+            "--summary-json",
+            summary,
+        )
+        self.assertNotIn("vpp_papi", modules)
+        with open(summary, "r", encoding="utf-8") as file:
+            report = json.load(file)
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.tmpdir.name, "out", "hippo1.exec"))
+        )
+
+        results = {result["target"]: result for result in report["targets"]}
+        self.assertEqual(["hippo1", "example", "missing"], list(results))
+        self.assertTrue(results["hippo1"]["ok"])
+        self.assertGreater(results["hippo1"]["operations"], 0)
+        self.assertIn("plan", results["hippo1"]["seconds"])
+        self.assertTrue(results["example"]["ok"])
+        self.assertEqual(0, results["example"]["operations"])
+        self.assertFalse(results["missing"]["ok"])
+        self.assertIn("missing.yaml", results["missing"]["error"])
@@ -0,0 +1,154 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for the on-disk plan cache """
+import os
+import tempfile
+import unittest
+from unittest import mock
+from importlib import metadata
+from . import plancache
+from .plancache import PlanCache, get_version
+from .vppapi import VPPApi
+
+CONFIG = {"interfaces": {"GigabitEthernet1/0/0": {"device-type": "dpdk", "mtu": 9000}}}
+
+
+class TestPlanCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.plancache = PlanCache(cache_dir=self.tmpdir.name, maxentries=2)
+        self.vpp = VPPApi()
+        self.vpp.mockconfig(CONFIG)
+
+    def filename(self, key):
+        return os.path.join(self.tmpdir.name, f"plan-{key}.jsonl")
+
+    def test_roundtrip(self):
+        key = self.plancache.key(CONFIG, self.vpp)
+        self.assertIsNone(self.plancache.get(key))
+
+        output = ["comment { create }", "set interface mtu 9000 GigabitEthernet1/0/0"]
+        self.assertTrue(self.plancache.put(key, iter(output)))
+        self.assertEqual(output, list(self.plancache.get(key)))
+        self.assertEqual(["plan-" + key + ".jsonl"], os.listdir(self.tmpdir.name))
+
+    def test_key(self):
+        key = self.plancache.key(CONFIG, self.vpp)
+        self.assertEqual(key, self.plancache.key(CONFIG, self.vpp))
+        self.assertTrue(self.plancache.put(key, ["comment { create }"]))
+
+        ## A change in the configuration misses the cache
+        config = {
+            "interfaces": {"GigabitEthernet1/0/0": {"device-type": "dpdk", "mtu": 1500}}
+        }
+        other_key = self.plancache.key(config, self.vpp)
+        self.assertNotEqual(key, other_key)
+        self.assertIsNone(self.plancache.get(other_key))
+
+        ## And so does a change in the VPP config cache that is planned against
+        vpp = VPPApi()
+        vpp.mockconfig(
+            {
+                "interfaces": {
+                    "GigabitEthernet1/0/0": {"device-type": "dpdk"},
+                    "GigabitEthernet1/0/1": {"device-type": "dpdk"},
+                }
+            }
+        )
+        other_key = self.plancache.key(CONFIG, vpp)
+        self.assertNotEqual(key, other_key)
+        self.assertIsNone(self.plancache.get(other_key))
+
+        ## And so does another version of vppcfg
+        with mock.patch.object(plancache, "get_version", return_value="0.0.0"):
+            other_key = self.plancache.key(CONFIG, self.vpp)
+        self.assertNotEqual(key, other_key)
+        self.assertIsNone(self.plancache.get(other_key))
+
+    def test_evict(self):
+        for key in ["a", "b"]:
+            self.assertTrue(self.plancache.put(key, [key]))
+        os.utime(self.filename("a"), ns=(1000, 1000))
+        os.utime(self.filename("b"), ns=(2000, 2000))
+
+        ## Using 'a' makes 'b' the least recently used plan, which is removed once a
+        ## third plan is stored
+        self.assertEqual(["a"], list(self.plancache.get("a")))
+        self.assertTrue(self.plancache.put("c", ["c"]))
+        self.assertIsNone(self.plancache.get("b"))
+        self.assertEqual(["a"], list(self.plancache.get("a")))
+        self.assertEqual(["c"], list(self.plancache.get("c")))
+        self.assertEqual(2, len(os.listdir(self.tmpdir.name)))
+
+    def test_corrupt(self):
+        self.assertTrue(self.plancache.put("a", ["a"]))
+        for header in ["not json\n", "[]\n", '{"key": "b"}\n', ""]:
+            with open(self.filename("a"), "w", encoding="utf-8") as file:
+                file.write(header)
+                file.write('"a"\n')
+            self.assertIsNone(self.plancache.get("a"), header)
+
+
+class TestGetVersion(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+        ## A source tree with vppcfg/vpp/plancache.py in it, which is not installed
+        self.topdir = os.path.join(self.tmpdir.name, "vppcfg")
+        os.makedirs(os.path.join(self.topdir, "vpp"))
+        for filename in ["vppcfg.py", "vpp/plancache.py", "README.md"]:
+            self.write(filename, "")
+        for patcher in [
+            mock.patch.object(
+                plancache, "__file__", os.path.join(self.topdir, "vpp/plancache.py")
+            ),
+            mock.patch.object(
+                metadata, "version", side_effect=metadata.PackageNotFoundError
+            ),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, filename, contents, mtime_ns=1000):
+        filename = os.path.join(self.topdir, filename)
+        with open(filename, "w", encoding="utf-8") as file:
+            file.write(contents)
+        os.utime(filename, ns=(mtime_ns, mtime_ns))
+
+    def test_source_tree(self):
+        version = get_version()
+        self.assertTrue(version.startswith("src-"))
+        self.assertEqual(version, get_version())
+
+        ## Only the Python source files count
+        self.write("README.md", "changed")
+        self.assertEqual(version, get_version())
+
+        self.write("vpp/plancache.py", "", mtime_ns=2000)
+        self.assertNotEqual(version, get_version())
+        version = get_version()
+
+        self.write("vpp/plancache.py", "changed", mtime_ns=2000)
+        self.assertNotEqual(version, get_version())
+        version = get_version()
+
+        self.write("vpp/new.py", "", mtime_ns=2000)
+        self.assertNotEqual(version, get_version())
+
+    def test_installed(self):
+        with mock.patch.object(metadata, "version", return_value="1.2.3"):
+            self.assertEqual("1.2.3", get_version())
@@ -0,0 +1,115 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for writing the plan of the reconciler """
+import os
+import bz2
+import gzip
+import lzma
+import tempfile
+import unittest
+from .reconciler import Reconciler
+from .synthetic import AclDetails
+from .vppapi import VPPApi
+
+CONFIG = {"interfaces": {"GigabitEthernet1/0/0": {"device-type": "dpdk", "mtu": 9000}}}
+
+
+class TestWrite(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+        vpp = VPPApi()
+        vpp.mockconfig(CONFIG)
+        self.reconciler = Reconciler(CONFIG, vpp=vpp)
+        self.reconciler.plan.add("create", "create_loopback_interface", 0, {})
+        self.reconciler.plan.add(
+            "sync", "set_interface_state", "GigabitEthernet1/0/0", True
+        )
+        self.want = [
+            "comment { vppcfg create: 1 CLI statement(s) follow }",
+            "create loopback interface instance 0",
+            "comment { vppcfg sync: 1 CLI statement(s) follow }",
+            "set interface state GigabitEthernet1/0/0 up",
+        ]
+
+    def write(self, filename, opener=open, **kwargs):
+        outfile = os.path.join(self.tmpdir.name, filename)
+        self.reconciler.write(outfile, **kwargs)
+        with opener(outfile, "rt", encoding="utf-8") as file:
+            return file.read().splitlines()
+
+    def test_plain(self):
+        self.assertEqual(self.want, self.write("plan.exec", emit_ok=True))
+
+    def test_compressed(self):
+        for filename, opener in [
+            ("plan.exec.gz", gzip.open),
+            ("plan.exec.bz2", bz2.open),
+            ("plan.exec.xz", lzma.open),
+        ]:
+            self.assertEqual(self.want, self.write(filename, opener, emit_ok=True))
+
+        ## The file is really compressed, not merely named so
+        with open(os.path.join(self.tmpdir.name, "plan.exec.gz"), "rb") as file:
+            self.assertEqual(b"\x1f\x8b", file.read(2))
+
+    def test_not_ok(self):
+        warning = "comment { vppcfg: Planning failed, be careful with this output! }"
+        self.assertEqual(
+            [warning] + self.want + [warning], self.write("plan.exec.gz", gzip.open)
+        )
+
+    def test_output(self):
+        ## Lines of a cached plan are written instead of the plan itself
+        self.assertEqual(
+            ["comment { cached }"],
+            self.write("plan.exec.gz", gzip.open, output=iter(["comment { cached }"])),
+        )
+
+
+class TestAcls(unittest.TestCase):
+    def setUp(self):
+        self.cfg = dict(CONFIG, acls={"acl01": {"terms": [{"action": "permit"}]}})
+        self.vpp = VPPApi()
+        self.vpp.mockconfig(CONFIG)
+        for tag in ["vppcfg:acl01", "vppcfg:acl02", "", "other", "vppcfg:acl01"]:
+            acl_index = len(self.vpp.cache["acls"])
+            self.vpp.cache["acls"][acl_index] = AclDetails(
+                acl_index=acl_index, tag=tag, count=0, r=[]
+            )
+        self.reconciler = Reconciler(self.cfg, vpp=self.vpp)
+
+    def test_prune(self):
+        self.assertTrue(self.reconciler._Reconciler__prune_acls())
+
+        ## Only the ACLs that vppcfg created are removed: the one that is no longer in
+        ## the config, and the one with the same tag as an ACL with a lower index
+        self.assertEqual(
+            ["delete acl-plugin acl index 1", "delete acl-plugin acl index 4"],
+            self.reconciler.plan.cli("prune"),
+        )
+        self.assertEqual([0, 2, 3], sorted(self.vpp.cache["acls"]))
+
+    def test_create(self):
+        del self.vpp.cache["acls"][0], self.vpp.cache["acls"][4]
+        self.assertTrue(self.reconciler._Reconciler__create_acls())
+        self.assertEqual(
+            [
+                "set acl-plugin acl permit src 0.0.0.0/0 dst 0.0.0.0/0, "
+                + "permit src ::/0 dst ::/0 tag vppcfg:acl01"
+            ],
+            self.reconciler.plan.cli("create"),
+        )
@@ -0,0 +1,67 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for VPP config cache snapshots """
+import os
+import tempfile
+import unittest
+from vppcfg.config import yamlio
+from vppcfg.test_vppcfg import EXAMPLE, run_vppcfg
+from . import snapshot
+from .vppapi import VPPApi
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.snapfile = os.path.join(self.tmpdir.name, "snapshot")
+
+        with open(EXAMPLE, "r", encoding="utf-8") as file:
+            cfg = yamlio.load(file)
+        self.vpp = VPPApi()
+        self.vpp.mockconfig(cfg)
+        self.vpp.lcp_enabled = True
+        snapshot.write(self.snapfile, self.vpp.cache, self.vpp.lcp_enabled)
+
+    def test_roundtrip(self):
+        loaded = VPPApi()
+        self.assertTrue(snapshot.load(loaded, self.snapfile))
+        self.assertEqual(self.vpp.cache_fingerprint(), loaded.cache_fingerprint())
+
+    def test_corrupt(self):
+        with open(self.snapfile, "wb") as file:
+            file.write(b"not a snapshot")
+        with self.assertLogs("vppcfg.snapshot", level="ERROR"):
+            self.assertFalse(snapshot.load(VPPApi(), self.snapfile))
+
+    def test_plan_from_snapshot(self):
+        novpp = os.path.join(self.tmpdir.name, "novpp.exec")
+        run_vppcfg("plan", "--novpp", "-c", EXAMPLE, "-o", novpp)
+        outfile = os.path.join(self.tmpdir.name, "snapshot.exec")
+        _elapsed, modules = run_vppcfg(
+            "plan",
+            "--from-snapshot",
+            self.snapfile,
+            "--no-plan-cache",
+            "-c",
+            EXAMPLE,
+            "-o",
+            outfile,
+        )
+        self.assertNotIn("vpp_papi", modules)
+        with open(novpp, "r", encoding="utf-8") as file:
+            want = file.read()
+        with open(outfile, "r", encoding="utf-8") as file:
+            self.assertEqual(want, file.read())
@@ -0,0 +1,82 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for synthesizing the VPP config cache from a configuration """
+import os
+import tempfile
+import unittest
+from vppcfg.config import Validator, yamlio
+from vppcfg.test_vppcfg import TOPDIR, EXAMPLE, run_vppcfg
+from .vppapi import VPPApi
+from .synthetic import synthesize
+
+INTEST = os.path.join(TOPDIR, "vppcfg", "intest")
+
+
+class TestSynthConfig(unittest.TestCase):
+    def test_synthesize(self):
+        with open(EXAMPLE, "r", encoding="utf-8") as file:
+            cfg = yamlio.load(file)
+        rv, _msgs = Validator(schema=None).validate(cfg)
+        self.assertTrue(rv)
+
+        vpp = VPPApi()
+        self.assertTrue(synthesize(vpp, cfg))
+        for ifname in [
+            "local0",
+            "GigabitEthernet3/0/0",
+            "BondEthernet0",
+            "BondEthernet0.100",
+            "loop0",
+            "vxlan_tunnel1",
+            "tap100",
+        ]:
+            self.assertIn(ifname, vpp.cache["interface_names"])
+        self.assertEqual([1, 11], sorted(vpp.cache["bridgedomains"]))
+        self.assertTrue(vpp.lcp_enabled)
+        self.assertTrue(vpp.tap_is_lcp("tap4096"))
+        self.assertFalse(vpp.tap_is_lcp("tap100"))
+
+    def test_plan_from_config(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = os.path.join(tmpdir, "same.exec")
+            _elapsed, modules = run_vppcfg(
+                "plan",
+                "--from-config",
+                EXAMPLE,
+                "--no-plan-cache",
+                "-c",
+                EXAMPLE,
+                "-o",
+                outfile,
+            )
+            self.assertNotIn("vpp_papi", modules)
+            with open(outfile, "r", encoding="utf-8") as file:
+                self.assertEqual("", file.read())
+
+            outfile = os.path.join(tmpdir, "hippo1.exec")
+            run_vppcfg(
+                "plan",
+                "--from-config",
+                os.path.join(INTEST, "hippo-empty.yaml"),
+                "--no-plan-cache",
+                "-c",
+                os.path.join(INTEST, "hippo1.yaml"),
+                "-o",
+                outfile,
+            )
+            with open(outfile, "r", encoding="utf-8") as file:
+                output = file.read()
+            self.assertIn("comment { vppcfg create:", output)
+            self.assertNotIn("comment { vppcfg prune:", output)
@@ -0,0 +1,154 @@
+#
+# Copyright (c) 2022 Pim van Pelt
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# -*- coding: utf-8 -*-
+""" Unit tests for keeping the VPP config cache up to date """
+import unittest
+from unittest import mock
+from collections import deque, namedtuple
+from .vppapi import VPPApi, CACHE_CREATE_TABLES, CACHE_DELETE_TABLES
+
+SwInterfaceEvent = namedtuple(
+    "sw_interface_event", ["context", "pid", "sw_if_index", "flags", "deleted"]
+)
+
+
+class TestCacheEvents(unittest.TestCase):
+    def setUp(self):
+        self.vppapi = VPPApi()
+        self.vppapi.mockconfig(
+            {
+                "interfaces": {
+                    "GigabitEthernet1/0/0": {"device-type": "dpdk"},
+                    "GigabitEthernet1/0/1": {"device-type": "dpdk"},
+                }
+            }
+        )
+        ## The mock config stands in for the config read from VPP, which sends events
+        self.vppapi.cache_read = True
+        self.vppapi.cache_events = deque()
+
+        ## Reading from VPP is replaced by recording which tables would be read
+        self.tables = []
+        self.readconfig_ok = True
+        patcher = mock.patch.object(
+            self.vppapi, "_VPPApi__readconfig_tables", side_effect=self.readconfig
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def readconfig(self, tables):
+        self.tables.append(tables)
+        return self.readconfig_ok
+
+    def event(self, sw_if_index, flags=0, deleted=False):
+        self.vppapi.cache_events.append(
+            ("sw_interface_event", SwInterfaceEvent(0, 0, sw_if_index, flags, deleted))
+        )
+
+    def test_no_events(self):
+        self.assertFalse(self.vppapi.cache_is_stale())
+        self.assertTrue(self.vppapi.cache_refresh())
+        self.assertEqual([], self.tables)
+
+    def test_flags(self):
+        self.event(1, flags=3)
+        self.assertTrue(self.vppapi.cache_is_stale())
+        self.assertTrue(self.vppapi.cache_refresh())
+
+        ## Admin and link state changes are applied in place, without reading VPP
+        self.assertEqual([], self.tables)
+        self.assertEqual(3, self.vppapi.cache["interfaces"][1].flags)
+        self.assertEqual(0, self.vppapi.cache["interfaces"][2].flags)
+        self.assertFalse(self.vppapi.cache_is_stale())
+
+    def test_delete(self):
+        self.event(2, deleted=True)
+        self.assertTrue(self.vppapi.cache_refresh())
+
+        self.assertNotIn(2, self.vppapi.cache["interfaces"])
+        self.assertNotIn("GigabitEthernet1/0/1", self.vppapi.cache["interface_names"])
+        self.assertNotIn(2, self.vppapi.cache["interface_addresses"])
+        self.assertNotIn(2, self.vppapi.cache["interface_acls"])
+        self.assertIsNone(self.vppapi.get_interface_by_name("GigabitEthernet1/0/1"))
+        self.assertEqual([dict.fromkeys(CACHE_DELETE_TABLES)], self.tables)
+
+    def test_create(self):
+        self.event(100, flags=1)
+        self.assertTrue(self.vppapi.cache_refresh())
+
+        ## Only the new interface is read, along with the tables it may appear in
+        self.assertEqual(1, len(self.tables))
+        self.assertEqual({100}, self.tables[0]["interfaces"])
+        self.assertEqual({100}, self.tables[0]["interface_addresses"])
+        for table in CACHE_CREATE_TABLES:
+            self.assertIsNone(self.tables[0][table])
+        self.assertEqual(
+            {"interfaces", "interface_addresses", *CACHE_CREATE_TABLES},
+            set(self.tables[0]),
+        )
+        self.assertFalse(self.vppapi.cache_is_stale())
+
+    def test_other_events(self):
+        self.vppapi.cache_events.append(("sw_interface_set_flags_reply", None))
+        self.assertTrue(self.vppapi.cache_refresh())
+        self.assertEqual([], self.tables)
+        self.assertFalse(self.vppapi.cache_is_stale())
+
+    def test_no_events_enabled(self):
+        ## Without events, the interfaces are always read afresh as a whole
+        self.vppapi.cache_events = None
+        self.assertTrue(self.vppapi.cache_refresh())
+        self.assertEqual([{"interfaces": None}], self.tables)
+
+    def test_stale_add(self):
+        self.vppapi.cache_stale_add("interfaces", 1)
+        self.vppapi.cache_stale_add("interfaces", 2)
+        self.vppapi.cache_stale_add("interface_addresses", 1)
+        self.vppapi.cache_stale_add("bridgedomains", 1)
+        self.assertTrue(self.vppapi.cache_is_stale("interfaces"))
+        self.assertTrue(self.vppapi.cache_is_stale("bridgedomains"))
+        self.assertFalse(self.vppapi.cache_is_stale("l2xcs"))
+        self.assertEqual(
+            {
+                "interfaces": {1, 2},
+                "interface_addresses": {1},
+                "bridgedomains": None,
+            },
+            self.vppapi.cache_stale,
+        )
+
+        ## Once a table is stale as a whole, it stays stale as a whole
+        self.vppapi.cache_stale_add("interface_addresses")
+        self.vppapi.cache_stale_add("interface_addresses", 2)
+        self.assertIsNone(self.vppapi.cache_stale["interface_addresses"])
+
+        self.assertTrue(self.vppapi.cache_refresh())
+        self.assertEqual(
+            [
+                {
+                    "interfaces": {1, 2},
+                    "interface_addresses": None,
+                    "bridgedomains": None,
+                }
+            ],
+            self.tables,
+        )
+        self.assertEqual({}, self.vppapi.cache_stale)
+
+    def test_refresh_fails(self):
+        self.vppapi.cache_stale_add("bridgedomains")
+        self.readconfig_ok = False
+        with self.assertLogs("vppcfg.vppapi", level="ERROR"):
+            self.assertFalse(self.vppapi.cache_refresh())
+        self.assertFalse(self.vppapi.cache_read)
@@ -18,10 +18,56 @@ interface metadata. Its base class will never change state. See the
 derived classes VPPApiDumper() and VPPApiApplier()
 """
 
+import copy
+import hashlib
 import os
 import logging
 import time
-from vpp_papi import VPPApiClient, VPPApiJSONFiles, MACAddress
+from vppcfg.profiler import PROFILER
+from .pipeline import VPPApiPipeline
+from . import events
+from .synthetic import MockSwInterfaceDetails, MockAclInterfaceListDetails
+
+## The tables of the VPP config cache that hold one entry per interface, keyed by its
+## sw_if_index. When an interface is deleted, its entries are removed from these.
+CACHE_INTERFACE_TABLES = [
+    "interface_addresses",
+    "interface_unnumbered",
+    "interface_mpls",
+    "interface_acls",
+    "bondethernets",
+    "bondethernet_members",
+    "vxlan_tunnels",
+    "l2xcs",
+    "taps",
+]
+
+## The tables that may gain an entry when an interface is created, and the ones that
+## may still refer to an interface after it is deleted.
+CACHE_CREATE_TABLES = [
+    "interface_acls",
+    "bondethernets",
+    "vxlan_tunnels",
+    "taps",
+    "lcps",
+]
+CACHE_DELETE_TABLES = [
+    "lcps",
+    "interface_unnumbered",
+    "bondethernet_members",
+    "bridgedomains",
+    "l2xcs",
+    "interface_sflow",
+]
+
+## The tables that can be read afresh for some of their entries (by sw_if_index) only,
+## rather than as a whole.
+CACHE_SCOPED_TABLES = ["interfaces", "interface_addresses", "bondethernet_members"]
+
+## The JSON API files found in a VPP API JSON directory, keyed by the directory that was
+## asked for (None for the default one), so that they are looked up once per process
+## even when talking to many VPP Dataplanes, see `vppcfg fleet`.
+API_JSON_CACHE = {}
 
 
 class VPPApi:
@@ -38,35 +84,44 @@ class VPPApi:
 
         self.vpp_api_socket = vpp_api_socket
         self.vpp_json_dir = vpp_json_dir
-        self.vpp_jsonfiles = []
-        self.vpp_messages = {}
         self.connected = False
         self.clientname = clientname
         self.vpp = None
         self.cache_read = False
+        self.cache_events = None
+        self.cache_index = {}
         self.cache_clear()
         self.lcp_enabled = False
 
-        if self.vpp_json_dir is None:
-            self.vpp_json_dir = VPPApiJSONFiles.find_api_dir([])
-        elif not os.path.isdir(self.vpp_json_dir):
-            self.logger.error(f"VPP API JSON directory not found: {self.vpp_json_dir}")
-
-        # Construct a list of all the JSON API files
-        self.vpp_jsonfiles = VPPApiJSONFiles.find_api_files(api_dir=self.vpp_json_dir)
-        if not self.vpp_jsonfiles:
-            self.logger.error("No JSON API files found")
-
-        # Enumerate all VPPMessage signatures from the JSON API files, and give their
-        # API namedtuple defaults so creating instances can set only those fields which
-        # are relevant.
-        for json_filename in self.vpp_jsonfiles:
-            with open(json_filename, "r", encoding="utf-8") as file_handle:
-                for name, msg in VPPApiJSONFiles.process_json_file(file_handle)[
-                    0
-                ].items():
-                    msg.tuple.__new__.__defaults__ = (None,) * len(msg.tuple._fields)
-                    self.vpp_messages[name] = msg
+        # The JSON API files are only looked up once they are needed, so that using a
+        # mock config cache never loads the VPP API.
+        self.__vpp_jsonfiles = None
+
+    @property
+    def vpp_jsonfiles(self):
+        """The list of all the JSON API files, found when first used"""
+        if self.__vpp_jsonfiles is None and self.vpp_json_dir in API_JSON_CACHE:
+            self.vpp_json_dir, self.__vpp_jsonfiles = API_JSON_CACHE[self.vpp_json_dir]
+        if self.__vpp_jsonfiles is None:
+            # pylint: disable=import-outside-toplevel
+            from vpp_papi import VPPApiJSONFiles
+
+            json_dir = self.vpp_json_dir
+            if self.vpp_json_dir is None:
+                self.vpp_json_dir = VPPApiJSONFiles.find_api_dir([])
+            elif not os.path.isdir(self.vpp_json_dir):
+                self.logger.error(
+                    f"VPP API JSON directory not found: {self.vpp_json_dir}"
+                )
+
+            self.__vpp_jsonfiles = VPPApiJSONFiles.find_api_files(
+                api_dir=self.vpp_json_dir
+            )
+            if not self.__vpp_jsonfiles:
+                self.logger.error("No JSON API files found")
+            else:
+                API_JSON_CACHE[json_dir] = (self.vpp_json_dir, self.__vpp_jsonfiles)
+        return self.__vpp_jsonfiles
 
     def connect(self, retries=30):
         """Connect to the VPP Dataplane, if we're not already connected"""
@@ -77,6 +132,9 @@ class VPPApi:
             self.logger.error(f"VPP api socket file not found: {self.vpp_api_socket}")
             return False
 
+        # pylint: disable=import-outside-toplevel
+        from vpp_papi import VPPApiClient
+
         self.vpp = VPPApiClient(
             apifiles=self.vpp_jsonfiles, server_address=self.vpp_api_socket
         )
@@ -109,11 +167,13 @@ class VPPApi:
         self.vpp.disconnect()
         self.logger.debug("Disconnected from VPP")
         self.connected = False
+        self.cache_events = None
         return True
 
     def cache_clear(self):
         """Remove the cached VPP configuration elements and return True"""
         self.cache_read = False
+        self.cache_stale = {}
         self.cache = {
             "lcps": {},
             "interface_names": {},
@@ -133,19 +193,221 @@ class VPPApi:
             "interface_sflow": {},
             "sflow": {},
         }
+        self.cache_index_clear()
+        return True
+
+    def cache_clone(self):
+        """Return a new VPPApi that is not connected to VPP, holding a copy of this VPP
+        config cache. The copy can be changed (for example by the Reconciler, while it
+        plans) without changing this cache. The cached API replies themselves are never
+        changed, so only the tables and the lists and dicts in them are copied."""
+        clone = VPPApi(self.vpp_api_socket, self.vpp_json_dir, self.clientname)
+        clone.cache = {
+            table: {
+                key: copy.copy(value) if isinstance(value, (list, dict)) else value
+                for key, value in entries.items()
+            }
+            for table, entries in self.cache.items()
+        }
+        clone.cache_index_build()
+        clone.cache_read = self.cache_read
+        clone.lcp_enabled = self.lcp_enabled
+        return clone
+
+    def cache_fingerprint(self):
+        """Return a hash over the contents of the VPP config cache. It is the same for
+        two caches that hold the same VPP configuration, regardless of the order in which
+        it was read, and of the contexts of the API replies it was read from. Values
+        such as MAC addresses are compared by their string, so that a cache read from
+        a snapshot has the same fingerprint as the one it was written from."""
+
+        def normalize(value):
+            if hasattr(value, "_asdict"):
+                return tuple(
+                    (field, normalize(item))
+                    for field, item in value._asdict().items()
+                    if field != "context"
+                )
+            if isinstance(value, (list, tuple)):
+                return tuple(normalize(item) for item in value)
+            if isinstance(value, dict):
+                return tuple(
+                    sorted((repr(key), normalize(item)) for key, item in value.items())
+                )
+            if value is None or type(value) in (bool, int, float, str, bytes):
+                return value
+            if isinstance(value, int):
+                return int(value)
+            return str(value)
+
+        digest = hashlib.sha256(repr(self.lcp_enabled).encode())
+        for table in sorted(self.cache):
+            digest.update(f"\0{table}\0".encode())
+            digest.update(repr(normalize(self.cache[table])).encode())
+        return digest.hexdigest()
+
+    def cache_stale_add(self, table, sw_if_index=None):
+        """Mark a table of the VPP config cache as stale, so that cache_refresh() reads it
+        afresh from VPP. The tables in CACHE_SCOPED_TABLES can be marked stale for one
+        sw_if_index only, all other tables are read as a whole."""
+        if sw_if_index is None or table not in CACHE_SCOPED_TABLES:
+            self.cache_stale[table] = None
+        elif table not in self.cache_stale:
+            self.cache_stale[table] = {sw_if_index}
+        elif self.cache_stale[table] is not None:
+            self.cache_stale[table].add(sw_if_index)
+
+    def cache_is_stale(self, table=None):
+        """Returns True if the given table of the VPP config cache (or without a table,
+        any of them) is to be read afresh from VPP, or if there are VPP events that have
+        not been applied to it yet. Returns True for all tables if the cache has not
+        been read at all, in which case a full readconfig() is needed."""
+        if not self.cache_read:
+            return True
+        if self.cache_events:
+            return True
+        if table is None:
+            return bool(self.cache_stale)
+        return table in self.cache_stale
+
+    def cache_interface_created(self, sw_if_index):
+        """Mark the tables of the VPP config cache that a newly created interface may
+        appear in as stale"""
+        self.cache_stale_add("interfaces", sw_if_index)
+        self.cache_stale_add("interface_addresses", sw_if_index)
+        for table in CACHE_CREATE_TABLES:
+            self.cache_stale_add(table)
+
+    def cache_interface_deleted(self, sw_if_index):
+        """Remove an interface that was deleted in VPP from the VPP config cache, and mark
+        the tables that may still refer to it as stale"""
+        iface = self.cache["interfaces"].pop(sw_if_index, None)
+        if iface:
+            self.cache["interface_names"].pop(iface.interface_name, None)
+            self.__cache_index_remove_interface(iface)
+        for table in CACHE_INTERFACE_TABLES:
+            self.cache[table].pop(sw_if_index, None)
+        for table in CACHE_DELETE_TABLES:
+            self.cache_stale_add(table)
+
+    def cache_refresh(self):
+        """Bring the VPP config cache up to date with VPP. Events that VPP sent are applied
+        in place, and only the tables that are stale are read afresh, in one batch. If
+        VPP does not send interface events, the interfaces are always read afresh. If
+        the cache was never read, it is read as a whole. Returns True upon success."""
+        if not self.cache_read:
+            return self.readconfig()
+        if self.cache_events is None:
+            self.cache_stale_add("interfaces")
+        events.apply(self)
+        if not self.cache_stale:
+            return True
+
+        start = time.monotonic()
+        stale, self.cache_stale = self.cache_stale, {}
+        if not self.__readconfig_tables(stale):
+            self.logger.error("Could not retrieve configuration from VPP")
+            self.cache_clear()
+            return False
+        self.logger.info(
+            f"Refreshed {', '.join(stale)} from VPP in {time.monotonic() - start:.3f}s"
+        )
+        return True
+
+    def cache_index_clear(self):
+        """Remove the secondary indexes over the VPP config cache. They are kept alongside
+        the cache so that lookups by something other than sw_if_index do not have to scan
+        all interfaces or LCPs. Sets of sw_if_index are dicts with None values, so that
+        they keep the order of the cache."""
+        self.cache_index = {
+            "supers": {},
+            "sub_interfaces": {},
+            "dev_types": {},
+            "outer_tags": {},
+            "lcp_by_host_if_name": {},
+            "lcp_by_host_sw_if_index": {},
+            "unnumbered_by_target": {},
+        }
+        return True
+
+    def cache_index_build(self):
+        """(Re)build the secondary indexes from the VPP config cache, and return True"""
+        self.cache_index_clear()
+        for iface in self.cache["interfaces"].values():
+            self.__cache_index_add_interface(iface)
+        for lcp in self.cache["lcps"].values():
+            self.cache_index["lcp_by_host_if_name"][lcp.host_if_name] = lcp
+            self.cache_index["lcp_by_host_sw_if_index"][lcp.host_sw_if_index] = lcp
+        for idx, target_idx in self.cache["interface_unnumbered"].items():
+            self.cache_index["unnumbered_by_target"].setdefault(target_idx, {})[
+                idx
+            ] = None
         return True
 
+    @staticmethod
+    def __outer_tag_key(iface):
+        """Returns the key in the 'outer_tags' index for a Dot1Q/Dot1AD interface"""
+        return (
+            iface.sup_sw_if_index,
+            bool(iface.sub_if_flags & 8),
+            iface.sub_outer_vlan_id,
+        )
+
+    def __cache_index_add_interface(self, iface):
+        """Add an interface to the secondary indexes"""
+        idx = iface.sw_if_index
+        self.cache_index["dev_types"].setdefault(iface.interface_dev_type, {})[
+            idx
+        ] = None
+        if idx == iface.sup_sw_if_index:
+            self.cache_index["supers"][idx] = None
+        if iface.sub_id > 0:
+            self.cache_index["sub_interfaces"][idx] = None
+            if iface.sub_inner_vlan_id == 0:
+                self.cache_index["outer_tags"].setdefault(
+                    self.__outer_tag_key(iface), {}
+                )[idx] = None
+
+    def __cache_index_remove_interface(self, iface):
+        """Remove an interface from the secondary indexes"""
+        idx = iface.sw_if_index
+        self.cache_index["dev_types"].get(iface.interface_dev_type, {}).pop(idx, None)
+        self.cache_index["supers"].pop(idx, None)
+        self.cache_index["sub_interfaces"].pop(idx, None)
+        self.cache_index["outer_tags"].get(self.__outer_tag_key(iface), {}).pop(
+            idx, None
+        )
+
     def cache_remove_lcp(self, lcpname):
         """Removes the LCP and TAP interface, identified by lcpname, from the VPP config cache"""
-        for _idx, lcp in self.cache["lcps"].items():
-            if lcp.host_if_name == lcpname:
-                ifname = self.cache["interfaces"][lcp.host_sw_if_index].interface_name
-                del self.cache["lcps"][lcp.phy_sw_if_index]
-                return self.cache_remove_interface(ifname)
-        self.logger.warning(
-            f"Trying to remove an LCP which is not in the config: {lcpname}"
+        lcp = self.cache_index["lcp_by_host_if_name"].pop(lcpname, None)
+        if not lcp:
+            self.logger.warning(
+                f"Trying to remove an LCP which is not in the config: {lcpname}"
+            )
+            return False
+
+        ifname = self.cache["interfaces"][lcp.host_sw_if_index].interface_name
+        del self.cache["lcps"][lcp.phy_sw_if_index]
+        self.cache_index["lcp_by_host_sw_if_index"].pop(lcp.host_sw_if_index, None)
+        return self.cache_remove_interface(ifname)
+
+    def cache_remove_unnumbered(self, ifname):
+        """Removes the unnumbered use of the interface, identified by name, from the VPP
+        config cache"""
+
+        iface = self.get_interface_by_name(ifname)
+        if not iface or iface.sw_if_index not in self.cache["interface_unnumbered"]:
+            self.logger.warning(
+                f"Trying to remove an unnumbered interface which is not in the config: {ifname}"
+            )
+            return False
+
+        target_idx = self.cache["interface_unnumbered"].pop(iface.sw_if_index)
+        self.cache_index["unnumbered_by_target"].get(target_idx, {}).pop(
+            iface.sw_if_index, None
         )
-        return False
+        return True
 
     def cache_remove_bondethernet_member(self, ifname):
         """Removes the bonderthernet member interface, identified by name, from the VPP config cache"""
@@ -200,6 +462,7 @@ class VPPApi:
             return False
 
         del self.cache["interfaces"][iface.sw_if_index]
+        self.__cache_index_remove_interface(iface)
         if len(self.cache["interface_addresses"][iface.sw_if_index]) > 0:
             self.logger.warning(f"Not all addresses were removed on {ifname}")
         del self.cache["interface_addresses"][iface.sw_if_index]
@@ -230,10 +493,10 @@ class VPPApi:
         self.cache_clear()
         ## Add mock local0
         idx = 0
-        self.cache["interfaces"][idx] = self.vpp_messages["sw_interface_details"].tuple(
+        self.cache["interfaces"][idx] = MockSwInterfaceDetails(
             sw_if_index=idx,
             sup_sw_if_index=idx,
-            l2_address=MACAddress("00:00:00:00:00:00"),
+            l2_address="00:00:00:00:00:00",
             flags=0,
             type=0,
             link_duplex=0,
@@ -254,9 +517,7 @@ class VPPApi:
             interface_dev_type="local",
             tag="mock",
         )
-        self.cache["interface_acls"][idx] = self.vpp_messages[
-            "acl_interface_list_details"
-        ].tuple(
+        self.cache["interface_acls"][idx] = MockAclInterfaceListDetails(
             sw_if_index=idx,
             count=0,
             n_input=0,
@@ -267,12 +528,10 @@ class VPPApi:
             if not "device-type" in iface or iface["device-type"] not in ["dpdk"]:
                 continue
             idx += 1
-            self.cache["interfaces"][idx] = self.vpp_messages[
-                "sw_interface_details"
-            ].tuple(
+            self.cache["interfaces"][idx] = MockSwInterfaceDetails(
                 sw_if_index=idx,
                 sup_sw_if_index=idx,
-                l2_address=MACAddress("00:00:00:00:00:00"),
+                l2_address="00:00:00:00:00:00",
                 flags=0,
                 type=0,
                 link_duplex=0,
@@ -293,9 +552,7 @@ class VPPApi:
                 interface_dev_type=iface["device-type"],
                 tag="mock",
             )
-            self.cache["interface_acls"][idx] = self.vpp_messages[
-                "acl_interface_list_details"
-            ].tuple(
+            self.cache["interface_acls"][idx] = MockAclInterfaceListDetails(
                 sw_if_index=idx,
                 count=0,
                 n_input=0,
@@ -306,146 +563,301 @@ class VPPApi:
         for idx, iface in self.cache["interfaces"].items():
             self.cache["interface_names"][iface.interface_name] = idx
             self.cache["interface_addresses"][idx] = []
+        self.cache_index_build()
 
         self.logger.debug(f"cache(mock): {self.cache}")
         return True
 
+    @PROFILER.timed
     def readconfig(self):
         """Read the configuration out of a running VPP Dataplane and put it into a
-        VPP config cache"""
-        # pylint: disable=no-member
+        VPP config cache. All independent dumps are sent to VPP at once, and their
+        replies are collected as they arrive, so reading the config takes about as
+        long as the slowest dump rather than the sum of all of them. Dumps that need
+        the results of the first batch (interface addresses and bondethernet members)
+        are sent as a second batch."""
         if not self.connected and not self.connect():
             self.logger.error("Could not connect to VPP")
             return False
 
+        start = time.monotonic()
         self.cache_clear()
-
         self.lcp_enabled = False
-        try:
-            self.logger.debug("Retrieving LCPs")
-            api_response = self.vpp.api.lcp_itf_pair_get()
-            if isinstance(api_response, tuple) and api_response[0].retval == 0:
-                for lcp in api_response[1]:
-                    self.cache["lcps"][lcp.phy_sw_if_index] = lcp
-                self.lcp_enabled = True
-        except AttributeError as err:
-            self.logger.warning(f"LinuxCP API not found - missing plugin: {err}")
-
-        self.logger.debug("Retrieving interfaces")
-        api_response = self.vpp.api.sw_interface_dump()
-        for iface in api_response:
-            self.cache["interfaces"][iface.sw_if_index] = iface
-            self.cache["interface_names"][iface.interface_name] = iface.sw_if_index
-            self.cache["interface_addresses"][iface.sw_if_index] = []
-            self.logger.debug(f"Retrieving IPv4 addresses for {iface.interface_name}")
-            ipr = self.vpp.api.ip_address_dump(
-                sw_if_index=iface.sw_if_index, is_ipv6=False
-            )
-            for addr in ipr:
-                self.cache["interface_addresses"][iface.sw_if_index].append(
-                    str(addr.prefix)
-                )
-            self.logger.debug(f"Retrieving IPv6 addresses for {iface.interface_name}")
-            ipr = self.vpp.api.ip_address_dump(
-                sw_if_index=iface.sw_if_index, is_ipv6=True
-            )
-            for addr in ipr:
-                self.cache["interface_addresses"][iface.sw_if_index].append(
-                    str(addr.prefix)
+        if self.cache_events is not None:
+            self.cache_events.clear()
+
+        if not self.__readconfig_tables(dict.fromkeys(self.cache)):
+            self.logger.error("Could not retrieve configuration from VPP")
+            return False
+
+        self.logger.info(
+            f"Retrieved {len(self.cache['interfaces'])} interfaces from VPP in {time.monotonic() - start:.3f}s"
+        )
+        self.cache_read = True
+        return self.cache_read
+
+    def __readconfig_dumps(self):
+        """Returns, for each table of the VPP config cache that is read as a whole, the
+        API calls that fill it (with their callback and arguments), and the warning to
+        log if VPP does not know them (because the plugin is not loaded)"""
+        acl_warning = "ACL API not found - missing plugin"
+        sflow_warning = "sFlow API not found - missing plugin"
+        return {
+            "lcps": (
+                [("lcp_itf_pair_get", self.__readconfig_lcps, {})],
+                "LinuxCP API not found - missing plugin",
+            ),
+            ## TODO(pim): Remove the warning after 23.10 release
+            "interface_mpls": (
+                [("mpls_interface_dump", self.__readconfig_mpls, {})],
+                "MPLS state retrieval requires https://gerrit.fd.io/r/c/vpp/+/39022",
+            ),
+            "acls": (
+                [("acl_dump", self.__readconfig_acls, {"acl_index": 0xFFFFFFFF})],
+                acl_warning,
+            ),
+            "interface_acls": (
+                [("acl_interface_list_dump", self.__readconfig_interface_acls, {})],
+                acl_warning,
+            ),
+            "interface_unnumbered": (
+                [("ip_unnumbered_dump", self.__readconfig_unnumbered, {})],
+                None,
+            ),
+            "bondethernets": (
+                [("sw_bond_interface_dump", self.__readconfig_bondethernets, {})],
+                None,
+            ),
+            "bridgedomains": (
+                [("bridge_domain_dump", self.__readconfig_bridgedomains, {})],
+                None,
+            ),
+            "vxlan_tunnels": (
+                [("vxlan_tunnel_v2_dump", self.__readconfig_vxlan_tunnels, {})],
+                "VXLAN API not found - missing plugin",
+            ),
+            "l2xcs": ([("l2_xconnect_dump", self.__readconfig_l2xcs, {})], None),
+            "taps": ([("sw_interface_tap_v2_dump", self.__readconfig_taps, {})], None),
+            "sflow": (
+                [
+                    ("sflow_sampling_rate_get", self.__readconfig_sflow_sampling, {}),
+                    ("sflow_polling_interval_get", self.__readconfig_sflow_polling, {}),
+                    ("sflow_header_bytes_get", self.__readconfig_sflow_header, {}),
+                ],
+                sflow_warning,
+            ),
+            "interface_sflow": (
+                [("sflow_interface_dump", self.__readconfig_interface_sflow, {})],
+                sflow_warning,
+            ),
+        }
+
+    def __readconfig_tables(self, tables):
+        """Read the given tables of the VPP config cache from VPP. 'tables' maps each
+        table to None, to read it as a whole, or (for CACHE_SCOPED_TABLES) to the set of
+        sw_if_index to read. Tables that are read as a whole are emptied first, so that
+        objects which VPP no longer has are removed. Returns True upon success."""
+        pipeline = VPPApiPipeline(self.vpp)
+        if "interfaces" in tables:
+            if tables["interfaces"] is None:
+                self.logger.debug("Retrieving interfaces")
+                self.cache["interfaces"] = {}
+                self.cache["interface_names"] = {}
+                pipeline.submit(
+                    "sw_interface_dump", callback=self.__readconfig_interfaces
                 )
+            else:
+                for sw_if_index in tables["interfaces"]:
+                    self.logger.debug(f"Retrieving interface {sw_if_index}")
+                    iface = self.cache["interfaces"].pop(sw_if_index, None)
+                    if iface:
+                        self.cache["interface_names"].pop(iface.interface_name, None)
+                    pipeline.submit(
+                        "sw_interface_dump",
+                        callback=self.__readconfig_interfaces,
+                        sw_if_index=sw_if_index,
+                    )
+
+        for table, (dumps, warning) in self.__readconfig_dumps().items():
+            if table not in tables:
+                continue
+            self.logger.debug(f"Retrieving {table}")
+            self.cache[table] = {}
+            if table == "lcps":
+                self.lcp_enabled = False
+            try:
+                for msgname, callback, kwargs in dumps:
+                    # pylint: disable=not-a-mapping
+                    pipeline.submit(msgname, callback=callback, **kwargs)
+            except AttributeError as err:
+                if warning:
+                    self.logger.warning(f"{warning}: {err}")
+
+        if not pipeline.flush():
+            return False
+        if not self.__readconfig_dependents(pipeline, tables):
+            return False
+        if "interfaces" in tables:
+            self.__cache_prune_interfaces()
+        self.cache_index_build()
+        return True
 
-        try:  ## TODO(pim): Remove after 23.10 release
-            self.logger.debug("Retrieving interface MPLS state")
-            api_response = self.vpp.api.mpls_interface_dump()
-            for iface in api_response:
-                self.cache["interface_mpls"][iface.sw_if_index] = True
-        except AttributeError:
-            self.logger.warning(
-                "MPLS state retrieval requires https://gerrit.fd.io/r/c/vpp/+/39022"
+    def __cache_prune_interfaces(self):
+        """Remove the entries of interfaces that no longer exist in VPP from the tables
+        of the VPP config cache that are kept per interface"""
+        for table in CACHE_INTERFACE_TABLES:
+            for sw_if_index in list(self.cache[table]):
+                if sw_if_index not in self.cache["interfaces"]:
+                    del self.cache[table][sw_if_index]
+        for phy_sw_if_index, lcp in list(self.cache["lcps"].items()):
+            if lcp.host_sw_if_index not in self.cache["interfaces"]:
+                del self.cache["lcps"][phy_sw_if_index]
+
+    def __readconfig_dependents(self, pipeline, tables):
+        """Retrieve the IPv4 and IPv6 addresses of interfaces, and the members of
+        bondethernets, which can only be asked for once the interfaces and bondethernets
+        are known. VPP cannot dump these for all interfaces at once, so one request per
+        interface is sent, all of them at once. When all replies are in, the VPP config
+        cache is filled in one pass, keeping IPv4 before IPv6 addresses, in the order
+        VPP returned them. Besides the given tables, this reads the addresses of new
+        interfaces and the members of new bondethernets."""
+        addresses = {}
+        members = {}
+
+        def collect(table, key):
+            def callback(_reply, details):
+                table[key] = details
+
+            return callback
+
+        def wanted(table, keys, whole):
+            if whole:
+                self.cache[table] = {}
+                return list(keys)
+            scope = tables.get(table) or set()
+            return [key for key in keys if key in scope or key not in self.cache[table]]
+
+        def whole(table):
+            return table in tables and tables[table] is None
+
+        address_idxs = wanted(
+            "interface_addresses",
+            self.cache["interfaces"],
+            whole("interface_addresses"),
+        )
+        member_idxs = wanted(
+            "bondethernet_members",
+            self.cache["bondethernets"],
+            whole("bondethernet_members") or "bondethernets" in tables,
+        )
+        for sw_if_index in address_idxs:
+            for is_ipv6 in [False, True]:
+                pipeline.submit(
+                    "ip_address_dump",
+                    callback=collect(addresses, (sw_if_index, is_ipv6)),
+                    sw_if_index=sw_if_index,
+                    is_ipv6=is_ipv6,
+                )
+        for sw_if_index in member_idxs:
+            pipeline.submit(
+                "sw_member_interface_dump",
+                callback=collect(members, sw_if_index),
+                sw_if_index=sw_if_index,
             )
+        if not pipeline.flush():
+            return False
 
-        try:
-            self.logger.debug("Retrieving ACLs")
-            api_response = self.vpp.api.acl_dump(acl_index=0xFFFFFFFF)
-            for acl in api_response:
-                self.cache["acls"][acl.acl_index] = acl
-
-            self.logger.debug("Retrieving interface ACLs")
-            api_response = self.vpp.api.acl_interface_list_dump()
-            for iface in api_response:
-                self.cache["interface_acls"][iface.sw_if_index] = iface
-        except AttributeError as err:
-            self.logger.warning(f"ACL API not found - missing plugin: {err}")
-
-        self.logger.debug("Retrieving interface Unnumbered state")
-        api_response = self.vpp.api.ip_unnumbered_dump()
-        for iface in api_response:
+        for sw_if_index in address_idxs:
+            self.cache["interface_addresses"][sw_if_index] = [
+                str(addr.prefix)
+                for is_ipv6 in [False, True]
+                for addr in addresses.get((sw_if_index, is_ipv6), [])
+            ]
+        for sw_if_index in member_idxs:
+            self.cache["bondethernet_members"][sw_if_index] = [
+                member.sw_if_index for member in members.get(sw_if_index, [])
+            ]
+        return True
+
+    def __readconfig_lcps(self, reply, details):
+        """Add the LCPs returned by VPP to the config cache"""
+        if reply.retval != 0:
+            return
+        for lcp in details:
+            self.cache["lcps"][lcp.phy_sw_if_index] = lcp
+        self.lcp_enabled = True
+
+    def __readconfig_interfaces(self, _reply, details):
+        """Add the interfaces returned by VPP to the config cache"""
+        for iface in details:
+            self.cache["interfaces"][iface.sw_if_index] = iface
+            self.cache["interface_names"][iface.interface_name] = iface.sw_if_index
+
+    def __readconfig_mpls(self, _reply, details):
+        """Add the MPLS enabled interfaces returned by VPP to the config cache"""
+        for iface in details:
+            self.cache["interface_mpls"][iface.sw_if_index] = True
+
+    def __readconfig_acls(self, _reply, details):
+        """Add the ACLs returned by VPP to the config cache"""
+        for acl in details:
+            self.cache["acls"][acl.acl_index] = acl
+
+    def __readconfig_interface_acls(self, _reply, details):
+        """Add the interface ACLs returned by VPP to the config cache"""
+        for iface in details:
+            self.cache["interface_acls"][iface.sw_if_index] = iface
+
+    def __readconfig_unnumbered(self, _reply, details):
+        """Add the unnumbered interfaces returned by VPP to the config cache"""
+        for iface in details:
             self.cache["interface_unnumbered"][iface.sw_if_index] = iface.ip_sw_if_index
 
-        self.logger.debug("Retrieving bondethernets")
-        api_response = self.vpp.api.sw_bond_interface_dump()
-        for iface in api_response:
+    def __readconfig_bondethernets(self, _reply, details):
+        """Add the bondethernets returned by VPP to the config cache"""
+        for iface in details:
             self.cache["bondethernets"][iface.sw_if_index] = iface
             self.cache["bondethernet_members"][iface.sw_if_index] = []
-            for member in self.vpp.api.sw_member_interface_dump(
-                sw_if_index=iface.sw_if_index
-            ):
-                self.cache["bondethernet_members"][iface.sw_if_index].append(
-                    member.sw_if_index
-                )
 
-        self.logger.debug("Retrieving bridgedomains")
-        api_response = self.vpp.api.bridge_domain_dump()
-        for bridge in api_response:
+    def __readconfig_bridgedomains(self, _reply, details):
+        """Add the bridgedomains returned by VPP to the config cache"""
+        for bridge in details:
             self.cache["bridgedomains"][bridge.bd_id] = bridge
 
-        try:
-            self.logger.debug("Retrieving vxlan_tunnels")
-            api_response = self.vpp.api.vxlan_tunnel_v2_dump()
-            for vxlan in api_response:
-                self.cache["vxlan_tunnels"][vxlan.sw_if_index] = vxlan
-        except AttributeError as err:
-            self.logger.warning(f"VXLAN API not found - missing plugin: {err}")
-
-        self.logger.debug("Retrieving L2 Cross Connects")
-        api_response = self.vpp.api.l2_xconnect_dump()
-        for l2xc in api_response:
+    def __readconfig_vxlan_tunnels(self, _reply, details):
+        """Add the VXLAN tunnels returned by VPP to the config cache"""
+        for vxlan in details:
+            self.cache["vxlan_tunnels"][vxlan.sw_if_index] = vxlan
+
+    def __readconfig_l2xcs(self, _reply, details):
+        """Add the L2 Cross Connects returned by VPP to the config cache"""
+        for l2xc in details:
             self.cache["l2xcs"][l2xc.rx_sw_if_index] = l2xc
 
-        self.logger.debug("Retrieving TAPs")
-        api_response = self.vpp.api.sw_interface_tap_v2_dump()
-        for tap in api_response:
+    def __readconfig_taps(self, _reply, details):
+        """Add the TAPs returned by VPP to the config cache"""
+        for tap in details:
             self.cache["taps"][tap.sw_if_index] = tap
 
-        try:
-            self.logger.debug("Retrieving sFlow")
-
-            api_response = self.vpp.api.sflow_sampling_rate_get()
-            if api_response:
-                self.cache["sflow"]["sampling-rate"] = api_response.sampling_N
-            api_response = self.vpp.api.sflow_polling_interval_get()
-            if api_response:
-                self.cache["sflow"]["polling-interval"] = api_response.polling_S
-            api_response = self.vpp.api.sflow_header_bytes_get()
-            if api_response:
-                self.cache["sflow"]["header-bytes"] = api_response.header_B
-
-            api_response = self.vpp.api.sflow_interface_dump()
-            for iface in api_response:
-                self.cache["interface_sflow"][iface.hw_if_index] = True
-        except AttributeError as err:
-            self.logger.warning(f"sFlow API not found - missing plugin: {err}")
-
-        self.logger.debug("Retrieving interface Unnumbered state")
-        api_response = self.vpp.api.ip_unnumbered_dump()
-        for iface in api_response:
-            self.cache["interface_unnumbered"][iface.sw_if_index] = iface.ip_sw_if_index
+    def __readconfig_sflow_sampling(self, reply, _details):
+        """Add the sFlow sampling rate returned by VPP to the config cache"""
+        if reply:
+            self.cache["sflow"]["sampling-rate"] = reply.sampling_N
 
-        self.logger.debug("Retrieving bondethernets")
-        api_response = self.vpp.api.sw_bond_interface_dump()
+    def __readconfig_sflow_polling(self, reply, _details):
+        """Add the sFlow polling interval returned by VPP to the config cache"""
+        if reply:
+            self.cache["sflow"]["polling-interval"] = reply.polling_S
 
-        self.cache_read = True
-        return self.cache_read
+    def __readconfig_sflow_header(self, reply, _details):
+        """Add the sFlow header bytes returned by VPP to the config cache"""
+        if reply:
+            self.cache["sflow"]["header-bytes"] = reply.header_B
+
+    def __readconfig_interface_sflow(self, _reply, details):
+        """Add the sFlow enabled interfaces returned by VPP to the config cache"""
+        for iface in details:
+            self.cache["interface_sflow"][iface.hw_if_index] = True
 
     def phys_exist(self, ifname_list):
         """Return True if all interfaces in the `ifname_list` exist as physical interface names
@@ -470,9 +882,8 @@ class VPPApi:
         """Return all interfaces which have a sub-id and one or more tags"""
         subints = [
             self.cache["interfaces"][x].interface_name
-            for x in self.cache["interfaces"]
-            if self.cache["interfaces"][x].sub_id > 0
-            and self.cache["interfaces"][x].sub_number_of_tags > 0
+            for x in self.cache_index["sub_interfaces"]
+            if self.cache["interfaces"][x].sub_number_of_tags > 0
         ]
         return subints
 
@@ -480,9 +891,8 @@ class VPPApi:
         """Return all interfaces which have a sub-id and a non-zero inner vlan tag"""
         qinx_subints = [
             self.cache["interfaces"][x].interface_name
-            for x in self.cache["interfaces"]
-            if self.cache["interfaces"][x].sub_id > 0
-            and self.cache["interfaces"][x].sub_inner_vlan_id > 0
+            for x in self.cache_index["sub_interfaces"]
+            if self.cache["interfaces"][x].sub_inner_vlan_id > 0
         ]
         return qinx_subints
 
@@ -490,9 +900,8 @@ class VPPApi:
         """Return all interfaces which have only an outer vlan tag (dot1q/dot1ad)"""
         dot1x_subints = [
             self.cache["interfaces"][x].interface_name
-            for x in self.cache["interfaces"]
-            if self.cache["interfaces"][x].sub_id > 0
-            and self.cache["interfaces"][x].sub_inner_vlan_id == 0
+            for x in self.cache_index["sub_interfaces"]
+            if self.cache["interfaces"][x].sub_inner_vlan_id == 0
         ]
         return dot1x_subints
 
@@ -500,8 +909,7 @@ class VPPApi:
         """Return all interfaces of VPP type 'Loopback'"""
         loopbacks = [
             self.cache["interfaces"][x].interface_name
-            for x in self.cache["interfaces"]
-            if self.cache["interfaces"][x].interface_dev_type == "Loopback"
+            for x in self.cache_index["dev_types"].get("Loopback", {})
         ]
         return loopbacks
 
@@ -510,10 +918,8 @@ class VPPApi:
         and aren't known to be virtual interfaces"""
         phys = [
             self.cache["interfaces"][x].interface_name
-            for x in self.cache["interfaces"]
-            if self.cache["interfaces"][x].sw_if_index
-            == self.cache["interfaces"][x].sup_sw_if_index
-            and self.cache["interfaces"][x].interface_dev_type
+            for x in self.cache_index["supers"]
+            if self.cache["interfaces"][x].interface_dev_type
             not in ["virtio", "BVI", "Loopback", "VXLAN", "local", "bond"]
         ]
         return phys
@@ -530,18 +936,29 @@ class VPPApi:
         """Return all vxlan_tunnel interfaces"""
         vxlan_tunnels = [
             self.cache["interfaces"][x].interface_name
-            for x in self.cache["interfaces"]
-            if self.cache["interfaces"][x].interface_dev_type in ["VXLAN"]
+            for x in self.cache_index["dev_types"].get("VXLAN", {})
         ]
         return vxlan_tunnels
 
     def get_lcp_by_interface(self, sw_if_index):
         """Return the LCP config cache for the interface given by sw_if_index"""
-        for _idx, lcp in self.cache["lcps"].items():
-            if lcp.phy_sw_if_index == sw_if_index:
-                return lcp
+        return self.cache["lcps"].get(sw_if_index)
+
+    def get_sub_interface_by_encap(self, sup_sw_if_index, outer, dot1ad=True):
+        """Return the sw_if_index of the first sub-interface on the given sup_sw_if_index
+        with the given dot1q/dot1ad outer tag and no inner tag, or None if it doesn't exist
+        """
+        for idx in self.cache_index["outer_tags"].get(
+            (sup_sw_if_index, bool(dot1ad), outer), {}
+        ):
+            return idx
         return None
 
+    def get_unnumbered_users(self, sw_if_index):
+        """Return the sw_if_index of all interfaces that are unnumbered and use the
+        interface given by sw_if_index"""
+        return list(self.cache_index["unnumbered_by_target"].get(sw_if_index, {}))
+
     def tap_is_lcp(self, tap_ifname):
         """Returns True if the given tap_ifname is a TAP interface belonging to an LCP,
         or False otherwise."""
@@ -550,7 +967,4 @@ class VPPApi:
         if not vpp_iface or not vpp_iface.interface_dev_type == "virtio":
             return False
 
-        for _idx, lcp in self.cache["lcps"].items():
-            if vpp_iface.sw_if_index == lcp.host_sw_if_index:
-                return True
-        return False
+        return vpp_iface.sw_if_index in self.cache_index["lcp_by_host_sw_if_index"]
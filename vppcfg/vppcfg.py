@@ -18,8 +18,8 @@ config files. See http://github.com/pimvanpelt/vppcfg/README.md for details. """
 # pylint: disable=duplicate-code
 import os
 import sys
+import atexit
 import logging
-import yaml
 
 # Ensure the paths are correct when we execute from the source tree
 try:
@@ -27,8 +27,8 @@ try:
 except ModuleNotFoundError:
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
     from vppcfg.config import Validator
-from vppcfg.vpp.reconciler import Reconciler
-from vppcfg.vpp.dumper import Dumper
+from vppcfg.config import yamlio
+from vppcfg.config import prefixlist
 
 try:
     import argparse
@@ -37,6 +37,52 @@ except ImportError:
     sys.exit(-2)
 
 
+def seconds(value):
+    """An argparse type for a number of seconds, which is 0 or more"""
+    try:
+        ret = float(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(f"invalid number: '{value}'") from err
+    if ret < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {value}")
+    return ret
+
+
+def start_profile(args):
+    """Start keeping time of the phases of vppcfg (and of all function calls, if a
+    cProfile is requested), and report on them when vppcfg exits"""
+    # pylint: disable=import-outside-toplevel
+    from vppcfg.profiler import PROFILER
+
+    cprofile = None
+    if args.cprofile:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    PROFILER.enable()
+
+    def stop_profile():
+        PROFILER.disable()
+        if cprofile:
+            cprofile.disable()
+            try:
+                cprofile.dump_stats(args.cprofile)
+            except OSError as err:
+                logging.error(
+                    f"Could not write cProfile stats to {args.cprofile}: {err}"
+                )
+        if args.profile_json:
+            try:
+                PROFILER.write_json(args.profile_json)
+            except OSError as err:
+                logging.error(f"Could not write profile to {args.profile_json}: {err}")
+        if args.profile:
+            PROFILER.write_table(sys.stderr)
+
+    atexit.register(stop_profile)
+
+
 def main():
     """The main vppcfg program"""
     parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
@@ -61,6 +107,24 @@ def main():
         action="store_true",
         help="""force progress despite warnings, default False""",
     )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        action="store_true",
+        help="""print the time spent in each phase to stderr upon exit, default False""",
+    )
+    parser.add_argument(
+        "--profile-json",
+        dest="profile_json",
+        type=str,
+        help="""write the time spent in each phase to this JSON file upon exit""",
+    )
+    parser.add_argument(
+        "--cprofile",
+        dest="cprofile",
+        type=str,
+        help="""run the command under cProfile, and write its stats to this file""",
+    )
 
     subparsers = parser.add_subparsers(dest="command")
     check_p = subparsers.add_parser(
@@ -111,6 +175,35 @@ def main():
         help="""Pathname of VPP API socket file""",
     )
 
+    snapshot_p = subparsers.add_parser(
+        "snapshot",
+        help="write a snapshot of the running VPP configuration to plan against offline (VPP readonly)",
+    )
+    snapshot_p.add_argument(
+        "-o",
+        "--output",
+        dest="outfile",
+        required=True,
+        type=str,
+        help="""Output file for the snapshot""",
+    )
+    snapshot_p.add_argument(
+        "-j",
+        "--vpp-json-dir",
+        dest="vpp_json_dir",
+        required=False,
+        type=str,
+        help="""Directory where VPP API JSON files are located""",
+    )
+    snapshot_p.add_argument(
+        "-a",
+        "--vpp-api-socket",
+        dest="vpp_api_socket",
+        required=False,
+        type=str,
+        help="""Pathname of VPP API socket file""",
+    )
+
     plan_p = subparsers.add_parser(
         "plan",
         help="plan changes from current VPP dataplane to target config (VPP readonly)",
@@ -136,6 +229,20 @@ def main():
         action="store_true",
         help="""Don't query VPP API, assume 'empty' dataplane config""",
     )
+    plan_p.add_argument(
+        "--from-snapshot",
+        dest="from_snapshot",
+        required=False,
+        type=str,
+        help="""Don't query VPP API, plan against the dataplane config in this snapshot file""",
+    )
+    plan_p.add_argument(
+        "--from-config",
+        dest="from_config",
+        required=False,
+        type=str,
+        help="""Don't query VPP API, plan against a dataplane that has this YAML configuration applied""",
+    )
     plan_p.add_argument(
         "-o",
         "--output",
@@ -143,7 +250,7 @@ def main():
         required=False,
         default="-",
         type=str,
-        help="""Output file for VPP CLI commands, default stdout""",
+        help="""Output file for VPP CLI commands, compressed if it ends in .gz, .bz2 or .xz, default stdout""",
     )
     plan_p.add_argument(
         "-j",
@@ -161,6 +268,12 @@ def main():
         type=str,
         help="""Pathname of VPP API socket file""",
     )
+    plan_p.add_argument(
+        "--no-plan-cache",
+        dest="no_plan_cache",
+        action="store_true",
+        help="""Don't use or update the cache of previously planned output""",
+    )
 
     apply_p = subparsers.add_parser(
         "apply", help="apply changes from current VPP dataplane to target config"
@@ -197,7 +310,118 @@ def main():
         help="""Pathname of VPP API socket file""",
     )
 
+    serve_p = subparsers.add_parser(
+        "serve",
+        help="apply changes to the VPP dataplane each time the target config changes",
+    )
+    serve_p.add_argument(
+        "-s",
+        "--schema",
+        dest="schema",
+        type=str,
+        help="""YAML schema validation file, default to use built-in""",
+    )
+    serve_p.add_argument(
+        "-c",
+        "--config",
+        dest="config",
+        required=True,
+        type=str,
+        help="""YAML configuration file for vppcfg""",
+    )
+    serve_p.add_argument(
+        "-j",
+        "--vpp-json-dir",
+        dest="vpp_json_dir",
+        required=False,
+        type=str,
+        help="""Directory where VPP API JSON files are located""",
+    )
+    serve_p.add_argument(
+        "-a",
+        "--vpp-api-socket",
+        dest="vpp_api_socket",
+        required=False,
+        type=str,
+        help="""Pathname of VPP API socket file""",
+    )
+    serve_p.add_argument(
+        "--resync",
+        dest="resync",
+        type=seconds,
+        default=300,
+        help="""Read the VPP configuration afresh and plan all of the config every this
+        many seconds, to correct changes made by others; 0 turns this off, default 300""",
+    )
+
+    fleet_p = subparsers.add_parser(
+        "fleet",
+        help="plan (and optionally apply) the configs of many VPP dataplanes at once",
+    )
+    fleet_p.add_argument(
+        "-m",
+        "--manifest",
+        dest="manifest",
+        required=True,
+        type=str,
+        help="""YAML manifest of the targets, each with its config and VPP API socket""",
+    )
+    fleet_p.add_argument(
+        "-s",
+        "--schema",
+        dest="schema",
+        type=str,
+        help="""YAML schema validation file, default to use built-in""",
+    )
+    fleet_p.add_argument(
+        "-o",
+        "--output-dir",
+        dest="output_dir",
+        required=False,
+        type=str,
+        help="""Directory to write the VPP CLI commands of each target to, as <target>.exec""",
+    )
+    fleet_p.add_argument(
+        "-j",
+        "--vpp-json-dir",
+        dest="vpp_json_dir",
+        required=False,
+        type=str,
+        help="""Directory where VPP API JSON files are located""",
+    )
+    fleet_p.add_argument(
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=8,
+        help="""Run up to this many targets at a time, default 8""",
+    )
+    fleet_p.add_argument(
+        "--apply",
+        dest="apply",
+        action="store_true",
+        help="""Apply the planned changes to each target, default False""",
+    )
+    fleet_p.add_argument(
+        "--summary-json",
+        dest="summary_json",
+        type=str,
+        help="""Write the summary of all targets to this JSON file""",
+    )
+
     args = parser.parse_args()
+    if args.command == "plan":
+        sources = [
+            flag
+            for flag, value in [
+                ("--novpp", args.novpp),
+                ("--from-snapshot", args.from_snapshot),
+                ("--from-config", args.from_config),
+            ]
+            if value
+        ]
+        if len(sources) > 1:
+            plan_p.error(f"{' and '.join(sources)} cannot be used together")
     if not args.command:
         parser.print_help()
         print("\nPlease see vppcfg <command> -h   for per-command arguments")
@@ -208,9 +432,17 @@ def main():
         level = logging.DEBUG
     if args.quiet:
         level = logging.WARNING
-    logging.basicConfig(
-        format="[%(levelname)-8s] %(name)s.%(funcName)s: %(message)s", level=level
-    )
+    log_format = "[%(levelname)-8s] %(name)s.%(funcName)s: %(message)s"
+    if args.command == "fleet":
+        ## The targets of a fleet run at the same time, so their logs are told apart
+        ## by the name of the target, which is the name of the thread that runs it.
+        log_format = (
+            "[%(levelname)-8s] %(threadName)s %(name)s.%(funcName)s: %(message)s"
+        )
+    logging.basicConfig(format=log_format, level=level)
+
+    if args.profile or args.profile_json or args.cprofile:
+        start_profile(args)
 
     opt_kwargs = {}
     if "vpp_json_dir" in args and args.vpp_json_dir is not None:
@@ -218,7 +450,12 @@ def main():
     if "vpp_api_socket" in args and args.vpp_api_socket is not None:
         opt_kwargs["vpp_api_socket"] = args.vpp_api_socket
 
+    ## The VPP modules are only imported by the commands that need them, so that
+    ## `vppcfg check` starts up quickly.
+    # pylint: disable=import-outside-toplevel
     if args.command == "dump":
+        from vppcfg.vpp.dumper import Dumper
+
         dumper = Dumper(**opt_kwargs)
         if not dumper.readconfig():
             logging.error("Could not retrieve config from VPP")
@@ -226,10 +463,74 @@ def main():
         dumper.write(args.outfile)
         sys.exit(0)
 
+    if args.command == "snapshot":
+        from vppcfg.vpp.vppapi import VPPApi
+        from vppcfg.vpp import snapshot
+
+        vpp = VPPApi(**opt_kwargs)
+        if not vpp.readconfig():
+            logging.error("Could not retrieve config from VPP")
+            sys.exit(-7)
+        vpp.disconnect()
+        if not snapshot.save(vpp, args.outfile):
+            sys.exit(-9)
+        sys.exit(0)
+
+    if args.command == "fleet":
+        from vppcfg.vpp.fleet import Fleet, read_manifest
+
+        targets = read_manifest(args.manifest)
+        if targets is None:
+            sys.exit(-1)
+        fleet = Fleet(
+            targets,
+            schema=args.schema,
+            jobs=args.jobs,
+            apply=args.apply,
+            force=args.force,
+            output_dir=args.output_dir,
+            vpp_json_dir=args.vpp_json_dir,
+        )
+        if args.output_dir:
+            try:
+                os.makedirs(args.output_dir, exist_ok=True)
+            except OSError as err:
+                logging.error(f"Couldn't create {args.output_dir}: {err}")
+                sys.exit(-1)
+        ok = fleet.run()
+        fleet.write_summary(sys.stdout)
+        if args.summary_json:
+            try:
+                fleet.write_json(args.summary_json)
+            except OSError as err:
+                logging.error(f"Could not write summary to {args.summary_json}: {err}")
+        if not ok:
+            logging.error("Not all targets succeeded")
+            sys.exit(-60)
+        sys.exit(0)
+
+    if args.command == "serve":
+        from vppcfg.vpp.daemon import Daemon
+
+        daemon = Daemon(
+            args.config,
+            schema=args.schema,
+            force=args.force,
+            resync=args.resync,
+            **opt_kwargs,
+        )
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            logging.info("Stopping")
+            sys.exit(0)
+        logging.error(f"Stopped watching {args.config}")
+        sys.exit(-8)
+
     try:
         with open(args.config, "r", encoding="utf-8") as file:
             logging.info(f"Loading configfile {args.config}")
-            cfg = yaml.load(file, Loader=yaml.FullLoader)
+            cfg = yamlio.load(file)
             logging.debug(f"Config: {cfg}")
     except OSError as err:
         logging.error(f"Couldn't read config from {args.config}: {err}")
@@ -241,14 +542,48 @@ def main():
         sys.exit(-2)
     logging.info("Configuration is valid")
     if args.command == "check":
+        for plname in prefixlist.get_prefixlists(cfg):
+            members = sum(prefixlist.count(cfg, plname))
+            removed = members - sum(prefixlist.count_aggregated(cfg, plname))
+            if removed == 0:
+                continue
+            if prefixlist.is_aggregated(cfg, plname):
+                logging.info(
+                    f"Prefixlist {plname}: aggregation removes {removed} of {members} member(s)"
+                )
+            else:
+                logging.info(
+                    f"Prefixlist {plname}: aggregation would remove {removed} of {members} member(s), set 'aggregate: true' to use it"
+                )
         sys.exit(0)
 
+    from vppcfg.vpp.reconciler import Reconciler
+
     reconciler = Reconciler(cfg, **opt_kwargs)
     if args.command == "plan" and args.novpp:
         if not reconciler.vpp.mockconfig(cfg):
             sys.exit(-7)
     else:
-        if not reconciler.vpp.readconfig():
+        if args.command == "plan" and args.from_snapshot:
+            from vppcfg.vpp import snapshot
+
+            if not snapshot.load(reconciler.vpp, args.from_snapshot):
+                sys.exit(-3)
+        elif args.command == "plan" and args.from_config:
+            try:
+                with open(args.from_config, "r", encoding="utf-8") as file:
+                    logging.info(f"Loading configfile {args.from_config}")
+                    from_cfg = yamlio.load(file)
+            except OSError as err:
+                logging.error(f"Couldn't read config from {args.from_config}: {err}")
+                sys.exit(-3)
+            if not validator.valid_config(from_cfg):
+                logging.error(f"Configuration {args.from_config} is not valid, bailing")
+                sys.exit(-3)
+            from vppcfg.vpp.synthetic import synthesize
+
+            synthesize(reconciler.vpp, from_cfg)
+        elif not reconciler.vpp.readconfig():
             sys.exit(-3)
 
         if not reconciler.phys_exist_in_vpp():
@@ -265,6 +600,18 @@ def main():
             )
             sys.exit(-6)
 
+    plan_cache, plan_key = None, None
+    if args.command == "plan" and not args.novpp and not args.no_plan_cache:
+        from vppcfg.vpp.plancache import PlanCache
+
+        plan_cache = PlanCache()
+        plan_key = plan_cache.key(cfg, reconciler.vpp)
+        output = plan_cache.get(plan_key)
+        if output is not None:
+            reconciler.write(args.outfile, output=output)
+            logging.info("Planning succeeded")
+            sys.exit(0)
+
     failed = False
     if not reconciler.prune():
         if not args.force:
@@ -289,6 +636,8 @@ def main():
 
     if args.command == "plan":
         reconciler.write(args.outfile, emit_ok=not failed)
+        if plan_cache and not failed:
+            plan_cache.put(plan_key, reconciler.iter_output(emit_ok=True))
 
     if failed:
         logging.error("Planning failed")
@@ -298,6 +647,18 @@ def main():
     if args.command == "plan":
         sys.exit(0)
 
+    ## The Reconciler's config cache was changed while planning, so the Applier reads
+    ## the running config afresh on its own connection.
+    from vppcfg.vpp.applier import Applier
+
+    reconciler.vpp.disconnect()
+    applier = Applier(**opt_kwargs)
+    if not applier.apply(reconciler.plan):
+        logging.error("Applying failed")
+        sys.exit(-50)
+    applier.disconnect()
+
+    logging.info("Applying succeeded")
     sys.exit(0)
 
 